@@ -1,3 +1,4 @@
 from .backtest_engine import BacktestEngine
+from .parallel import run_sweep, run_symbols, run_frames
 
-__all__ = ['BacktestEngine']
+__all__ = ['BacktestEngine', 'run_sweep', 'run_symbols', 'run_frames']
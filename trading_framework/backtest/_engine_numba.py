@@ -0,0 +1,155 @@
+"""
+回测撮合内核 - 基于信号数组的状态机, 使用 numba 编译 (未安装 numba 时以纯 Python 运行)
+"""
+import numpy as np
+
+from utils._njit import njit, precompile
+
+# 平仓原因编码 (数组中存储下标)
+EXIT_REASONS = ('', 'SIGNAL', 'STOP_LOSS', 'TAKE_PROFIT', 'FINAL')
+_SIGNAL, _STOP_LOSS, _TAKE_PROFIT, _FINAL = 1, 2, 3, 4
+
+
+@njit(cache=True)
+def _close_trade(j, i, pos, price, qty, entry, capital, commission, slippage, exit_reason,
+                 exit_idx, exit_px, exit_comm, pnl, pnl_pct, reason):
+    """平仓成交并写入第 j 笔交易的出场字段, 返回平仓后资金"""
+    if pos == 1:
+        actual_price = price * (1 - slippage)
+        proceeds = qty * actual_price
+        commission_cost = proceeds * commission
+        capital += proceeds - commission_cost
+        trade_pnl = (actual_price - entry) * qty
+    else:
+        actual_price = price * (1 + slippage)
+        cost = qty * actual_price
+        commission_cost = cost * commission
+        capital -= cost + commission_cost
+        trade_pnl = (entry - actual_price) * qty
+
+    exit_idx[j] = i
+    exit_px[j] = actual_price
+    exit_comm[j] = commission_cost
+    pnl[j] = trade_pnl
+    pnl_pct[j] = (trade_pnl / (entry * qty)) * 100
+    reason[j] = exit_reason
+    return capital
+
+
+@njit(cache=True)
+def _simulate(close, enter_long, enter_short, exit_long, exit_short,
+              initial_capital, max_position_size, commission, slippage,
+              use_sl_tp, stop_loss, take_profit):
+    """
+    信号数组回测状态机 (只使用数组和标量, 撮合规则与逐bar回测一致)
+
+    持仓方向以整数表示: 1=多, -1=空, 0=空仓
+
+    Returns:
+        tuple: (交易笔数, 最终资金, entry_idx, exit_idx, side, entry_price, exit_price,
+                size, commission, exit_commission, pnl, pnl_pct, exit_reason, equity, position)
+    """
+    n = close.shape[0]
+    entry_idx = np.zeros(n, dtype=np.int64)
+    exit_idx = np.zeros(n, dtype=np.int64)
+    side = np.zeros(n, dtype=np.int8)
+    entry_px = np.zeros(n)
+    exit_px = np.zeros(n)
+    size = np.zeros(n)
+    entry_comm = np.zeros(n)
+    exit_comm = np.zeros(n)
+    pnl = np.zeros(n)
+    pnl_pct = np.zeros(n)
+    reason = np.zeros(n, dtype=np.int8)
+    equity = np.empty(n)
+    position = np.zeros(n, dtype=np.int8)
+
+    capital = initial_capital
+    pos = 0
+    qty = 0.0
+    entry = 0.0       # 含滑点的入场成交价
+    sl_px = 0.0       # 止损触发价 (按入场bar收盘价计算, 与策略 entry_price 一致)
+    tp_px = 0.0       # 止盈触发价
+    k = 0             # 已开仓交易笔数
+
+    for i in range(n):
+        price = close[i]
+        actual_price = 0.0
+        new_qty = 0.0
+        commission_cost = 0.0
+
+        # 检查止损止盈 (与开仓时算好的触发价直接比较)
+        if use_sl_tp and pos != 0:
+            if pos == 1:
+                hit_sl = price <= sl_px
+                hit_tp = price >= tp_px
+            else:
+                hit_sl = price >= sl_px
+                hit_tp = price <= tp_px
+
+            if hit_sl:
+                capital = _close_trade(k - 1, i, pos, price, qty, entry, capital, commission, slippage,
+                                       _STOP_LOSS, exit_idx, exit_px, exit_comm, pnl, pnl_pct, reason)
+                pos = 0
+            elif hit_tp:
+                capital = _close_trade(k - 1, i, pos, price, qty, entry, capital, commission, slippage,
+                                       _TAKE_PROFIT, exit_idx, exit_px, exit_comm, pnl, pnl_pct, reason)
+                pos = 0
+
+        # 检查进场信号
+        if pos == 0:
+            if enter_long[i]:
+                actual_price = price * (1 + slippage)
+                new_qty = capital * max_position_size / actual_price
+                cost = new_qty * actual_price
+                commission_cost = cost * commission
+                total_cost = cost + commission_cost
+                if total_cost <= capital:
+                    capital -= total_cost
+                    pos = 1
+            elif enter_short[i]:
+                actual_price = price * (1 - slippage)
+                new_qty = capital * max_position_size / actual_price
+                proceeds = new_qty * actual_price
+                commission_cost = proceeds * commission
+                capital += proceeds - commission_cost
+                pos = -1
+
+            if pos != 0:
+                qty = new_qty
+                entry = actual_price
+                sl_px = price * (1 - pos * stop_loss)
+                tp_px = price * (1 + pos * take_profit)
+                entry_idx[k] = i
+                side[k] = pos
+                entry_px[k] = actual_price
+                size[k] = new_qty
+                entry_comm[k] = commission_cost
+                k += 1
+
+        # 检查出场信号
+        elif (pos == 1 and exit_long[i]) or (pos == -1 and exit_short[i]):
+            capital = _close_trade(k - 1, i, pos, price, qty, entry, capital, commission, slippage,
+                                   _SIGNAL, exit_idx, exit_px, exit_comm, pnl, pnl_pct, reason)
+            pos = 0
+
+        # 权益 = 资金 + 未实现盈亏
+        if pos == 1:
+            equity[i] = capital + (price - entry) * qty
+        elif pos == -1:
+            equity[i] = capital + (entry - price) * qty
+        else:
+            equity[i] = capital
+        position[i] = pos
+
+    # 结束时仍有持仓, 以最后收盘价平仓
+    if pos != 0:
+        capital = _close_trade(k - 1, n - 1, pos, close[n - 1], qty, entry, capital, commission, slippage,
+                               _FINAL, exit_idx, exit_px, exit_comm, pnl, pnl_pct, reason)
+
+    return (k, capital, entry_idx, exit_idx, side, entry_px, exit_px, size,
+            entry_comm, exit_comm, pnl, pnl_pct, reason, equity, position)
+
+
+# 导入时按显式签名编译 (cache=True 时直接加载磁盘缓存), 避免首次回测计入编译耗时
+precompile(_simulate, '({f8}, {b1}, {b1}, {b1}, {b1}, float64, float64, float64, float64, boolean, float64, float64)')
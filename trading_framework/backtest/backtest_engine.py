@@ -6,12 +6,18 @@ import numpy as np
 from datetime import datetime
 import logging
 
+from ._engine_numba import EXIT_REASONS, _simulate
+
 logger = logging.getLogger(__name__)
 
 
 class BacktestEngine:
     """回测引擎"""
 
+    # 持仓方向编码 -> 持仓名称 (下标为 方向 + 1)
+    POSITION_NAMES = np.array(['SHORT', None, 'LONG'], dtype=object)
+    _POSITION_CODES = {None: 0, 'LONG': 1, 'SHORT': -1}
+
     def __init__(self, strategy, config):
         """
         初始化回测引擎
@@ -25,8 +31,13 @@ class BacktestEngine:
 
         # 回测配置
         self.initial_capital = config['trading']['initial_capital']
+        self.max_position_size = config['trading']['max_position_size']
         self.commission = config['backtest']['commission']
         self.slippage = config['backtest']['slippage']
+        # 策略不使用止损止盈时可在配置中关闭, 回测循环跳过该检查
+        self.use_sl_tp = config['backtest'].get('use_sl_tp', True)
+        # 权益曲线存储精度, 分钟级多年回测可设为 float32 以减半内存
+        self.equity_dtype = np.dtype(config['backtest'].get('equity_dtype', 'float64'))
 
         # 回测状态
         self.capital = self.initial_capital
@@ -34,12 +45,38 @@ class BacktestEngine:
         self.position_size = 0
         self.entry_price = 0
 
-        # 交易记录
+        # 止损/止盈触发价, 开仓时按策略参数预先算好
+        self._sl_px = 0.0
+        self._tp_px = 0.0
+
+        # 交易记录 (回测结束后由下面的数组生成)
         self.trades = []
-        self.equity_curve = []
+        self.equity_curve = None
+
+        # 交易与权益数组, run() 中按K线数量预分配
+        self._allocate(0)
+        # 回撤计算的峰值缓冲区, 参数扫描中同一引擎多次回测时复用
+        self._peak_buf = np.empty(0, dtype=self.equity_dtype)
 
         logger.info(f"Backtest engine initialized - Capital: ${self.initial_capital}")
 
+    def _allocate(self, n):
+        """按K线数量预分配交易与权益数组 (交易笔数不超过K线数量)"""
+        self._n_trades = 0
+        self._entry_idx = np.zeros(n, dtype=np.int64)
+        self._exit_idx = np.zeros(n, dtype=np.int64)
+        self._side = np.zeros(n, dtype=np.int8)
+        self._entry_px = np.zeros(n)
+        self._exit_px = np.zeros(n)
+        self._size = np.zeros(n)
+        self._entry_comm = np.zeros(n)
+        self._exit_comm = np.zeros(n)
+        self._pnl = np.zeros(n)
+        self._pnl_pct = np.zeros(n)
+        self._reason = np.zeros(n, dtype=np.int8)
+        self._equity = np.empty(n, dtype=self.equity_dtype)
+        self._position_state = np.zeros(n, dtype=np.int8)
+
     def run(self, df):
         """
         运行回测
@@ -58,76 +95,130 @@ class BacktestEngine:
         self.position = None
         self.position_size = 0
         self.entry_price = 0
-        self.trades = []
-        self.equity_curve = []
 
         # 计算技术指标
         df = self.strategy.calculate_signals(df)
 
+        if self.strategy.vectorized:
+            self._run_vectorized(df)
+        else:
+            self._allocate(len(df))
+            self._run_bar_by_bar(df)
+
+        # 由结果数组生成交易记录和权益曲线
+        self.trades = self._build_trades(df.index)
+        self.equity_curve = pd.DataFrame({
+            'timestamp': df.index,
+            'equity': self._equity,
+            'position': self.POSITION_NAMES[self._position_state + 1]
+        })
+
+        # 计算回测结果
+        results = self._calculate_results(df)
+
+        logger.info("Backtest completed")
+        return results
+
+    def run_many(self, param_grid, df, workers=None):
+        """
+        多进程回测多组参数 (以当前策略参数为基础, 网格中的参数覆盖之)
+
+        Args:
+            param_grid: 参数网格 ({参数名: 取值列表} 或参数字典列表)
+            df: K线数据DataFrame
+            workers: 进程数, 默认 CPU 核数
+
+        Returns:
+            list: 每组参数的回测汇总
+        """
+        from .parallel import run_sweep
+        return run_sweep(df, type(self.strategy), param_grid, self.config, workers=workers,
+                         base_params=self.strategy.params, name=self.strategy.name)
+
+    def _run_vectorized(self, df):
+        """
+        基于预计算信号数组回测 (适用于信号与持仓状态无关的策略)
+
+        一次性取出收盘价和四列布尔信号, 在纯数组状态机中完成撮合
+        """
+        close = df['close'].to_numpy(dtype=np.float64)
+        enter_long, enter_short, exit_long, exit_short = self.strategy.signal_arrays(df)
+
+        (self._n_trades, self.capital, self._entry_idx, self._exit_idx, self._side,
+         self._entry_px, self._exit_px, self._size, self._entry_comm, self._exit_comm,
+         self._pnl, self._pnl_pct, self._reason, self._equity, self._position_state) = _simulate(
+            close, enter_long, enter_short, exit_long, exit_short,
+            float(self.initial_capital), float(self.max_position_size),
+            float(self.commission), float(self.slippage), bool(self.use_sl_tp),
+            float(self.strategy.stop_loss_pct), float(self.strategy.take_profit_pct),
+        )
+        if self._equity.dtype != self.equity_dtype:
+            self._equity = self._equity.astype(self.equity_dtype)
+
+    def _run_bar_by_bar(self, df):
+        """逐bar调用策略判断方法回测 (适用于信号依赖持仓状态的策略)"""
+        # 收盘价等列一次性取为数组, 循环内按下标读取标量, 避免每bar构造 Series
+        self.strategy.bind_frame(df)
+        close_arr = df['close'].to_numpy(dtype=np.float64)
+        use_sl_tp = self.use_sl_tp
+
         # 遍历每个时间点
-        for i in range(len(df)):
-            current = df.iloc[i]
-            current_price = current['close']
-            current_time = df.index[i]
-
-            # 检查止损止盈
-            if self.position:
-                if self.strategy.check_stop_loss(current_price):
-                    self._close_position(current_price, current_time, 'STOP_LOSS')
+        for i in range(len(close_arr)):
+            current_price = close_arr[i]
+
+            # 检查止损止盈 (与开仓时算好的触发价直接比较)
+            if use_sl_tp and self.position:
+                if self.position == 'LONG':
+                    hit_sl = current_price <= self._sl_px
+                    hit_tp = current_price >= self._tp_px
+                else:
+                    hit_sl = current_price >= self._sl_px
+                    hit_tp = current_price <= self._tp_px
+
+                if hit_sl:
+                    self._close_position(current_price, i, 'STOP_LOSS')
                     self.strategy.update_position(None, 0, 0)
 
-                elif self.strategy.check_take_profit(current_price):
-                    self._close_position(current_price, current_time, 'TAKE_PROFIT')
+                elif hit_tp:
+                    self._close_position(current_price, i, 'TAKE_PROFIT')
                     self.strategy.update_position(None, 0, 0)
 
             # 检查进场信号
             if self.position is None:
                 if self.strategy.should_enter_long(df, i):
-                    self._open_long(current_price, current_time)
+                    self._open_long(current_price, i)
                     self.strategy.update_position('LONG', current_price, self.position_size)
 
                 elif self.strategy.should_enter_short(df, i):
-                    self._open_short(current_price, current_time)
+                    self._open_short(current_price, i)
                     self.strategy.update_position('SHORT', current_price, self.position_size)
 
             # 检查出场信号
             elif self.position == 'LONG':
                 if self.strategy.should_exit_long(df, i):
-                    self._close_position(current_price, current_time, 'SIGNAL')
+                    self._close_position(current_price, i, 'SIGNAL')
                     self.strategy.update_position(None, 0, 0)
 
             elif self.position == 'SHORT':
                 if self.strategy.should_exit_short(df, i):
-                    self._close_position(current_price, current_time, 'SIGNAL')
+                    self._close_position(current_price, i, 'SIGNAL')
                     self.strategy.update_position(None, 0, 0)
 
             # 记录权益曲线
-            equity = self._calculate_equity(current_price)
-            self.equity_curve.append({
-                'timestamp': current_time,
-                'equity': equity,
-                'position': self.position
-            })
+            self._equity[i] = self._calculate_equity(current_price)
+            self._position_state[i] = self._POSITION_CODES[self.position]
 
         # 如果还有持仓,平仓
         if self.position:
-            final_price = df['close'].iloc[-1]
-            final_time = df.index[-1]
-            self._close_position(final_price, final_time, 'FINAL')
-
-        # 计算回测结果
-        results = self._calculate_results(df)
-
-        logger.info("Backtest completed")
-        return results
+            self._close_position(close_arr[-1], len(close_arr) - 1, 'FINAL')
 
-    def _open_long(self, price, time):
+    def _open_long(self, price, i):
         """开多仓"""
         # 考虑滑点
         actual_price = price * (1 + self.slippage)
 
         # 计算仓位大小
-        max_position_value = self.capital * self.config['trading']['max_position_size']
+        max_position_value = self.capital * self.max_position_size
         self.position_size = max_position_value / actual_price
 
         # 计算成本(包括手续费)
@@ -136,30 +227,25 @@ class BacktestEngine:
         total_cost = cost + commission_cost
 
         if total_cost > self.capital:
-            logger.warning(f"Insufficient capital for long position")
+            logger.warning("Insufficient capital for long position")
             return
 
         self.capital -= total_cost
         self.position = 'LONG'
         self.entry_price = actual_price
+        self._set_exit_levels(1, price)
 
-        logger.info(f"Open LONG at {actual_price:.2f}, size: {self.position_size:.6f}, cost: ${total_cost:.2f}")
+        logger.info("Open LONG at %.2f, size: %.6f, cost: $%.2f", actual_price, self.position_size, total_cost)
 
-        self.trades.append({
-            'entry_time': time,
-            'entry_price': actual_price,
-            'position_type': 'LONG',
-            'size': self.position_size,
-            'commission': commission_cost
-        })
+        self._record_entry(i, 1, actual_price, commission_cost)
 
-    def _open_short(self, price, time):
+    def _open_short(self, price, i):
         """开空仓"""
         # 考虑滑点
         actual_price = price * (1 - self.slippage)
 
         # 计算仓位大小
-        max_position_value = self.capital * self.config['trading']['max_position_size']
+        max_position_value = self.capital * self.max_position_size
         self.position_size = max_position_value / actual_price
 
         # 计算收入(扣除手续费)
@@ -170,20 +256,36 @@ class BacktestEngine:
         self.capital += net_proceeds
         self.position = 'SHORT'
         self.entry_price = actual_price
+        self._set_exit_levels(-1, price)
 
-        logger.info(f"Open SHORT at {actual_price:.2f}, size: {self.position_size:.6f}, proceeds: ${net_proceeds:.2f}")
+        logger.info("Open SHORT at %.2f, size: %.6f, proceeds: $%.2f", actual_price, self.position_size, net_proceeds)
 
-        self.trades.append({
-            'entry_time': time,
-            'entry_price': actual_price,
-            'position_type': 'SHORT',
-            'size': self.position_size,
-            'commission': commission_cost
-        })
+        self._record_entry(i, -1, actual_price, commission_cost)
+
+    def _set_exit_levels(self, side, price):
+        """
+        按入场bar收盘价 (与策略记录的入场价一致) 计算止损/止盈触发价
 
-    def _close_position(self, price, time, reason):
+        Args:
+            side: 1=多, -1=空
+            price: 入场bar收盘价
+        """
+        self._sl_px = price * (1 - side * self.strategy.stop_loss_pct)
+        self._tp_px = price * (1 + side * self.strategy.take_profit_pct)
+
+    def _record_entry(self, i, side, actual_price, commission_cost):
+        """写入一笔新交易的入场字段"""
+        k = self._n_trades
+        self._entry_idx[k] = i
+        self._side[k] = side
+        self._entry_px[k] = actual_price
+        self._size[k] = self.position_size
+        self._entry_comm[k] = commission_cost
+        self._n_trades = k + 1
+
+    def _close_position(self, price, i, reason):
         """平仓"""
-        if not self.position or not self.trades:
+        if not self.position or self._n_trades == 0:
             return
 
         # 考虑滑点
@@ -209,17 +311,16 @@ class BacktestEngine:
 
         pnl_pct = (pnl / (self.entry_price * self.position_size)) * 100
 
-        logger.info(f"Close {self.position} at {actual_price:.2f}, PnL: ${pnl:.2f} ({pnl_pct:.2f}%), Reason: {reason}")
+        logger.info("Close %s at %.2f, PnL: $%.2f (%.2f%%), Reason: %s", self.position, actual_price, pnl, pnl_pct, reason)
 
         # 更新最后一笔交易
-        self.trades[-1].update({
-            'exit_time': time,
-            'exit_price': actual_price,
-            'exit_reason': reason,
-            'pnl': pnl,
-            'pnl_pct': pnl_pct,
-            'exit_commission': commission_cost
-        })
+        k = self._n_trades - 1
+        self._exit_idx[k] = i
+        self._exit_px[k] = actual_price
+        self._exit_comm[k] = commission_cost
+        self._pnl[k] = pnl
+        self._pnl_pct[k] = pnl_pct
+        self._reason[k] = EXIT_REASONS.index(reason)
 
         self.position = None
         self.position_size = 0
@@ -241,31 +342,66 @@ class BacktestEngine:
 
         return equity
 
+    def _build_trades(self, index):
+        """由交易数组生成交易记录列表"""
+        n = self._n_trades
+        entry_times = index[self._entry_idx[:n]]
+        exit_times = index[self._exit_idx[:n]]
+        trades = []
+        for j in range(n):
+            trades.append({
+                'entry_time': entry_times[j],
+                'entry_price': self._entry_px[j],
+                'position_type': 'LONG' if self._side[j] == 1 else 'SHORT',
+                'size': self._size[j],
+                'commission': self._entry_comm[j],
+                'exit_time': exit_times[j],
+                'exit_price': self._exit_px[j],
+                'exit_reason': EXIT_REASONS[self._reason[j]],
+                'pnl': self._pnl[j],
+                'pnl_pct': self._pnl_pct[j],
+                'exit_commission': self._exit_comm[j]
+            })
+        return trades
+
     def _calculate_results(self, df):
         """计算回测结果指标"""
-        # 基本统计
-        total_trades = len([t for t in self.trades if 'exit_time' in t])
-        winning_trades = len([t for t in self.trades if t.get('pnl', 0) > 0])
-        losing_trades = len([t for t in self.trades if t.get('pnl', 0) < 0])
+        # 基本统计 (回测结束时所有交易均已平仓)
+        pnl = self._pnl[:self._n_trades]
+        wins = pnl > 0
+        losses = pnl < 0
+
+        total_trades = self._n_trades
+        winning_trades = int(wins.sum())
+        losing_trades = int(losses.sum())
 
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
 
         # 盈亏统计
-        total_pnl = sum([t.get('pnl', 0) for t in self.trades])
+        total_pnl = pnl.sum()
         total_return = (self.capital - self.initial_capital) / self.initial_capital * 100
 
-        avg_win = np.mean([t['pnl'] for t in self.trades if t.get('pnl', 0) > 0]) if winning_trades > 0 else 0
-        avg_loss = np.mean([t['pnl'] for t in self.trades if t.get('pnl', 0) < 0]) if losing_trades > 0 else 0
+        avg_win = pnl[wins].mean() if winning_trades > 0 else 0
+        avg_loss = pnl[losses].mean() if losing_trades > 0 else 0
 
         # 最大回撤
-        equity_curve_df = pd.DataFrame(self.equity_curve)
-        equity_curve_df['peak'] = equity_curve_df['equity'].cummax()
-        equity_curve_df['drawdown'] = (equity_curve_df['equity'] - equity_curve_df['peak']) / equity_curve_df['peak']
-        max_drawdown = equity_curve_df['drawdown'].min() * 100
+        equity = self._equity
+        if equity.size > 0:
+            if self._peak_buf.shape != equity.shape or self._peak_buf.dtype != equity.dtype:
+                self._peak_buf = np.empty_like(equity)
+            peak = np.maximum.accumulate(equity, out=self._peak_buf)
+            max_drawdown = ((equity - peak) / peak).min() * 100
+        else:
+            max_drawdown = 0
 
         # 夏普比率 (假设无风险利率为0)
-        equity_curve_df['returns'] = equity_curve_df['equity'].pct_change()
-        sharpe_ratio = (equity_curve_df['returns'].mean() / equity_curve_df['returns'].std() * np.sqrt(252)) if equity_curve_df['returns'].std() > 0 else 0
+        # 直接在权益数组上计算逐bar收益率 (样本标准差, 与 pandas 的 std 一致)
+        sharpe_ratio = 0
+        if equity.size > 2:
+            returns = np.diff(equity) / equity[:-1]
+            returns_std = returns.std(ddof=1)
+            if returns_std > 0:
+                sharpe_ratio = returns.mean() / returns_std * np.sqrt(252)
 
         # 盈亏比
         profit_factor = abs(avg_win / avg_loss) if avg_loss != 0 else 0
@@ -319,10 +455,13 @@ class BacktestEngine:
             print("-" * 120)
             print(f"{'Entry Time':<20} {'Exit Time':<20} {'Type':<6} {'Entry':<10} {'Exit':<10} {'PnL':<12} {'PnL%':<8} {'Reason':<12}")
             print("-" * 120)
-            for trade in results['trades']:
-                if 'exit_time' in trade:
-                    print(f"{str(trade['entry_time']):<20} {str(trade['exit_time']):<20} "
-                          f"{trade['position_type']:<6} {trade['entry_price']:<10.2f} "
-                          f"{trade['exit_price']:<10.2f} ${trade['pnl']:<11.2f} "
-                          f"{trade['pnl_pct']:<7.2f}% {trade['exit_reason']:<12}")
+            # 单个格式串拼接全部行后一次性输出, 避免逐笔 print
+            row_fmt = "{:<20} {:<20} {:<6} {:<10.2f} {:<10.2f} ${:<11.2f} {:<7.2f}% {:<12}"
+            print("\n".join(
+                row_fmt.format(str(trade['entry_time']), str(trade['exit_time']),
+                               trade['position_type'], trade['entry_price'],
+                               trade['exit_price'], trade['pnl'],
+                               trade['pnl_pct'], trade['exit_reason'])
+                for trade in results['trades'] if 'exit_time' in trade
+            ))
             print("-" * 120)
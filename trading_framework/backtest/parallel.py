@@ -0,0 +1,249 @@
+"""
+并行回测 - 使用进程池同时回测多组策略参数或多个交易对
+"""
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from .backtest_engine import BacktestEngine
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内共享的K线数据 (由进程池 initializer 每个进程设置一次)
+_worker_df = None
+_worker_shm = None
+
+# 可放入共享内存的定长 dtype 类别 (bool / 整数 / 浮点 / 复数 / 时间)
+_SHAREABLE_KINDS = 'biufcmM'
+
+
+def _share_frame(df):
+    """
+    把K线数据的定长列和索引写入一块共享内存
+
+    Args:
+        df: K线数据DataFrame
+
+    Returns:
+        tuple: (SharedMemory, 共享布局, 其余列 DataFrame)
+            布局为 [(列名, dtype, 偏移量), ...], 列名为 None 的条目是索引
+    """
+    arrays = [(None, df.index.to_numpy())] if df.index.dtype.kind in _SHAREABLE_KINDS else []
+    arrays += [(name, df[name].to_numpy()) for name in df.columns
+               if df[name].dtype.kind in _SHAREABLE_KINDS]
+
+    layout, offset = [], 0
+    for name, values in arrays:
+        layout.append((name, values.dtype, offset))
+        offset += -(-values.nbytes // 8) * 8  # 按 8 字节对齐
+
+    shm = SharedMemory(create=True, size=max(offset, 1))
+    for (_, values), (_, dtype, start) in zip(arrays, layout):
+        np.ndarray(values.shape, dtype, buffer=shm.buf, offset=start)[:] = values
+
+    shared = {name for name, _ in arrays}
+    rest = df[[name for name in df.columns if name not in shared]]
+    return shm, layout, rest
+
+
+def _init_worker(shm_name, layout, rest, columns, index_name, length):
+    """进程池初始化: 挂载共享内存, 以零拷贝只读视图重建K线数据 (每个进程只做一次)"""
+    global _worker_df, _worker_shm
+    _worker_shm = SharedMemory(name=shm_name)
+
+    index, shared = rest.index, {}
+    for name, dtype, offset in layout:
+        values = np.ndarray(length, dtype, buffer=_worker_shm.buf, offset=offset)
+        values.flags.writeable = False
+        if name is None:
+            index = pd.Index(values, name=index_name, copy=False)
+        else:
+            shared[name] = values
+
+    _worker_df = pd.DataFrame(
+        {name: shared[name] if name in shared else rest[name].to_numpy() for name in columns},
+        index=index, copy=False
+    )
+
+
+def _run_one(strategy_cls, strategy_config, engine_config):
+    """在工作进程中回测一组参数, 只返回汇总指标 (不含交易明细和权益曲线)"""
+    strategy = strategy_cls(strategy_config)
+    strategy.keep_indicators = False  # 只返回汇总指标, 不需要把指标列写回 DataFrame
+    engine = BacktestEngine(strategy, engine_config)
+    # 浅拷贝: 策略新增的指标列不会污染共享数据, OHLCV 列仍指向共享内存
+    results = engine.run(_worker_df.copy(deep=False))
+    summary = _summarize(results)
+    summary['params'] = strategy_config['params']
+    return summary
+
+
+def _summarize(results):
+    """去掉交易明细和权益曲线, 只保留可跨进程返回的汇总指标"""
+    return {k: v for k, v in results.items() if k not in ('trades', 'equity_curve')}
+
+
+def _run_symbol(symbol, config):
+    """在工作进程中获取单个交易对的历史数据并回测, 返回汇总指标"""
+    # 在工作进程内导入, 只导入 backtest 包时不加载 binance 客户端
+    from utils.data_fetcher import DataFetcher
+    from utils.strategy_loader import load_strategy
+
+    symbol_config = {**config, 'trading': {**config['trading'], 'symbol': symbol}}
+    network_config = config.get('network', {})
+    data_fetcher = DataFetcher(
+        proxy=network_config.get('proxy'),
+        timeout=network_config.get('timeout', 30),
+        cache_dir=config['backtest'].get('cache_dir', 'data/klines'),
+        dtype_backend=config['backtest'].get('dtype_backend')
+    )
+    df = data_fetcher.get_historical_klines(
+        symbol=symbol,
+        interval=config['trading']['interval'],
+        start_str=config['backtest']['start_date'],
+        end_str=config['backtest']['end_date']
+    )
+    del data_fetcher
+
+    strategy = load_strategy(config['strategy'])
+    strategy.keep_indicators = False
+    engine = BacktestEngine(strategy, symbol_config)
+    summary = _summarize(engine.run(df))
+    summary['symbol'] = symbol
+    summary['candles'] = len(df)
+    return summary
+
+
+def _run_frame(symbol, df, strategy_cls, strategy_config, engine_config):
+    """在工作进程中用已加载的K线数据回测单个交易对, 返回汇总指标"""
+    strategy = strategy_cls(strategy_config)
+    strategy.keep_indicators = False
+    engine = BacktestEngine(strategy, engine_config)
+    summary = _summarize(engine.run(df))
+    summary['symbol'] = symbol
+    summary['candles'] = len(df)
+    return summary
+
+
+def _collect_symbols(futures, symbols):
+    """按完成顺序收集各交易对的回测汇总, 失败的交易对记录日志后跳过, 结果按 symbols 顺序返回"""
+    results = {}
+    for future in as_completed(futures):
+        symbol = futures[future]
+        try:
+            results[symbol] = future.result()
+            logger.info("Backtest finished for %s: return %.2f%%", symbol, results[symbol]['total_return'])
+        except Exception as e:
+            logger.error("Backtest failed for %s: %s", symbol, e)
+
+    return {symbol: results[symbol] for symbol in symbols if symbol in results}
+
+
+def expand_param_grid(param_grid):
+    """
+    展开参数网格
+
+    Args:
+        param_grid: {参数名: 取值列表} 字典 (做笛卡尔积), 或参数字典列表
+
+    Returns:
+        list: 参数字典列表
+    """
+    if isinstance(param_grid, dict):
+        keys = list(param_grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*param_grid.values())]
+    return [dict(params) for params in param_grid]
+
+
+def run_sweep(df, strategy_cls, param_grid, engine_config, workers=None, base_params=None, name=None):
+    """
+    多进程参数扫描
+
+    Args:
+        df: K线数据DataFrame
+        strategy_cls: 策略类
+        param_grid: 参数网格, 见 expand_param_grid
+        engine_config: 回测引擎配置 (含 trading / backtest 段)
+        workers: 进程数, 默认 CPU 核数
+        base_params: 所有组合共用的基础参数, 网格中的同名参数覆盖它
+        name: 策略名称
+
+    Returns:
+        list: 每组参数的回测汇总, 顺序与参数网格一致
+    """
+    combos = expand_param_grid(param_grid)
+    strategy_configs = [
+        {'name': name or strategy_cls.__name__, 'params': {**(base_params or {}), **params}}
+        for params in combos
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(combos)) or 1
+
+    logger.info("Running parameter sweep: %d combinations on %d workers", len(combos), workers)
+
+    # K线数据只在共享内存中保存一份, 各工作进程直接映射, 不再逐进程序列化复制
+    shm, layout, rest = _share_frame(df)
+    initargs = (shm.name, layout, rest, list(df.columns), df.index.name, len(df))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=initargs) as executor:
+            futures = [
+                executor.submit(_run_one, strategy_cls, config, engine_config)
+                for config in strategy_configs
+            ]
+            return [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def run_symbols(config, symbols, workers=None):
+    """
+    多进程回测多个交易对 (同一策略和回测区间, 每个交易对在独立进程中获取数据并回测)
+
+    Args:
+        config: 完整配置字典
+        symbols: 交易对列表
+        workers: 进程数, 默认 CPU 核数
+
+    Returns:
+        dict: {交易对: 回测汇总}, 顺序与 symbols 一致; 失败的交易对不包含在内
+    """
+    workers = min(workers or os.cpu_count() or 1, len(symbols)) or 1
+
+    logger.info("Running backtest for %d symbols on %d workers", len(symbols), workers)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run_symbol, symbol, config): symbol for symbol in symbols}
+        return _collect_symbols(futures, symbols)
+
+
+def run_frames(strategy_cls, strategy_config, engine_config, symbol_dfs, workers=None):
+    """
+    多进程回测多个已加载K线数据的交易对 (每个交易对在独立进程中创建新的策略实例)
+
+    Args:
+        strategy_cls: 策略类
+        strategy_config: 策略配置字典 (name / params)
+        engine_config: 回测引擎配置 (含 trading / backtest 段)
+        symbol_dfs: {交易对: K线数据DataFrame}
+        workers: 进程数, 默认 CPU 核数
+
+    Returns:
+        dict: {交易对: 回测汇总}, 顺序与 symbol_dfs 一致; 失败的交易对不包含在内
+    """
+    symbols = list(symbol_dfs)
+    workers = min(workers or os.cpu_count() or 1, len(symbols)) or 1
+
+    logger.info("Running backtest for %d symbols on %d workers", len(symbols), workers)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_run_frame, symbol, df, strategy_cls, strategy_config, engine_config): symbol
+            for symbol, df in symbol_dfs.items()
+        }
+        return _collect_symbols(futures, symbols)
@@ -4,6 +4,7 @@
 """
 import sys
 import subprocess
+import importlib.util
 
 print("=" * 60)
 print("环境检查工具".center(60))
@@ -38,20 +39,12 @@ required_packages = {
 missing_packages = []
 installed_packages = []
 
+# 只查找模块规格判断是否安装, 不执行模块导入 (pandas/binance 冷导入需数百毫秒)
 for module_name, package_name in required_packages.items():
-    try:
-        if module_name == 'yaml':
-            import yaml
-        elif module_name == 'pandas':
-            import pandas
-        elif module_name == 'numpy':
-            import numpy
-        elif module_name == 'binance':
-            from binance.client import Client
-
+    if importlib.util.find_spec(module_name) is not None:
         print(f"✓ {package_name}")
         installed_packages.append(package_name)
-    except ImportError:
+    else:
         print(f"✗ {package_name} - 未安装")
         missing_packages.append(package_name)
 
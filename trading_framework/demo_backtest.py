@@ -3,9 +3,14 @@
 回测演示脚本 - 展示回测结果的示例输出
 用于在无法连接API时演示框架功能
 """
+import sys
 import time
 import random
 
+# 仅在交互式终端中播放进度动画; 重定向输出 (CI/日志采集) 或传入 --no-animate 时直接输出
+INTERACTIVE = sys.stdout.isatty() and '--no-animate' not in sys.argv
+_sleep = time.sleep if INTERACTIVE else (lambda seconds: None)
+
 print("\n" + "=" * 60)
 print("回测演示模式".center(60))
 print("=" * 60)
@@ -15,7 +20,7 @@ print("注意：这是演示输出，展示回测功能的效果")
 print("实际运行时会使用真实的市场数据")
 print()
 
-time.sleep(1)
+_sleep(1)
 
 # 模拟配置信息
 print("配置信息：")
@@ -31,19 +36,19 @@ print("止损: 2%")
 print("止盈: 4%")
 print()
 
-time.sleep(1)
+_sleep(1)
 
 # 模拟数据获取
 print("正在获取历史数据...")
 for i in range(3):
-    time.sleep(0.5)
+    _sleep(0.5)
     print(f"  下载进度: {(i+1)*33}%")
 
 print("✓ 数据加载完成: 7920 根K线")
 print("  时间范围: 2024-01-01 00:00:00 至 2024-12-01 23:00:00")
 print()
 
-time.sleep(1)
+_sleep(1)
 
 # 模拟回测过程
 print("正在运行回测...")
@@ -71,15 +76,20 @@ trades = [
     ("2024-10-11 14:00", "SELL", 69500.00, 2600.00, 3.89),
 ]
 
-for i, trade in enumerate(trades[:10], 1):
-    time.sleep(0.3)
-    if len(trade) == 3:
-        print(f"  [{i}] {trade[0]} - {trade[1]} at ${trade[2]:.2f}")
-    else:
-        print(f"  [{i}] {trade[0]} - {trade[1]} at ${trade[2]:.2f} | PnL: ${trade[3]:.2f} ({trade[4]:.2f}%)")
+trade_lines = [
+    f"  [{i}] {trade[0]} - {trade[1]} at ${trade[2]:.2f}" if len(trade) == 3 else
+    f"  [{i}] {trade[0]} - {trade[1]} at ${trade[2]:.2f} | PnL: ${trade[3]:.2f} ({trade[4]:.2f}%)"
+    for i, trade in enumerate(trades[:10], 1)
+]
+if INTERACTIVE:
+    for line in trade_lines:
+        _sleep(0.3)
+        print(line)
+else:
+    print("\n".join(trade_lines))
 
 print(f"\n  处理中... (共分析 {len(trades)} 笔交易)")
-time.sleep(1)
+_sleep(1)
 print()
 
 # 显示回测结果
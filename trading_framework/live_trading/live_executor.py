@@ -1,9 +1,15 @@
 """
 实盘交易执行器 - 用于实盘/模拟交易
 """
+import math
+import threading
 import time
+from decimal import Decimal
+import pandas as pd
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
+from binance.helpers import interval_to_milliseconds
+from binance.ws.streams import ThreadedWebsocketManager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +18,18 @@ logger = logging.getLogger(__name__)
 class LiveExecutor:
     """实盘交易执行器"""
 
+    # 计算信号使用的已收盘K线数量 (REST 拉取/启动预加载)
+    KLINE_WINDOW = 200
+    # 持仓缓存与 REST 对账的间隔(秒)
+    POSITION_RECONCILE_INTERVAL = 60
+    # 可用余额缓存有效期(秒)
+    BALANCE_TTL = 5.0
+    # 超过 K线周期的这个倍数仍未收到新收盘K线时, 认为 websocket 已失效, 退回 REST 拉取
+    KLINE_STREAM_STALE_FACTOR = 2
+    # K线推送失效后重新订阅的等待时间(秒), 连续失败时加倍, 不超过上限
+    KLINE_STREAM_RETRY_DELAY = 30.0
+    KLINE_STREAM_RETRY_MAX_DELAY = 600.0
+
     def __init__(self, strategy, config, data_fetcher):
         """
         初始化实盘执行器
@@ -46,6 +64,39 @@ class LiveExecutor:
         except Exception as e:
             logger.error(f"Failed to set leverage: {e}")
 
+        # 交易对数量过滤器 (LOT_SIZE), 启动时加载一次
+        self._step_size = None
+        self._min_qty = 0.0
+        self._qty_precision = 0
+        self._load_symbol_filters()
+
+        # websocket 推送的新收盘K线, 由交易循环逐根交给策略增量更新
+        self._pending_bars = []
+        self._last_bar_time = 0
+        self._bars_lock = threading.Lock()
+        self._twm = None
+        self._kline_stream = False
+        # 当前K线订阅的 socket 名称 (退回 REST 时据此退订)
+        self._kline_socket = None
+        # 下次尝试重新订阅的时间 (time.monotonic(), 0 表示不重试) 及当前退避时长
+        self._kline_retry_at = 0.0
+        self._kline_retry_delay = self.KLINE_STREAM_RETRY_DELAY
+        # 最近一次推送的价格 (含未收盘K线), 没有新K线收盘时用于逐轮检查止损止盈
+        self._last_price = None
+        # 最近一次收到收盘K线的时间 (time.monotonic()), 超时未更新时退回 REST 拉取
+        self._last_bar_received = 0.0
+        interval_ms = interval_to_milliseconds(self.interval) or 31 * 24 * 3600 * 1000
+        self._kline_stream_timeout = self.KLINE_STREAM_STALE_FACTOR * interval_ms / 1000
+
+        # 持仓缓存 (positionSide -> 持仓), 由用户数据流 ACCOUNT_UPDATE 推送维护
+        self._positions = {}
+        self._positions_synced_at = 0.0
+        self._positions_lock = threading.Lock()
+        self._user_stream = False
+
+        # 可用余额缓存 (余额, 获取时间 time.monotonic()), 下单或账户变动推送后失效
+        self._balance_cache = (0.0, 0.0)
+
         # 状态
         self.is_running = False
 
@@ -55,6 +106,8 @@ class LiveExecutor:
         """启动实盘交易"""
         logger.info("Starting live trading...")
         self.is_running = True
+        self._start_kline_stream()
+        self._start_user_stream()
 
         try:
             while self.is_running:
@@ -74,21 +127,209 @@ class LiveExecutor:
         logger.info("Stopping live trading...")
         self.is_running = False
 
-    def _trading_loop(self):
-        """交易主循环"""
+        if self._twm is not None:
+            self._twm.stop()
+            self._twm = None
+        self._kline_stream = False
+        self._kline_socket = None
+        self._kline_retry_at = 0.0
+        self._user_stream = False
+
+    def _get_websocket_manager(self):
+        """获取 (必要时创建并启动) websocket 管理器"""
+        if self._twm is None:
+            self._twm = ThreadedWebsocketManager(
+                api_key=self.config['api']['api_key'],
+                api_secret=self.config['api']['api_secret'],
+                testnet=self.config['api']['testnet'],
+                https_proxy=self.config.get('network', {}).get('proxy')
+            )
+            self._twm.start()
+        return self._twm
+
+    def _start_kline_stream(self):
+        """
+        订阅 websocket K线推送
+
+        先用 REST 预加载最近的已收盘K线初始化策略 (strategy.prime), 之后每根新收盘的K线
+        通过 strategy.update 增量计算信号, 两根K线之间交易循环仍每轮按最新推送价格检查止损止盈;
+        订阅失败、推送出错或超过 KLINE_STREAM_STALE_FACTOR 个K线周期未收到收盘K线时,
+        交易循环退回到每次通过 REST 拉取K线, 并在退避等待后重新调用本方法订阅
+        """
         try:
-            # 获取最新数据
             df = self.data_fetcher.get_futures_klines(
                 symbol=self.symbol,
                 interval=self.interval,
-                limit=200
+                limit=self.KLINE_WINDOW + 1
+            )
+            # 最后一根K线尚未收盘, 不计入
+            df = df[df['close_time'] < pd.Timestamp(int(time.time() * 1000), unit='ms')]
+
+            self.strategy.prime(df)
+            with self._bars_lock:
+                self._pending_bars = []
+                # Timestamp.value 为纳秒, 与推送中的毫秒开盘时间比较需换算
+                self._last_bar_time = df.index[-1].value // 1_000_000 if len(df) else 0
+                self._last_price = float(df['close'].iat[-1]) if len(df) else None
+                self._last_bar_received = time.monotonic()
+
+            # 先置位再订阅, 订阅后立即收盘的K线不会被 _on_kline 丢弃
+            self._kline_stream = True
+            self._kline_retry_at = 0.0
+            self._kline_socket = self._get_websocket_manager().start_kline_futures_socket(
+                callback=self._on_kline,
+                symbol=self.symbol,
+                interval=self.interval
             )
+            logger.info("Kline stream started for %s %s", self.symbol, self.interval)
+
+        except Exception as e:
+            self._kline_stream = False
+            self._schedule_kline_retry()
+            logger.error("Failed to start kline stream, falling back to REST polling: %s", e)
+
+    def _stop_kline_stream(self, reason, *args):
+        """
+        K线推送失效: 退订 socket, 退回每轮通过 REST 拉取K线, 并安排稍后重新订阅
+
+        Args:
+            reason: 失效原因, 可含 %-格式占位符, 由 args 在写日志时填充
+        """
+        if self._kline_stream:
+            self._kline_stream = False
+            socket_name, self._kline_socket = self._kline_socket, None
+            if socket_name is not None and self._twm is not None:
+                self._twm.stop_socket(socket_name)
+            self._schedule_kline_retry()
+            logger.warning("Kline stream disabled (" + reason + "), falling back to REST polling", *args)
+
+    def _schedule_kline_retry(self):
+        """按当前退避时长安排下一次重新订阅, 并将退避时长加倍 (收到收盘K线后恢复初始值)"""
+        self._kline_retry_at = time.monotonic() + self._kline_retry_delay
+        self._kline_retry_delay = min(self._kline_retry_delay * 2, self.KLINE_STREAM_RETRY_MAX_DELAY)
+
+    def _on_kline(self, msg):
+        """websocket K线回调: 记录最新价格, 只保留已收盘的K线"""
+        if not self._kline_stream:
+            return
+
+        if msg.get('e') == 'error':
+            logger.error("Kline stream error: %s", msg.get('m'))
+            self._stop_kline_stream('stream error')
+            return
+
+        k = msg.get('k')
+        if not k:
+            return
+
+        # 未收盘K线的最新价用于逐轮检查止损止盈
+        self._last_price = float(k['c'])
+        if not k['x']:
+            return
+
+        bar = {
+            'timestamp': pd.Timestamp(k['t'], unit='ms'),
+            'open': float(k['o']),
+            'high': float(k['h']),
+            'low': float(k['l']),
+            'close': float(k['c']),
+            'volume': float(k['v'])
+        }
+
+        with self._bars_lock:
+            # 与预加载的K线去重
+            if k['t'] <= self._last_bar_time:
+                return
+            self._last_bar_time = k['t']
+            self._last_bar_received = time.monotonic()
+            self._pending_bars.append(bar)
+        self._kline_retry_delay = self.KLINE_STREAM_RETRY_DELAY
+
+    def _start_user_stream(self):
+        """
+        订阅用户数据流, 由 ACCOUNT_UPDATE 推送维护本地持仓缓存
+
+        订阅失败时 _get_current_position 每次都通过 REST 查询
+        """
+        try:
+            self._fetch_current_position()
+            self._get_websocket_manager().start_futures_user_socket(callback=self._on_user_event)
+            self._user_stream = True
+            logger.info("User data stream started")
 
-            # 计算指标和信号
-            df = self.strategy.calculate_signals(df)
+        except Exception as e:
+            logger.error("Failed to start user data stream, falling back to REST position queries: %s", e)
+
+    def _on_user_event(self, msg):
+        """用户数据流回调: 根据 ACCOUNT_UPDATE 更新持仓缓存"""
+        event = msg.get('e')
+
+        if event == 'error':
+            logger.error("User data stream error: %s", msg.get('m'))
+            self._invalidate_account_cache()
+            return
+
+        if event != 'ACCOUNT_UPDATE':
+            return
+
+        # 推送中不含可用余额, 使缓存失效后按需重新查询
+        self._balance_cache = (0.0, 0.0)
+
+        with self._positions_lock:
+            for pos in msg['a'].get('P', []):
+                if pos['s'] != self.symbol:
+                    continue
+                self._positions[pos['ps']] = {
+                    'symbol': pos['s'],
+                    'position_amt': float(pos['pa']),
+                    'entry_price': float(pos['ep']),
+                    'unrealized_pnl': float(pos['up']),
+                    'position_side': pos['ps']
+                }
+
+    def _invalidate_account_cache(self):
+        """使账户缓存失效, 下次查询时走 REST (下单后成交推送可能尚未到达)"""
+        self._positions_synced_at = 0.0
+        self._balance_cache = (0.0, 0.0)
+
+    def _trading_loop(self):
+        """交易主循环"""
+        try:
+            # K线推送已退回 REST 时, 退避时间到后重新订阅 (重新预加载K线并初始化策略)
+            if not self._kline_stream and self._kline_retry_at and time.monotonic() >= self._kline_retry_at:
+                self._start_kline_stream()
+
+            # 推送回调可能在本轮中途关闭K线流, 本轮统一按开始时的状态处理
+            streaming = self._kline_stream
+            if streaming:
+                with self._bars_lock:
+                    bars, self._pending_bars = self._pending_bars, []
+                    last_bar_received = self._last_bar_received
+                if not bars and time.monotonic() - last_bar_received > self._kline_stream_timeout:
+                    self._stop_kline_stream('no closed kline within %.0fs', self._kline_stream_timeout)
+                    streaming = False
+
+            if streaming:
+                # 有新K线收盘时增量计算信号; 否则只用最新推送价格检查止损止盈
+                if bars:
+                    current_price = bars[-1]['close']
+                elif self._last_price is not None:
+                    current_price = self._last_price
+                else:
+                    current_price = self.data_fetcher.get_futures_current_price(self.symbol)
+            else:
+                # 获取最新数据
+                df = self.data_fetcher.get_futures_klines(
+                    symbol=self.symbol,
+                    interval=self.interval,
+                    limit=self.KLINE_WINDOW
+                )
 
-            # 获取当前价格
-            current_price = df['close'].iloc[-1]
+                # 计算指标和信号
+                df = self.strategy.ensure_signals(df)
+
+                # 获取当前价格
+                current_price = df['close'].to_numpy()[-1]
 
             # 获取当前持仓
             current_position = self._get_current_position()
@@ -103,8 +344,18 @@ class LiveExecutor:
             else:
                 self.strategy.update_position(None, 0, 0)
 
-            # 获取交易信号
-            signal = self.strategy.get_current_signal(df)
+            # 获取交易信号 (websocket 模式下逐根增量更新, 以最后一根K线的信号为准)
+            if streaming and bars:
+                for bar in bars:
+                    signal = self.strategy.update(bar)
+            elif streaming:
+                # 没有新K线收盘: 与轮询模式一样每轮检查止损止盈, 开平仓信号等K线收盘后再计算
+                if self.strategy.check_exit_levels(current_price):
+                    signal = self.strategy.CLOSE_SIGNALS[self.strategy.position_dir]
+                else:
+                    signal = 'HOLD'
+            else:
+                signal = self.strategy.get_current_signal(df)
 
             logger.info(f"Current price: {current_price:.2f}, Signal: {signal}, Position: {self.strategy.position}")
 
@@ -153,6 +404,7 @@ class LiveExecutor:
             )
 
             logger.info(f"LONG order executed: {order['orderId']}")
+            self._invalidate_account_cache()
 
             # 更新策略状态
             self.strategy.update_position('LONG', current_price, position_size)
@@ -192,6 +444,7 @@ class LiveExecutor:
             )
 
             logger.info(f"SHORT order executed: {order['orderId']}")
+            self._invalidate_account_cache()
 
             # 更新策略状态
             self.strategy.update_position('SHORT', current_price, position_size)
@@ -236,6 +489,7 @@ class LiveExecutor:
                 )
 
             logger.info(f"Position closed: {order['orderId']}")
+            self._invalidate_account_cache()
 
             # 更新策略状态
             self.strategy.update_position(None, 0, 0)
@@ -248,7 +502,24 @@ class LiveExecutor:
 
     def _get_current_position(self):
         """
-        获取当前持仓
+        获取当前持仓 (优先读取用户数据流维护的缓存, 定期与 REST 对账)
+
+        Returns:
+            dict or None: 持仓信息
+        """
+        if not self._user_stream or time.monotonic() - self._positions_synced_at > self.POSITION_RECONCILE_INTERVAL:
+            return self._fetch_current_position()
+
+        with self._positions_lock:
+            for pos in self._positions.values():
+                if pos['position_amt'] != 0:
+                    return dict(pos, position_amt=abs(pos['position_amt']))
+
+        return None
+
+    def _fetch_current_position(self):
+        """
+        通过 REST 查询当前持仓并刷新持仓缓存
 
         Returns:
             dict or None: 持仓信息
@@ -256,16 +527,22 @@ class LiveExecutor:
         try:
             positions = self.client.futures_position_information(symbol=self.symbol)
 
-            for pos in positions:
-                position_amt = float(pos['positionAmt'])
-                if position_amt != 0:
-                    return {
+            with self._positions_lock:
+                self._positions = {
+                    pos['positionSide']: {
                         'symbol': pos['symbol'],
-                        'position_amt': abs(position_amt),
+                        'position_amt': float(pos['positionAmt']),
                         'entry_price': float(pos['entryPrice']),
                         'unrealized_pnl': float(pos['unRealizedProfit']),
                         'position_side': pos['positionSide']
                     }
+                    for pos in positions
+                }
+                self._positions_synced_at = time.monotonic()
+
+                for pos in self._positions.values():
+                    if pos['position_amt'] != 0:
+                        return dict(pos, position_amt=abs(pos['position_amt']))
 
             return None
 
@@ -280,57 +557,74 @@ class LiveExecutor:
         Returns:
             float: 可用余额(USDT)
         """
+        balance, fetched_at = self._balance_cache
+        if time.monotonic() - fetched_at < self.BALANCE_TTL:
+            return balance
+
         try:
             account = self.client.futures_account()
+            balance = 0
             for asset in account['assets']:
                 if asset['asset'] == 'USDT':
-                    return float(asset['availableBalance'])
-            return 0
+                    balance = float(asset['availableBalance'])
+                    break
+            self._balance_cache = (balance, time.monotonic())
+            return balance
 
         except Exception as e:
             logger.error(f"Error getting balance: {e}")
             return 0
 
-    def _adjust_quantity_precision(self, quantity):
+    def _load_symbol_filters(self):
         """
-        调整数量精度以符合交易所要求
-
-        Args:
-            quantity: 原始数量
+        加载交易对的 LOT_SIZE 过滤器并缓存步长、最小数量和精度
 
         Returns:
-            float: 调整后的数量
+            bool: 是否加载成功
         """
         try:
-            # 获取交易对信息
             exchange_info = self.client.futures_exchange_info()
 
             for symbol_info in exchange_info['symbols']:
                 if symbol_info['symbol'] == self.symbol:
-                    # 获取LOT_SIZE过滤器
                     for filter_item in symbol_info['filters']:
                         if filter_item['filterType'] == 'LOT_SIZE':
-                            step_size = float(filter_item['stepSize'])
-                            min_qty = float(filter_item['minQty'])
+                            step = Decimal(filter_item['stepSize']).normalize()
+                            self._step_size = float(step)
+                            self._min_qty = float(filter_item['minQty'])
+                            self._qty_precision = max(0, -step.as_tuple().exponent)
+                            logger.info("LOT_SIZE for %s - step: %s, min: %s, precision: %s",
+                                        self.symbol, self._step_size, self._min_qty, self._qty_precision)
+                            return True
 
-                            # 调整到步长的倍数
-                            quantity = round(quantity / step_size) * step_size
+            logger.warning("LOT_SIZE filter not found for %s", self.symbol)
+            return False
 
-                            # 确保大于最小数量
-                            if quantity < min_qty:
-                                quantity = 0
+        except Exception as e:
+            logger.error("Error loading symbol filters: %s", e)
+            return False
 
-                            # 格式化精度
-                            precision = len(str(step_size).rstrip('0').split('.')[-1])
-                            quantity = round(quantity, precision)
+    def _adjust_quantity_precision(self, quantity):
+        """
+        调整数量精度以符合交易所要求 (向下取整到步长的倍数)
 
-                            return quantity
+        Args:
+            quantity: 原始数量
 
+        Returns:
+            float: 调整后的数量
+        """
+        if self._step_size is None and not self._load_symbol_filters():
             return quantity
 
-        except Exception as e:
-            logger.error(f"Error adjusting quantity precision: {e}")
-            return quantity
+        # 向下取整到步长的倍数 (加极小量抵消浮点除法误差)
+        quantity = math.floor(quantity / self._step_size + 1e-9) * self._step_size
+
+        # 确保大于最小数量
+        if quantity < self._min_qty:
+            return 0
+
+        return round(quantity, self._qty_precision)
 
     def get_account_status(self):
         """
@@ -1,40 +1,43 @@
 """
 主程序入口 - 策略交易框架
 """
+import gc
 import sys
-import yaml
 import argparse
 from pathlib import Path
 
 # 添加当前目录到路径
 sys.path.insert(0, str(Path(__file__).parent))
 
+from utils.config_loader import load_config
 from utils.data_fetcher import DataFetcher
 from utils.logger import setup_logger
+from utils.profiling import profile_call, reexec_under_pyspy
 from utils.strategy_loader import load_strategy
 from backtest.backtest_engine import BacktestEngine
+from backtest.parallel import run_symbols
 from live_trading.live_executor import LiveExecutor
 from binance.client import Client
 
 
-def load_config(config_path='config/config.yaml'):
-    """加载配置文件"""
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
-    return config
-
-
 def run_backtest(config):
     """运行回测"""
     print("\n" + "=" * 60)
     print("STARTING BACKTEST MODE".center(60))
     print("=" * 60 + "\n")
 
+    # 配置了多个交易对时并行回测
+    symbols = config['trading'].get('symbols')
+    if symbols:
+        return run_multi_symbol_backtest(config, symbols)
+
     # 初始化数据获取器(回测不需要API密钥)
     network_config = config.get('network', {})
     data_fetcher = DataFetcher(
         proxy=network_config.get('proxy'),
-        timeout=network_config.get('timeout', 30)
+        timeout=network_config.get('timeout', 30),
+        cache_dir=config['backtest'].get('cache_dir', 'data/klines'),
+        dtype_backend=config['backtest'].get('dtype_backend')
     )
 
     # 获取历史数据
@@ -46,6 +49,10 @@ def run_backtest(config):
         end_str=config['backtest']['end_date']
     )
 
+    # 回测不再需要 API 客户端和连接池, 先释放再分配回测数组, 降低峰值内存
+    del data_fetcher
+    gc.collect()
+
     print(f"Data loaded: {len(df)} candles from {df.index[0]} to {df.index[-1]}")
 
     # 初始化策略
@@ -63,6 +70,33 @@ def run_backtest(config):
     return results
 
 
+def run_multi_symbol_backtest(config, symbols):
+    """多交易对回测: 每个交易对在独立进程中获取数据并回测, 最后汇总打印"""
+    workers = config['backtest'].get('workers')
+    print(f"Running backtest for {len(symbols)} symbols: {', '.join(symbols)}")
+
+    results = run_symbols(config, symbols, workers=workers)
+
+    print("\n" + "=" * 90)
+    print("MULTI-SYMBOL BACKTEST RESULTS".center(90))
+    print("=" * 90)
+    print(f"{'Symbol':<12} {'Candles':>8} {'Return%':>10} {'PnL':>14} {'Trades':>8} "
+          f"{'WinRate%':>9} {'MaxDD%':>9} {'Sharpe':>8}")
+    print("-" * 90)
+    for symbol, summary in results.items():
+        print(f"{symbol:<12} {summary['candles']:>8} {summary['total_return']:>10.2f} "
+              f"{summary['total_pnl']:>14,.2f} {summary['total_trades']:>8} "
+              f"{summary['win_rate']:>9.2f} {summary['max_drawdown']:>9.2f} {summary['sharpe_ratio']:>8.2f}")
+    print("-" * 90)
+
+    failed = [symbol for symbol in symbols if symbol not in results]
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    print()
+
+    return results
+
+
 def run_live_trading(config):
     """运行实盘/模拟交易"""
     print("\n" + "=" * 60)
@@ -148,9 +182,20 @@ def main():
                        help='Run mode: backtest, live, or account info')
     parser.add_argument('--config', default='config/config.yaml',
                        help='Path to config file (default: config/config.yaml)')
+    parser.add_argument('--profile', choices=['cprofile', 'pyspy', 'none'], default='none',
+                       help='Profile the run with cProfile or py-spy (default: none)')
+    parser.add_argument('--profile-output',
+                       help='Profile output path (default: logs/profile_<mode>.prof / .svg)')
 
     args = parser.parse_args()
 
+    # py-spy 模式: 在 py-spy record 下重新执行本程序 (子进程中关闭 --profile)
+    if args.profile == 'pyspy':
+        output = args.profile_output or f'logs/profile_{args.mode}.svg'
+        if not reexec_under_pyspy(output, sys.argv + ['--profile', 'none']):
+            print("Error: py-spy not found, install it with: pip install py-spy")
+            return
+
     # 加载配置
     try:
         config = load_config(args.config)
@@ -163,19 +208,23 @@ def main():
     logger = setup_logger(
         level=config['logging']['level'],
         log_file=config['logging'].get('file'),
-        console=config['logging'].get('console', True)
+        console=config['logging'].get('console', True),
+        strategy_level=config['logging'].get('strategy_level')
     )
 
     # 根据模式运行
-    try:
-        if args.mode == 'backtest':
-            run_backtest(config)
+    run_mode = {
+        'backtest': run_backtest,
+        'live': run_live_trading,
+        'account': get_account_info
+    }[args.mode]
 
-        elif args.mode == 'live':
-            run_live_trading(config)
-
-        elif args.mode == 'account':
-            get_account_info(config)
+    try:
+        if args.profile == 'cprofile':
+            profile_call(run_mode, config,
+                         output=args.profile_output or f'logs/profile_{args.mode}.prof')
+        else:
+            run_mode(config)
 
     except KeyboardInterrupt:
         print("\n\nProgram interrupted by user")
@@ -2,6 +2,7 @@
 """
 简化的回测运行脚本
 """
+import gc
 import sys
 from pathlib import Path
 
@@ -11,11 +12,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     print("正在导入模块...")
-    import yaml
-    import pandas as pd
-    from binance.client import Client
+    from utils.config_loader import load_config
     from utils.data_fetcher import DataFetcher
     from utils.logger import setup_logger
+    from utils.strategy_loader import load_strategy
     from backtest.backtest_engine import BacktestEngine
 
     print("✓ 所有模块导入成功")
@@ -24,15 +24,15 @@ try:
     print("\n正在加载配置...")
     # 使用脚本所在目录的相对路径
     config_path = Path(__file__).parent / 'config' / 'config.yaml'
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    config = load_config(config_path)
     print("✓ 配置加载成功")
 
     # 设置日志
     logger = setup_logger(
         level=config['logging']['level'],
         log_file=config['logging'].get('file'),
-        console=config['logging'].get('console', True)
+        console=config['logging'].get('console', True),
+        strategy_level=config['logging'].get('strategy_level')
     )
 
     print("\n" + "=" * 60)
@@ -58,7 +58,9 @@ try:
 
     data_fetcher = DataFetcher(
         proxy=proxy,
-        timeout=timeout
+        timeout=timeout,
+        cache_dir=config['backtest'].get('cache_dir', 'data/klines'),
+        dtype_backend=config['backtest'].get('dtype_backend')
     )
 
     # 获取历史数据
@@ -69,49 +71,18 @@ try:
         end_str=config['backtest']['end_date']
     )
 
+    # 回测不再需要 API 客户端和连接池, 先释放再分配回测数组, 降低峰值内存
+    del data_fetcher
+    gc.collect()
+
     print(f"✓ 数据加载完成: {len(df)} 根K线")
     print(f"  时间范围: {df.index[0]} 至 {df.index[-1]}")
 
-    # 根据配置动态加载策略
+    # 根据配置动态加载策略 (只导入所选策略模块)
     print(f"\n正在初始化策略...")
-    strategy_name = config['strategy']['name']
-
-    # 策略映射
-    strategy_map = {
-        'ma_crossover': 'MACrossoverStrategy',
-        'rsi': 'RSIStrategy',
-        'bollinger_bands': 'BollingerBandsStrategy',
-        'grid_trading': 'GridTradingStrategy',
-        'macd': 'MACDStrategy',
-        'breakout_pullback': 'BreakoutPullbackStrategy'
-    }
-
-    if strategy_name not in strategy_map:
-        raise ValueError(f"未知策略: {strategy_name}. 可用策略: {list(strategy_map.keys())}")
-
-    # 动态导入策略
-    strategy_class_name = strategy_map[strategy_name]
-
-    if strategy_name == 'ma_crossover':
-        from strategies.ma_crossover_strategy import MACrossoverStrategy
-        strategy = MACrossoverStrategy(config['strategy'])
-    elif strategy_name == 'rsi':
-        from strategies.rsi_strategy import RSIStrategy
-        strategy = RSIStrategy(config['strategy'])
-    elif strategy_name == 'bollinger_bands':
-        from strategies.bollinger_bands_strategy import BollingerBandsStrategy
-        strategy = BollingerBandsStrategy(config['strategy'])
-    elif strategy_name == 'grid_trading':
-        from strategies.grid_trading_strategy import GridTradingStrategy
-        strategy = GridTradingStrategy(config['strategy'])
-    elif strategy_name == 'macd':
-        from strategies.macd_strategy import MACDStrategy
-        strategy = MACDStrategy(config['strategy'])
-    elif strategy_name == 'breakout_pullback':
-        from strategies.breakout_pullback_strategy import BreakoutPullbackStrategy
-        strategy = BreakoutPullbackStrategy(config['strategy'])
-
-    print(f"✓ 策略初始化完成: {strategy_class_name}")
+    strategy = load_strategy(config['strategy'])
+
+    print(f"✓ 策略初始化完成: {type(strategy).__name__}")
 
     # 初始化回测引擎
     print(f"\n正在运行回测...")
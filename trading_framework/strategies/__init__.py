@@ -1,14 +1,67 @@
+from importlib import import_module
+
 from .base_strategy import BaseStrategy
-from .ma_crossover_strategy import MACrossoverStrategy
-from .rsi_strategy import RSIStrategy
-from .bollinger_bands_strategy import BollingerBandsStrategy
-from .grid_trading_strategy import GridTradingStrategy
-from .macd_strategy import MACDStrategy
-from .breakout_pullback_strategy import BreakoutPullbackStrategy
-from .momentum_dip_buying_strategy import MomentumDipBuyingStrategy
+
+# 策略类按需导入 (PEP 562): 访问 strategies.XxxStrategy 时才加载对应模块,
+# 避免每个进程为用不到的策略付出导入开销
+_LAZY_IMPORTS = {
+    'MACrossoverStrategy': '.ma_crossover_strategy',
+    'RSIStrategy': '.rsi_strategy',
+    'BollingerBandsStrategy': '.bollinger_bands_strategy',
+    'GridTradingStrategy': '.grid_trading_strategy',
+    'MACDStrategy': '.macd_strategy',
+    'BreakoutPullbackStrategy': '.breakout_pullback_strategy',
+    'MomentumDipBuyingStrategy': '.momentum_dip_buying_strategy',
+}
+
+# 配置中的策略名称 -> 策略类名 (类在首次访问时才导入)
+STRATEGY_REGISTRY = {
+    'ma_crossover': 'MACrossoverStrategy',
+    'rsi': 'RSIStrategy',
+    'bollinger_bands': 'BollingerBandsStrategy',
+    'grid_trading': 'GridTradingStrategy',
+    'macd': 'MACDStrategy',
+    'breakout_pullback': 'BreakoutPullbackStrategy',
+    'momentum_dip_buying': 'MomentumDipBuyingStrategy',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_strategy_class(name):
+    """
+    根据配置中的策略名称取得策略类
+
+    Args:
+        name: 策略名称 (STRATEGY_REGISTRY 的键)
+
+    Returns:
+        策略类
+
+    Raises:
+        ValueError: 如果策略名称未知
+    """
+    if name not in STRATEGY_REGISTRY:
+        available = ', '.join(STRATEGY_REGISTRY)
+        raise ValueError(f"未知策略: '{name}'. 可用策略: {available}")
+    class_name = STRATEGY_REGISTRY[name]
+    return globals().get(class_name) or __getattr__(class_name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
+
 
 __all__ = [
     'BaseStrategy',
+    'STRATEGY_REGISTRY',
+    'get_strategy_class',
     'MACrossoverStrategy',
     'RSIStrategy',
     'BollingerBandsStrategy',
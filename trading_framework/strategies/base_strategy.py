@@ -2,6 +2,9 @@
 策略基类 - 所有策略都应继承此类
 """
 from abc import ABC, abstractmethod
+from collections import deque
+import weakref
+import numpy as np
 import pandas as pd
 import logging
 
@@ -11,6 +14,41 @@ logger = logging.getLogger(__name__)
 class BaseStrategy(ABC):
     """策略基类"""
 
+    # 实例属性使用 __slots__ 存储 (按偏移访问, 不经过实例 __dict__); 子类未声明 __slots__ 时仍有 __dict__,
+    # 可以自由添加属性
+    __slots__ = (
+        'config', 'name', 'params', 'stop_loss_pct', 'take_profit_pct', '_risk_pct', 'keep_indicators',
+        'position_dir', 'entry_price', 'position_size', '_window',
+        '_open', '_high', '_low', '_close', '_volume', '_cols', '_signals_ref', '_signals_key',
+    )
+
+    # 信号列: 信号与持仓状态无关的策略可在 calculate_signals 中写入这四列布尔信号,
+    # 并将 vectorized 设为 True, 回测引擎将直接读取信号数组而不再逐bar调用判断方法
+    SIGNAL_COLUMNS = ('enter_long', 'enter_short', 'exit_long', 'exit_short')
+    vectorized = False
+
+    # 持仓方向: 1=多, -1=空, 0=空仓; POSITION_NAMES 以方向为下标 (-1 取到 'SHORT')
+    POSITION_NAMES = (None, 'LONG', 'SHORT')
+    POSITION_DIRS = {None: 0, 'LONG': 1, 'SHORT': -1}
+
+    # 各持仓方向下依次检查的 (判断方法名, 信号), 同样以方向为下标; 状态不允许的判断方法不会被调用
+    SIGNAL_CHECKS = (
+        (('should_enter_long', 'BUY'), ('should_enter_short', 'SELL')),
+        (('should_exit_long', 'CLOSE_LONG'),),
+        (('should_exit_short', 'CLOSE_SHORT'),),
+    )
+    # 止损止盈触发时的平仓信号
+    CLOSE_SIGNALS = (None, 'CLOSE_LONG', 'CLOSE_SHORT')
+
+    # check_exit_levels 的返回值
+    EXIT_NONE, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT = 0, 1, 2
+
+    # 增量更新 (update) 默认保留的K线数量
+    UPDATE_WINDOW = 200
+    BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+    # bind_frame 额外缓存的指标列 (子类按需声明, 判断方法通过 self._cols[列名][i] 读取)
+    FRAME_COLUMNS = ()
+
     def __init__(self, config):
         """
         初始化策略
@@ -21,10 +59,22 @@ class BaseStrategy(ABC):
         self.config = config
         self.name = config.get('name', 'base_strategy')
         self.params = config.get('params', {})
-        self.position = None  # 当前持仓: None, 'LONG', 'SHORT'
+        self.stop_loss_pct = self.params.get('stop_loss', 0.02)  # 止损比例
+        self.take_profit_pct = self.params.get('take_profit', 0.04)  # 止盈比例
+        self._risk_pct = self.params.get('max_position_size', 0.5)  # 默认仓位比例
+        # 是否把中间指标列写回 DataFrame (参数扫描等只需回测结果时可关闭, 减少列写入)
+        self.keep_indicators = self.params.get('keep_indicators', True)
+        self.position_dir = 0  # 持仓方向 (position 属性换算为 None, 'LONG', 'SHORT')
         self.entry_price = 0  # 入场价格
         self.position_size = 0  # 持仓数量
-        logger.info(f"Strategy '{self.name}' initialized with params: {self.params}")
+        self._window = deque(maxlen=self.UPDATE_WINDOW)  # 增量更新的K线窗口
+        # bind_frame 缓存的列数组 (按列存储, 避免逐bar df.iloc 构造整行 Series)
+        self._open = self._high = self._low = self._close = self._volume = None
+        self._cols = {}
+        # 最近一次 ensure_signals 计算过的 DataFrame (弱引用) 及其 (长度, 最后时间戳, 最后收盘价)
+        self._signals_ref = None
+        self._signals_key = None
+        logger.info("Strategy '%s' initialized with params: %s", self.name, self.params)
 
     @abstractmethod
     def calculate_signals(self, df):
@@ -39,6 +89,31 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def ensure_signals(self, df):
+        """
+        calculate_signals 的缓存版本
+
+        同一个 DataFrame 在长度和最后一根K线都未变化时已经带有全部指标列, 直接返回;
+        否则 (新数据, 追加了K线或最后一根K线价格变化) 重新计算
+
+        Args:
+            df: K线数据DataFrame
+
+        Returns:
+            pandas.DataFrame: 包含指标和信号的DataFrame
+        """
+        if len(df) == 0:
+            return self.calculate_signals(df)
+
+        key = (len(df), df.index[-1], df['close'].iat[-1])
+        if self._signals_ref is not None and self._signals_ref() is df and self._signals_key == key:
+            return df
+
+        df = self.calculate_signals(df)
+        self._signals_ref = weakref.ref(df)
+        self._signals_key = (len(df), df.index[-1], df['close'].iat[-1])
+        return df
+
     @abstractmethod
     def should_enter_long(self, df, current_index):
         """
@@ -95,63 +170,109 @@ class BaseStrategy(ABC):
         """
         pass
 
-    def check_stop_loss(self, current_price):
+    def bind_frame(self, df):
         """
-        检查止损
+        将 OHLCV 及 FRAME_COLUMNS 中的指标列取为 numpy 数组缓存在策略上
+
+        回测引擎在 calculate_signals 之后调用一次, 此后判断方法可直接按下标读取
+        self._close[i] 等标量, 不再经过 df.iloc 的整行装箱
 
         Args:
-            current_price: 当前价格
+            df: calculate_signals 返回的DataFrame
+        """
+        self._open, self._high, self._low, self._close, self._volume = (
+            df[col].to_numpy(dtype=np.float64) for col in self.BAR_COLUMNS
+        )
+        self._cols = {col: df[col].to_numpy() for col in self.FRAME_COLUMNS}
+
+    def signal_arrays(self, df):
+        """
+        取出 calculate_signals 写入的四列信号 (vectorized 策略由回测引擎调用)
+
+        Args:
+            df: calculate_signals 返回的DataFrame
 
         Returns:
-            bool: 是否触发止损
+            tuple: (enter_long, enter_short, exit_long, exit_short) 布尔数组
         """
-        if self.position is None or self.entry_price == 0:
-            return False
+        return tuple(df[col].to_numpy(dtype=bool) for col in self.SIGNAL_COLUMNS)
 
-        stop_loss_pct = self.params.get('stop_loss', 0.02)
+    @staticmethod
+    def _with_columns(df, columns):
+        """
+        把一组数组列一次性拼接到 DataFrame 上 (逐列 df[col] = ... 每次都要插入新块, 列多时开销明显)
+
+        Args:
+            df: K线数据DataFrame
+            columns: dict {列名: 与 df 等长的数组}
 
-        if self.position == 'LONG':
-            loss_pct = (self.entry_price - current_price) / self.entry_price
-            if loss_pct >= stop_loss_pct:
-                logger.warning(f"Stop loss triggered! Loss: {loss_pct:.2%}")
-                return True
+        Returns:
+            pandas.DataFrame: 新的DataFrame (已存在的同名列会被替换)
+        """
+        existing = [col for col in columns if col in df.columns]
+        if existing:
+            df = df.drop(columns=existing)
+        return pd.concat([df, pd.DataFrame(columns, index=df.index, copy=False)], axis=1)
 
-        elif self.position == 'SHORT':
-            loss_pct = (current_price - self.entry_price) / self.entry_price
-            if loss_pct >= stop_loss_pct:
-                logger.warning(f"Stop loss triggered! Loss: {loss_pct:.2%}")
-                return True
+    @property
+    def position(self):
+        """当前持仓: None, 'LONG', 'SHORT' (由整数方向 position_dir 换算)"""
+        return self.POSITION_NAMES[self.position_dir]
 
-        return False
+    @position.setter
+    def position(self, value):
+        self.position_dir = self.POSITION_DIRS[value]
 
-    def check_take_profit(self, current_price):
+    def check_exit_levels(self, current_price):
         """
-        检查止盈
+        检查止损止盈 (止损优先)
+
+        按持仓方向把价格变动统一换算为收益率, 一次比较即可判断两种出场
 
         Args:
             current_price: 当前价格
 
         Returns:
-            bool: 是否触发止盈
+            int: EXIT_NONE / EXIT_STOP_LOSS / EXIT_TAKE_PROFIT
+        """
+        if self.position_dir == 0 or self.entry_price == 0:
+            return self.EXIT_NONE
+
+        pnl_pct = (current_price - self.entry_price) / self.entry_price * self.position_dir
+
+        if pnl_pct <= -self.stop_loss_pct:
+            logger.warning("Stop loss triggered! Loss: %.2f%%", -pnl_pct * 100)
+            return self.EXIT_STOP_LOSS
+
+        if pnl_pct >= self.take_profit_pct:
+            logger.info("Take profit triggered! Profit: %.2f%%", pnl_pct * 100)
+            return self.EXIT_TAKE_PROFIT
+
+        return self.EXIT_NONE
+
+    def check_stop_loss(self, current_price):
         """
-        if self.position is None or self.entry_price == 0:
-            return False
+        检查止损
 
-        take_profit_pct = self.params.get('take_profit', 0.04)
+        Args:
+            current_price: 当前价格
+
+        Returns:
+            bool: 是否触发止损
+        """
+        return self.check_exit_levels(current_price) == self.EXIT_STOP_LOSS
 
-        if self.position == 'LONG':
-            profit_pct = (current_price - self.entry_price) / self.entry_price
-            if profit_pct >= take_profit_pct:
-                logger.info(f"Take profit triggered! Profit: {profit_pct:.2%}")
-                return True
+    def check_take_profit(self, current_price):
+        """
+        检查止盈
 
-        elif self.position == 'SHORT':
-            profit_pct = (self.entry_price - current_price) / self.entry_price
-            if profit_pct >= take_profit_pct:
-                logger.info(f"Take profit triggered! Profit: {profit_pct:.2%}")
-                return True
+        Args:
+            current_price: 当前价格
 
-        return False
+        Returns:
+            bool: 是否触发止盈
+        """
+        return self.check_exit_levels(current_price) == self.EXIT_TAKE_PROFIT
 
     def update_position(self, position_type, price, size=0):
         """
@@ -167,7 +288,7 @@ class BaseStrategy(ABC):
         self.position_size = size
 
         if position_type:
-            logger.info(f"Position updated: {position_type} at {price}, size: {size}")
+            logger.info("Position updated: %s at %s, size: %s", position_type, price, size)
         else:
             logger.info("Position closed")
 
@@ -184,12 +305,11 @@ class BaseStrategy(ABC):
             float: 仓位数量
         """
         if risk_pct is None:
-            risk_pct = self.params.get('max_position_size', 0.5)
+            risk_pct = self._risk_pct
+        size = capital * risk_pct / price
 
-        position_value = capital * risk_pct
-        size = position_value / price
-
-        logger.debug(f"Calculated position size: {size} (risk: {risk_pct:.2%})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Calculated position size: %s (risk: %.2f%%)", size, risk_pct * 100)
         return size
 
     def get_current_signal(self, df):
@@ -202,37 +322,80 @@ class BaseStrategy(ABC):
         Returns:
             str: 交易信号
         """
+        self.bind_frame(df)
         current_index = len(df) - 1
-        current_price = df['close'].iloc[-1]
+        current_price = self._close[current_index]
 
         # 检查止损止盈
-        if self.check_stop_loss(current_price):
-            return 'CLOSE_LONG' if self.position == 'LONG' else 'CLOSE_SHORT'
+        if self.check_exit_levels(current_price):
+            return self.CLOSE_SIGNALS[self.position_dir]
+
+        # 只检查当前持仓状态下有意义的开仓/平仓信号
+        for method, signal in self.SIGNAL_CHECKS[self.position_dir]:
+            if getattr(self, method)(df, current_index):
+                return signal
 
-        if self.check_take_profit(current_price):
-            return 'CLOSE_LONG' if self.position == 'LONG' else 'CLOSE_SHORT'
+        return 'HOLD'
+
+    def _resolve_signal(self, current_price, enter_long, enter_short, exit_long, exit_short):
+        """
+        由当前bar的四个信号标志得出交易信号 (止损止盈优先, 规则与 get_current_signal 一致)
 
-        # 检查开仓信号
-        if self.position is None:
-            if self.should_enter_long(df, current_index):
+        Returns:
+            str: 交易信号
+        """
+        if self.check_exit_levels(current_price):
+            return self.CLOSE_SIGNALS[self.position_dir]
+
+        if self.position_dir == 0:
+            if enter_long:
                 return 'BUY'
-            elif self.should_enter_short(df, current_index):
+            elif enter_short:
                 return 'SELL'
 
-        # 检查平仓信号
-        elif self.position == 'LONG':
-            if self.should_exit_long(df, current_index):
+        elif self.position_dir == 1:
+            if exit_long:
                 return 'CLOSE_LONG'
 
-        elif self.position == 'SHORT':
-            if self.should_exit_short(df, current_index):
+        else:
+            if exit_short:
                 return 'CLOSE_SHORT'
 
         return 'HOLD'
 
+    def prime(self, df):
+        """
+        用历史K线初始化增量更新状态 (实盘启动时调用一次)
+
+        Args:
+            df: 已收盘的历史K线DataFrame
+        """
+        self._window.clear()
+        for timestamp, row in zip(df.index, df[list(self.BAR_COLUMNS)].to_dict('records')):
+            row['timestamp'] = timestamp
+            self._window.append(row)
+
+    def update(self, bar):
+        """
+        增量更新: 追加一根新收盘的K线并返回最新信号
+
+        默认实现在最近 UPDATE_WINDOW 根K线上重新计算信号;
+        指标可以递推的子类可覆盖为 O(1) 的增量计算
+
+        Args:
+            bar: dict, 包含 timestamp/open/high/low/close/volume
+
+        Returns:
+            str: 交易信号
+        """
+        self._window.append(bar)
+        df = pd.DataFrame.from_records(list(self._window), index='timestamp')
+        df = self.ensure_signals(df)
+        return self.get_current_signal(df)
+
     def reset(self):
         """重置策略状态 (用于回测)"""
-        self.position = None
+        self.position_dir = 0
         self.entry_price = 0
         self.position_size = 0
-        logger.info(f"Strategy '{self.name}' reset")
+        logger.info("Strategy '%s' reset", self.name)
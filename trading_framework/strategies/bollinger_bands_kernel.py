@@ -0,0 +1,68 @@
+"""
+布林带信号内核 - 单次循环生成四列进出场信号, 使用 numba 编译 (未安装 numba 时以纯 Python 运行)
+"""
+import numpy as np
+
+from utils._njit import njit, precompile
+
+# 趋势模式下确认突破所需的挤压回看K线数 (当前bar及之前5根)
+SQUEEZE_LOOKBACK = 5
+
+
+@njit(cache=True)
+def bb_signals(close, upper, middle, lower, bb_percent, squeeze,
+               mean_reversion, near_mid_tol, warmup):
+    """
+    计算布林带策略的进出场信号 (规则与 BollingerBandsStrategy 的判断方法一致)
+
+    Args:
+        close, upper, middle, lower, bb_percent: 收盘价与布林带指标数组
+        squeeze: 布林带挤压布尔数组
+        mean_reversion: True=均值回归模式, False=趋势跟随模式
+        near_mid_tol: 判定"回到中轨附近"的相对距离阈值
+        warmup: 前 warmup 根K线不产生信号
+
+    Returns:
+        tuple: (enter_long, enter_short, exit_long, exit_short) 布尔数组
+    """
+    n = close.shape[0]
+    enter_long = np.zeros(n, dtype=np.bool_)
+    enter_short = np.zeros(n, dtype=np.bool_)
+    exit_long = np.zeros(n, dtype=np.bool_)
+    exit_short = np.zeros(n, dtype=np.bool_)
+
+    # 最近一次出现挤压的位置
+    last_squeeze = -SQUEEZE_LOOKBACK - 1
+    for i in range(min(warmup, n)):
+        if squeeze[i]:
+            last_squeeze = i
+
+    for i in range(max(warmup, 1), n):
+        c = close[i]
+        prev_c = close[i - 1]
+
+        if mean_reversion:
+            # 触及下轨后回升 / 下轨附近开始回升
+            enter_long[i] = ((prev_c <= lower[i - 1] and c > lower[i]) or
+                             (0 < bb_percent[i] < 0.1 and c > prev_c))
+            # 触及上轨后回落 / 上轨附近开始回落
+            enter_short[i] = ((prev_c >= upper[i - 1] and c < upper[i]) or
+                              (0.9 < bb_percent[i] < 1.0 and c < prev_c))
+            near_middle = abs(c - middle[i]) / middle[i] < near_mid_tol
+            exit_long[i] = near_middle or c >= upper[i]
+            exit_short[i] = near_middle or c <= lower[i]
+
+        else:
+            if squeeze[i]:
+                last_squeeze = i
+            squeeze_recent = i - last_squeeze <= SQUEEZE_LOOKBACK
+            enter_long[i] = prev_c <= upper[i - 1] and c > upper[i] and squeeze_recent
+            enter_short[i] = prev_c >= lower[i - 1] and c < lower[i] and squeeze_recent
+            exit_long[i] = prev_c >= middle[i - 1] and c < middle[i]
+            exit_short[i] = prev_c <= middle[i - 1] and c > middle[i]
+
+    return enter_long, enter_short, exit_long, exit_short
+
+
+# 导入时按显式签名编译 (cache=True 时直接加载磁盘缓存)
+precompile(bb_signals, '({f8}, {f8}, {f8}, {f8}, {f8}, {b1}, boolean, float64, int64)')
@@ -3,7 +3,9 @@
 适用于趋势市场和震荡市场
 """
 from .base_strategy import BaseStrategy
+from .bollinger_bands_kernel import bb_signals
 from utils.indicators import Indicators
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,11 @@ class BollingerBandsStrategy(BaseStrategy):
     - squeeze_threshold: 挤压阈值，用于判断突破力度 (默认0.02)
     """
 
+    vectorized = True
+
+    # 价格与中轨相对距离小于该值视为"回到中轨附近"
+    NEAR_MIDDLE_TOL = 0.005
+
     def __init__(self, config):
         super().__init__(config)
         self.bb_period = self.params.get('bb_period', 20)
@@ -36,8 +43,18 @@ class BollingerBandsStrategy(BaseStrategy):
         self.mode = self.params.get('mode', 'mean_reversion')  # 'trend' or 'mean_reversion'
         self.squeeze_threshold = self.params.get('squeeze_threshold', 0.02)
 
-        logger.info(f"Bollinger Bands Strategy initialized - Period: {self.bb_period}, "
-                   f"Std: {self.bb_std}, Mode: {self.mode}")
+        # 由参数派生的常量, 初始化时算好, 计算信号时不再重复比较/查找
+        self._mean_reversion = self.mode == 'mean_reversion'
+        self._warmup = self.bb_period + 1
+
+        # 最近一次 calculate_signals 预计算的信号数组, 判断方法按下标读取
+        self._enter_long = np.zeros(0, dtype=bool)
+        self._enter_short = np.zeros(0, dtype=bool)
+        self._exit_long = np.zeros(0, dtype=bool)
+        self._exit_short = np.zeros(0, dtype=bool)
+
+        logger.info("Bollinger Bands Strategy initialized - Period: %s, Std: %s, Mode: %s",
+                    self.bb_period, self.bb_std, self.mode)
 
     def calculate_signals(self, df):
         """计算布林带和交易信号"""
@@ -46,24 +63,89 @@ class BollingerBandsStrategy(BaseStrategy):
             df['close'], self.bb_period, self.bb_std
         )
 
-        df['bb_upper'] = upper
-        df['bb_middle'] = middle
-        df['bb_lower'] = lower
+        # 派生指标直接在 numpy 数组上计算, 尽量复用缓冲区减少临时数组
+        close = df['close'].to_numpy(dtype=np.float64)
+        upper = upper.to_numpy(dtype=np.float64)
+        middle = middle.to_numpy(dtype=np.float64)
+        lower = lower.to_numpy(dtype=np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            band = np.subtract(upper, lower)
 
-        # 计算带宽（用于判断波动率）
-        df['bb_width'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle']
+            # 计算带宽（用于判断波动率）
+            bb_width = np.divide(band, middle)
 
-        # 计算价格相对位置（%B指标）
-        df['bb_percent'] = (df['close'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
+            # 计算价格相对位置（%B指标）
+            bb_percent = np.subtract(close, lower)
+            np.divide(bb_percent, band, out=bb_percent)
 
         # 检测布林带挤压（低波动率，可能预示突破）
-        df['bb_squeeze'] = df['bb_width'] < self.squeeze_threshold
+        bb_squeeze = bb_width < self.squeeze_threshold
+
+        self._compute_signals(close, upper, middle, lower, bb_percent, bb_squeeze)
+
+        # 只在需要时把指标和信号写回 DataFrame, 回测引擎直接使用缓存的信号数组
+        if self.keep_indicators:
+            df['bb_upper'] = upper
+            df['bb_middle'] = middle
+            df['bb_lower'] = lower
+            df['bb_width'] = bb_width
+            df['bb_percent'] = bb_percent
+            df['bb_squeeze'] = bb_squeeze
+
+            # 标记价格位置
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mid_dist = np.subtract(close, middle)
+                np.abs(mid_dist, out=mid_dist)
+                np.divide(mid_dist, middle, out=mid_dist)
+            df['above_upper'] = close > upper
+            df['below_lower'] = close < lower
+            df['near_middle'] = mid_dist < self.NEAR_MIDDLE_TOL
+
+            self._write_signal_columns(df)
+
+        return df
+
+    def precompute_signals(self, df):
+        """
+        在整段数据上一次性计算四列进出场信号, 并缓存为数组供判断方法按下标读取
+
+        由 bb_signals 内核单次循环完成, 前 bb_period + 1 根K线不产生信号
 
-        # 标记价格位置
-        df['above_upper'] = df['close'] > df['bb_upper']
-        df['below_lower'] = df['close'] < df['bb_lower']
-        df['near_middle'] = abs(df['close'] - df['bb_middle']) / df['bb_middle'] < 0.005
+        Args:
+            df: 已计算布林带指标的DataFrame
 
+        Returns:
+            DataFrame: 添加了信号列的数据
+        """
+        self._compute_signals(
+            df['close'].to_numpy(dtype=np.float64),
+            df['bb_upper'].to_numpy(dtype=np.float64),
+            df['bb_middle'].to_numpy(dtype=np.float64),
+            df['bb_lower'].to_numpy(dtype=np.float64),
+            df['bb_percent'].to_numpy(dtype=np.float64),
+            df['bb_squeeze'].to_numpy(dtype=bool),
+        )
+        return self._write_signal_columns(df)
+
+    def signal_arrays(self, df):
+        """直接返回 calculate_signals 缓存的信号数组 (不依赖信号列是否写回 DataFrame)"""
+        return self._enter_long, self._enter_short, self._exit_long, self._exit_short
+
+    def _compute_signals(self, close, upper, middle, lower, bb_percent, bb_squeeze):
+        """调用 bb_signals 内核计算四个信号数组并缓存"""
+        (self._enter_long, self._enter_short,
+         self._exit_long, self._exit_short) = bb_signals(
+            close, upper, middle, lower, bb_percent, bb_squeeze,
+            self._mean_reversion, self.NEAR_MIDDLE_TOL, self._warmup,
+        )
+
+    def _write_signal_columns(self, df):
+        """把缓存的信号数组写入 DataFrame"""
+        df['enter_long'] = self._enter_long
+        df['enter_short'] = self._enter_short
+        df['exit_long'] = self._exit_long
+        df['exit_short'] = self._exit_short
         return df
 
     def should_enter_long(self, df, current_index):
@@ -72,38 +154,7 @@ class BollingerBandsStrategy(BaseStrategy):
         - 均值回归模式：价格触及下轨或跌破后回升
         - 趋势跟随模式：价格突破上轨
         """
-        if current_index < self.bb_period + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        current_close = current['close']
-        bb_lower = current['bb_lower']
-        bb_upper = current['bb_upper']
-        bb_percent = current.get('bb_percent')
-
-        if self.mode == 'mean_reversion':
-            # 均值回归：价格触及或跌破下轨后回升
-            if previous['close'] <= previous['bb_lower'] and current_close > bb_lower:
-                logger.info(f"Long signal (mean reversion): Price bouncing from lower band")
-                return True
-
-            # 价格在下轨附近且开始回升
-            if bb_percent is not None and 0 < bb_percent < 0.1:
-                if current_close > previous['close']:
-                    logger.info(f"Long signal (mean reversion): Price near lower band and rising")
-                    return True
-
-        else:  # trend following
-            # 趋势跟随：价格突破上轨
-            if previous['close'] <= previous['bb_upper'] and current_close > bb_upper:
-                # 确认突破有效（成交量或前期挤压）
-                if current.get('bb_squeeze', False) or df.iloc[current_index - 5:current_index]['bb_squeeze'].any():
-                    logger.info(f"Long signal (trend): Breakout above upper band")
-                    return True
-
-        return False
+        return bool(self._enter_long[current_index])
 
     def should_enter_short(self, df, current_index):
         """
@@ -111,38 +162,7 @@ class BollingerBandsStrategy(BaseStrategy):
         - 均值回归模式：价格触及上轨或突破后回落
         - 趋势跟随模式：价格突破下轨
         """
-        if current_index < self.bb_period + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        current_close = current['close']
-        bb_lower = current['bb_lower']
-        bb_upper = current['bb_upper']
-        bb_percent = current.get('bb_percent')
-
-        if self.mode == 'mean_reversion':
-            # 均值回归：价格触及或突破上轨后回落
-            if previous['close'] >= previous['bb_upper'] and current_close < bb_upper:
-                logger.info(f"Short signal (mean reversion): Price falling from upper band")
-                return True
-
-            # 价格在上轨附近且开始回落
-            if bb_percent is not None and 0.9 < bb_percent < 1.0:
-                if current_close < previous['close']:
-                    logger.info(f"Short signal (mean reversion): Price near upper band and falling")
-                    return True
-
-        else:  # trend following
-            # 趋势跟随：价格跌破下轨
-            if previous['close'] >= previous['bb_lower'] and current_close < bb_lower:
-                # 确认突破有效
-                if current.get('bb_squeeze', False) or df.iloc[current_index - 5:current_index]['bb_squeeze'].any():
-                    logger.info(f"Short signal (trend): Breakdown below lower band")
-                    return True
-
-        return False
+        return bool(self._enter_short[current_index])
 
     def should_exit_long(self, df, current_index):
         """
@@ -150,34 +170,7 @@ class BollingerBandsStrategy(BaseStrategy):
         - 均值回归：价格回到中轨或触及上轨
         - 趋势跟随：价格跌破中轨或下轨
         """
-        if current_index < self.bb_period + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        current_close = current['close']
-        bb_middle = current['bb_middle']
-        bb_upper = current['bb_upper']
-
-        if self.mode == 'mean_reversion':
-            # 价格回到中轨附近
-            if current.get('near_middle', False):
-                logger.info(f"Exit long (mean reversion): Price near middle band")
-                return True
-
-            # 价格触及上轨（目标达到）
-            if current_close >= bb_upper:
-                logger.info(f"Exit long (mean reversion): Price at upper band")
-                return True
-
-        else:  # trend following
-            # 价格跌破中轨（趋势减弱）
-            if previous['close'] >= previous['bb_middle'] and current_close < bb_middle:
-                logger.info(f"Exit long (trend): Price below middle band")
-                return True
-
-        return False
+        return bool(self._exit_long[current_index])
 
     def should_exit_short(self, df, current_index):
         """
@@ -185,31 +178,4 @@ class BollingerBandsStrategy(BaseStrategy):
         - 均值回归：价格回到中轨或触及下轨
         - 趋势跟随：价格突破中轨或上轨
         """
-        if current_index < self.bb_period + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        current_close = current['close']
-        bb_middle = current['bb_middle']
-        bb_lower = current['bb_lower']
-
-        if self.mode == 'mean_reversion':
-            # 价格回到中轨附近
-            if current.get('near_middle', False):
-                logger.info(f"Exit short (mean reversion): Price near middle band")
-                return True
-
-            # 价格触及下轨（目标达到）
-            if current_close <= bb_lower:
-                logger.info(f"Exit short (mean reversion): Price at lower band")
-                return True
-
-        else:  # trend following
-            # 价格突破中轨（趋势反转）
-            if previous['close'] <= previous['bb_middle'] and current_close > bb_middle:
-                logger.info(f"Exit short (trend): Price above middle band")
-                return True
-
-        return False
+        return bool(self._exit_short[current_index])
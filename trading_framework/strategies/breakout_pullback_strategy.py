@@ -6,6 +6,7 @@ from .base_strategy import BaseStrategy
 from utils.indicators import Indicators
 import logging
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,16 @@ class BreakoutPullbackStrategy(BaseStrategy):
     - volume_multiplier: 成交量倍数 (默认1.5)
     """
 
+    __slots__ = (
+        'lookback_period', 'breakout_threshold', 'pullback_ratio', 'use_volume', 'volume_multiplier',
+        'resistance_level', 'support_level', 'breakout_high', 'breakout_low',
+        'awaiting_pullback', 'pullback_direction', 'pullback_level', '_long_targets', '_short_targets',
+    )
+
+    # 突破/回踩状态只在空仓时随判断方法逐bar推进, 无法整段预计算; 判断方法改为读取 bind_frame 缓存的数组
+    FRAME_COLUMNS = ('resistance', 'support', 'resistance_breakout', 'support_breakdown',
+                     'breakout_confirmed', 'breakdown_confirmed')
+
     def __init__(self, config):
         super().__init__(config)
         self.lookback_period = self.params.get('lookback_period', 20)
@@ -48,9 +59,14 @@ class BreakoutPullbackStrategy(BaseStrategy):
         self.breakout_low = None
         self.awaiting_pullback = False
         self.pullback_direction = None  # 'long' or 'short'
+        self.pullback_level = np.nan  # 当前等待的回踩目标价
+
+        # bind_frame 预计算的每根K线突破/跌破后对应的回踩目标价
+        self._long_targets = np.zeros(0)
+        self._short_targets = np.zeros(0)
 
-        logger.info(f"Breakout Pullback Strategy initialized - Lookback: {self.lookback_period}, "
-                   f"Threshold: {self.breakout_threshold*100}%")
+        logger.info("Breakout Pullback Strategy initialized - Lookback: %s, Threshold: %s%%",
+                    self.lookback_period, self.breakout_threshold * 100)
 
     def calculate_signals(self, df):
         """计算支撑阻力位和交易信号"""
@@ -58,31 +74,33 @@ class BreakoutPullbackStrategy(BaseStrategy):
         df['resistance'] = df['high'].rolling(window=self.lookback_period).max()
         df['support'] = df['low'].rolling(window=self.lookback_period).min()
 
-        # 计算平均成交量
-        df['avg_volume'] = df['volume'].rolling(window=self.lookback_period).mean()
-
         # 计算波动率（ATR）
         df['atr'] = Indicators.atr(df['high'], df['low'], df['close'], period=14)
 
         # 标记关键价格水平
         df = self._identify_key_levels(df)
 
-        # 检测突破
-        df['resistance_breakout'] = (
-            (df['close'] > df['resistance']) &
-            (df['close'].shift(1) <= df['resistance'].shift(1))
-        )
-
-        df['support_breakdown'] = (
-            (df['close'] < df['support']) &
-            (df['close'].shift(1) >= df['support'].shift(1))
-        )
+        # 检测突破: 收盘价上穿阻力位 / 下穿支撑位 (含 NaN 的比较为 False)
+        close = df['close'].to_numpy(dtype=np.float64)
+        resistance_breakout = Indicators.crosses(close, df['resistance'].to_numpy(dtype=np.float64))[0]
+        support_breakdown = Indicators.crosses(close, df['support'].to_numpy(dtype=np.float64))[1]
+        df['resistance_breakout'] = resistance_breakout
+        df['support_breakdown'] = support_breakdown
 
-        # 成交量确认
+        # 成交量确认: 直接与突破信号合并, 判断方法只读取合并后的布尔数组
         if self.use_volume:
-            df['volume_confirmed'] = df['volume'] > df['avg_volume'] * self.volume_multiplier
+            avg_volume = df['volume'].rolling(window=self.lookback_period).mean().to_numpy(dtype=np.float64)
+            volume_confirmed = df['volume'].to_numpy(dtype=np.float64) > avg_volume * self.volume_multiplier
+            df['breakout_confirmed'] = resistance_breakout & volume_confirmed
+            df['breakdown_confirmed'] = support_breakdown & volume_confirmed
+            if self.keep_indicators:
+                df['avg_volume'] = avg_volume
+                df['volume_confirmed'] = volume_confirmed
         else:
-            df['volume_confirmed'] = True
+            df['breakout_confirmed'] = resistance_breakout
+            df['breakdown_confirmed'] = support_breakdown
+            if self.keep_indicators:
+                df['volume_confirmed'] = True
 
         return df
 
@@ -97,16 +115,17 @@ class BreakoutPullbackStrategy(BaseStrategy):
         if current_index < self.lookback_period + 5:
             return False
 
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
+        cols = self._cols
+        current_price = self._close[current_index]
 
         # 检查是否刚刚发生突破
-        if current.get('resistance_breakout', False) and current.get('volume_confirmed', False):
-            self.resistance_level = previous['resistance']
-            self.breakout_high = current['high']
+        if cols['breakout_confirmed'][current_index]:
+            self.resistance_level = cols['resistance'][current_index - 1]
+            self.breakout_high = self._high[current_index]
+            self.pullback_level = self._long_targets[current_index]
             self.awaiting_pullback = True
             self.pullback_direction = 'long'
-            logger.info(f"Resistance breakout detected at {current['close']:.2f}, awaiting pullback")
+            logger.info("Resistance breakout detected at %.2f, awaiting pullback", current_price)
             return False
 
         # 如果正在等待回踩
@@ -114,21 +133,17 @@ class BreakoutPullbackStrategy(BaseStrategy):
             if self.resistance_level is None:
                 return False
 
-            current_price = current['close']
-            previous_price = previous['close']
+            previous_price = self._close[current_index - 1]
 
-            # 计算回踩幅度
-            if self.breakout_high:
-                pullback_level = self.resistance_level + (self.breakout_high - self.resistance_level) * (1 - self.pullback_ratio)
-
-                # 价格已回踩到目标位置且开始反弹
-                if previous_price <= pullback_level and current_price > previous_price:
-                    # 确认反弹
-                    if self._confirm_reversal(df, current_index, direction='up'):
-                        logger.info(f"Long signal: Pullback complete at {current_price:.2f}, "
-                                  f"target was {pullback_level:.2f}")
-                        self._reset_breakout_state()
-                        return True
+            # 价格已回踩到目标位置且开始反弹 (目标价为 NaN 时比较恒为 False)
+            pullback_level = self.pullback_level
+            if previous_price <= pullback_level and current_price > previous_price:
+                # 确认反弹
+                if self._confirm_reversal(df, current_index, direction='up'):
+                    logger.info("Long signal: Pullback complete at %.2f, "
+                              "target was %.2f", current_price, pullback_level)
+                    self._reset_breakout_state()
+                    return True
 
         return False
 
@@ -143,16 +158,17 @@ class BreakoutPullbackStrategy(BaseStrategy):
         if current_index < self.lookback_period + 5:
             return False
 
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
+        cols = self._cols
+        current_price = self._close[current_index]
 
         # 检查是否刚刚发生跌破
-        if current.get('support_breakdown', False) and current.get('volume_confirmed', False):
-            self.support_level = previous['support']
-            self.breakout_low = current['low']
+        if cols['breakdown_confirmed'][current_index]:
+            self.support_level = cols['support'][current_index - 1]
+            self.breakout_low = self._low[current_index]
+            self.pullback_level = self._short_targets[current_index]
             self.awaiting_pullback = True
             self.pullback_direction = 'short'
-            logger.info(f"Support breakdown detected at {current['close']:.2f}, awaiting pullback")
+            logger.info("Support breakdown detected at %.2f, awaiting pullback", current_price)
             return False
 
         # 如果正在等待反弹回踩
@@ -160,21 +176,17 @@ class BreakoutPullbackStrategy(BaseStrategy):
             if self.support_level is None:
                 return False
 
-            current_price = current['close']
-            previous_price = previous['close']
-
-            # 计算反弹幅度
-            if self.breakout_low:
-                pullback_level = self.support_level - (self.support_level - self.breakout_low) * (1 - self.pullback_ratio)
+            previous_price = self._close[current_index - 1]
 
-                # 价格已反弹到目标位置且开始回落
-                if previous_price >= pullback_level and current_price < previous_price:
-                    # 确认回落
-                    if self._confirm_reversal(df, current_index, direction='down'):
-                        logger.info(f"Short signal: Pullback complete at {current_price:.2f}, "
-                                  f"target was {pullback_level:.2f}")
-                        self._reset_breakout_state()
-                        return True
+            # 价格已反弹到目标位置且开始回落 (目标价为 NaN 时比较恒为 False)
+            pullback_level = self.pullback_level
+            if previous_price >= pullback_level and current_price < previous_price:
+                # 确认回落
+                if self._confirm_reversal(df, current_index, direction='down'):
+                    logger.info("Short signal: Pullback complete at %.2f, "
+                              "target was %.2f", current_price, pullback_level)
+                    self._reset_breakout_state()
+                    return True
 
         return False
 
@@ -188,19 +200,16 @@ class BreakoutPullbackStrategy(BaseStrategy):
         if current_index < 5:
             return False
 
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
         # 跌破支撑位
-        if current.get('support_breakdown', False):
-            logger.info(f"Exit long: Support breakdown")
+        if self._cols['support_breakdown'][current_index]:
+            logger.info("Exit long: Support breakdown")
             return True
 
         # 价格显著回落
         if self.entry_price > 0:
-            drawdown = (self.entry_price - current['close']) / self.entry_price
+            drawdown = (self.entry_price - self._close[current_index]) / self.entry_price
             if drawdown > 0.03:  # 回撤超过3%
-                logger.info(f"Exit long: Significant drawdown {drawdown:.2%}")
+                logger.info("Exit long: Significant drawdown %.2f%%", drawdown * 100)
                 return True
 
         return False
@@ -215,23 +224,41 @@ class BreakoutPullbackStrategy(BaseStrategy):
         if current_index < 5:
             return False
 
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
         # 突破阻力位
-        if current.get('resistance_breakout', False):
-            logger.info(f"Exit short: Resistance breakout")
+        if self._cols['resistance_breakout'][current_index]:
+            logger.info("Exit short: Resistance breakout")
             return True
 
         # 价格显著反弹
         if self.entry_price > 0:
-            drawdown = (current['close'] - self.entry_price) / self.entry_price
+            drawdown = (self._close[current_index] - self.entry_price) / self.entry_price
             if drawdown > 0.03:  # 反弹超过3%
-                logger.info(f"Exit short: Significant bounce {drawdown:.2%}")
+                logger.info("Exit short: Significant bounce %.2f%%", drawdown * 100)
                 return True
 
         return False
 
+    def bind_frame(self, df):
+        """
+        缓存列数组, 并整段预计算每根K线若发生突破/跌破时的回踩目标价
+
+        做多目标: 前一根阻力位 + (突破K线最高价 - 阻力位) * (1 - pullback_ratio);
+        做空目标: 前一根支撑位 - (支撑位 - 跌破K线最低价) * (1 - pullback_ratio).
+        突破K线最高/最低价为 0 时目标为 NaN (不触发回踩)
+        """
+        super().bind_frame(df)
+
+        n = len(self._close)
+        retrace = 1 - self.pullback_ratio
+        resistance_prev = np.full(n, np.nan)
+        support_prev = np.full(n, np.nan)
+        resistance_prev[1:] = df['resistance'].to_numpy(dtype=np.float64, na_value=np.nan)[:-1]
+        support_prev[1:] = df['support'].to_numpy(dtype=np.float64, na_value=np.nan)[:-1]
+
+        high, low = self._high, self._low
+        self._long_targets = np.where(high != 0, resistance_prev + (high - resistance_prev) * retrace, np.nan)
+        self._short_targets = np.where(low != 0, support_prev - (support_prev - low) * retrace, np.nan)
+
     def _identify_key_levels(self, df):
         """
         识别关键价格水平（支撑和阻力）
@@ -239,16 +266,23 @@ class BreakoutPullbackStrategy(BaseStrategy):
         使用局部极值点方法
         """
         window = 5
+        size = window * 2 + 1
+
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+
+        # 居中窗口的最高/最低价 (两端不足一个窗口处为 NaN), 在滑动窗口视图上直接归约
+        window_max = np.full(len(df), np.nan)
+        window_min = np.full(len(df), np.nan)
+        if len(df) >= size:
+            window_max[window:-window] = sliding_window_view(high, size).max(axis=1)
+            window_min[window:-window] = sliding_window_view(low, size).min(axis=1)
 
         # 识别局部高点
-        df['local_high'] = (
-            (df['high'] == df['high'].rolling(window=window * 2 + 1, center=True).max())
-        )
+        df['local_high'] = high == window_max
 
         # 识别局部低点
-        df['local_low'] = (
-            (df['low'] == df['low'].rolling(window=window * 2 + 1, center=True).min())
-        )
+        df['local_low'] = low == window_min
 
         return df
 
@@ -267,24 +301,22 @@ class BreakoutPullbackStrategy(BaseStrategy):
         if current_index < 3:
             return False
 
-        current = df.iloc[current_index]
-        prev1 = df.iloc[current_index - 1]
-        prev2 = df.iloc[current_index - 2]
+        close = self._close
+        volume = self._volume
+        i = current_index
 
         if direction == 'up':
             # 向上反转：连续两根K线收高
-            if (current['close'] > prev1['close'] and
-                prev1['close'] > prev2['close']):
+            if close[i] > close[i - 1] and close[i - 1] > close[i - 2]:
                 # 成交量确认
-                if not self.use_volume or current['volume'] > prev1['volume']:
+                if not self.use_volume or volume[i] > volume[i - 1]:
                     return True
 
         else:  # down
             # 向下反转：连续两根K线收低
-            if (current['close'] < prev1['close'] and
-                prev1['close'] < prev2['close']):
+            if close[i] < close[i - 1] and close[i - 1] < close[i - 2]:
                 # 成交量确认
-                if not self.use_volume or current['volume'] > prev1['volume']:
+                if not self.use_volume or volume[i] > volume[i - 1]:
                     return True
 
         return False
@@ -32,6 +32,11 @@ class GridTradingStrategy(BaseStrategy):
     - rebalance_threshold: 网格重置阈值 (默认0.3，即价格偏离30%时重置网格)
     """
 
+    __slots__ = (
+        'grid_num', 'price_range', 'grid_mode', 'rebalance_threshold', 'grid_prices', 'base_price',
+        '_grid_occ', '_grid_entry_prices', '_grid_sizes', '_cross_down', '_cross_up',
+    )
+
     def __init__(self, config):
         super().__init__(config)
         self.grid_num = self.params.get('grid_num', 10)
@@ -40,27 +45,45 @@ class GridTradingStrategy(BaseStrategy):
         self.rebalance_threshold = self.params.get('rebalance_threshold', 0.3)
 
         # 网格参数
-        self.grid_prices = []
+        self.grid_prices = np.empty(0)  # 升序网格价格数组
         self.base_price = None
-        self.grid_positions = {}  # 记录每个网格的持仓
+        # 每个网格的持仓: 位掩码记录哪些网格已有持仓 (第 i 位对应第 i 条网格线), 数组记录开仓价和数量
+        self._grid_occ = 0
+        self._grid_entry_prices = np.zeros(self.grid_num + 1)
+        self._grid_sizes = np.zeros(self.grid_num + 1)
+
+        # 最近一次 calculate_signals 预计算的每根K线向下/向上穿越的网格索引 (-1 表示未穿越)
+        self._cross_down = np.zeros(0, dtype=np.int64)
+        self._cross_up = np.zeros(0, dtype=np.int64)
 
-        logger.info(f"Grid Trading Strategy initialized - Grids: {self.grid_num}, "
-                   f"Range: {self.price_range*100}%, Mode: {self.grid_mode}")
+        logger.info("Grid Trading Strategy initialized - Grids: %s, Range: %s%%, Mode: %s",
+                    self.grid_num, self.price_range * 100, self.grid_mode)
 
     def calculate_signals(self, df):
         """计算网格线和交易信号"""
-        # 计算基准价格（使用近期平均价）
-        if self.base_price is None or self._should_rebalance(df):
-            self.base_price = df['close'].iloc[-50:].mean()
+        close = df['close'].to_numpy(dtype=np.float64)
+
+        # 计算基准价格（使用近期平均价）, 只在首次或需要重置网格时计算
+        if self.base_price is None or self._should_rebalance(close[-1]):
+            self.base_price = float(np.nanmean(close[-50:]))
             self._setup_grid()
 
-        # 标记当前价格所在的网格
-        df['current_grid'] = df['close'].apply(self._get_grid_level)
+        grid = self.grid_prices
+
+        # 标记当前价格所在的网格 (整列二分查找)
+        if len(grid) == 0:
+            df['current_grid'] = None
+        else:
+            df['current_grid'] = np.minimum(np.searchsorted(grid, close, side='left'), len(grid) - 1)
 
         # 计算价格在网格中的位置
-        df['grid_position'] = df.apply(
-            lambda row: self._calculate_grid_position(row['close']), axis=1
-        )
+        if len(grid) < 2 or grid[-1] == grid[0]:
+            df['grid_position'] = 0.5
+        else:
+            df['grid_position'] = np.clip((close - grid[0]) / (grid[-1] - grid[0]), 0, 1)
+
+        # 整段预计算网格穿越, 判断方法只需结合持仓状态按下标读取
+        self._cross_down, self._cross_up = self._crossed_grids(close)
 
         return df
 
@@ -69,19 +92,18 @@ class GridTradingStrategy(BaseStrategy):
         做多条件：
         价格下跌触及下方网格线时买入
         """
-        if current_index < 1 or not self.grid_prices:
+        if current_index < 1 or len(self.grid_prices) == 0:
             return False
 
-        current_price = df.iloc[current_index]['close']
-        previous_price = df.iloc[current_index - 1]['close']
+        current_price = self._close[current_index]
 
         # 找到当前价格穿越的网格线
-        crossed_grid = self._get_crossed_grid(previous_price, current_price, direction='down')
+        crossed_grid = self._cross_down[current_index]
 
-        if crossed_grid is not None:
+        if crossed_grid >= 0:
             # 检查该网格是否已经有持仓
-            if not self._has_position_at_grid(crossed_grid):
-                logger.info(f"Long signal: Price crossed down to grid {crossed_grid} at {current_price:.2f}")
+            if not self._has_position_at_grid(int(crossed_grid)):
+                logger.info("Long signal: Price crossed down to grid %s at %.2f", crossed_grid, current_price)
                 return True
 
         return False
@@ -91,19 +113,18 @@ class GridTradingStrategy(BaseStrategy):
         做空条件：
         价格上涨触及上方网格线时卖出（平多或做空）
         """
-        if current_index < 1 or not self.grid_prices:
+        if current_index < 1 or len(self.grid_prices) == 0:
             return False
 
-        current_price = df.iloc[current_index]['close']
-        previous_price = df.iloc[current_index - 1]['close']
+        current_price = self._close[current_index]
 
         # 找到当前价格穿越的网格线
-        crossed_grid = self._get_crossed_grid(previous_price, current_price, direction='up')
+        crossed_grid = self._cross_up[current_index]
 
-        if crossed_grid is not None:
+        if crossed_grid >= 0:
             # 在网格交易中，通常不做空，只是卖出多单
             # 如果需要做空，可以在这里实现
-            logger.info(f"Short signal: Price crossed up to grid {crossed_grid} at {current_price:.2f}")
+            logger.info("Short signal: Price crossed up to grid %s at %.2f", crossed_grid, current_price)
             return False  # 网格策略通常只做多，不做空
 
         return False
@@ -113,21 +134,20 @@ class GridTradingStrategy(BaseStrategy):
         平多条件：
         价格上涨触及上方网格线时平仓
         """
-        if current_index < 1 or not self.grid_prices:
+        if current_index < 1 or len(self.grid_prices) == 0:
             return False
 
-        current_price = df.iloc[current_index]['close']
-        previous_price = df.iloc[current_index - 1]['close']
+        current_price = self._close[current_index]
 
         # 找到当前价格穿越的网格线
-        crossed_grid = self._get_crossed_grid(previous_price, current_price, direction='up')
+        crossed_grid = self._cross_up[current_index]
 
-        if crossed_grid is not None and self.position == 'LONG':
+        if crossed_grid >= 0 and self.position == 'LONG':
             # 计算盈利
             if self.entry_price > 0:
                 profit_pct = (current_price - self.entry_price) / self.entry_price
                 if profit_pct > 0.01:  # 至少1%的利润
-                    logger.info(f"Exit long: Price crossed up to grid {crossed_grid}, profit: {profit_pct:.2%}")
+                    logger.info("Exit long: Price crossed up to grid %s, profit: %.2f%%", crossed_grid, profit_pct * 100)
                     return True
 
         return False
@@ -137,21 +157,20 @@ class GridTradingStrategy(BaseStrategy):
         平空条件：
         价格下跌触及下方网格线时平仓
         """
-        if current_index < 1 or not self.grid_prices:
+        if current_index < 1 or len(self.grid_prices) == 0:
             return False
 
-        current_price = df.iloc[current_index]['close']
-        previous_price = df.iloc[current_index - 1]['close']
+        current_price = self._close[current_index]
 
         # 找到当前价格穿越的网格线
-        crossed_grid = self._get_crossed_grid(previous_price, current_price, direction='down')
+        crossed_grid = self._cross_down[current_index]
 
-        if crossed_grid is not None and self.position == 'SHORT':
+        if crossed_grid >= 0 and self.position == 'SHORT':
             # 计算盈利
             if self.entry_price > 0:
                 profit_pct = (self.entry_price - current_price) / self.entry_price
                 if profit_pct > 0.01:
-                    logger.info(f"Exit short: Price crossed down to grid {crossed_grid}, profit: {profit_pct:.2%}")
+                    logger.info("Exit short: Price crossed down to grid %s, profit: %.2f%%", crossed_grid, profit_pct * 100)
                     return True
 
         return False
@@ -171,85 +190,76 @@ class GridTradingStrategy(BaseStrategy):
             # 等比网格（对数网格）
             self.grid_prices = np.geomspace(lower_price, upper_price, self.grid_num + 1)
 
-        logger.info(f"Grid setup: Base={self.base_price:.2f}, "
-                   f"Range=[{lower_price:.2f}, {upper_price:.2f}], "
-                   f"Grids={len(self.grid_prices)}")
+        logger.info("Grid setup: Base=%.2f, Range=[%.2f, %.2f], Grids=%d",
+                    self.base_price, lower_price, upper_price, len(self.grid_prices))
 
-    def _should_rebalance(self, df):
-        """判断是否需要重新设置网格"""
+    def _should_rebalance(self, current_price):
+        """判断最新价格是否偏离基准价格过多, 需要重新设置网格"""
         if self.base_price is None:
             return True
 
-        current_price = df['close'].iloc[-1]
         deviation = abs(current_price - self.base_price) / self.base_price
 
         if deviation > self.rebalance_threshold:
-            logger.info(f"Rebalancing grid: deviation {deviation:.2%} exceeds threshold")
+            logger.info("Rebalancing grid: deviation %.2f%% exceeds threshold", deviation * 100)
             return True
 
         return False
 
     def _get_grid_level(self, price):
-        """获取价格所在的网格层级"""
-        if not self.grid_prices:
+        """获取价格所在的网格层级 (第一条不低于价格的网格线)"""
+        n = len(self.grid_prices)
+        if n == 0:
             return None
 
-        for i, grid_price in enumerate(self.grid_prices):
-            if price <= grid_price:
-                return i
+        return min(int(np.searchsorted(self.grid_prices, price, side='left')), n - 1)
 
-        return len(self.grid_prices) - 1
-
-    def _get_crossed_grid(self, prev_price, curr_price, direction='down'):
+    def _crossed_grids(self, close):
         """
-        检测价格穿越了哪条网格线
+        整段计算每根K线相对前一根穿越了哪条网格线
+
+        向下穿越取满足 prev > 网格价 >= curr 的最低一条, 向上穿越取满足 prev < 网格价 <= curr 的最低一条
 
         Args:
-            prev_price: 前一个价格
-            curr_price: 当前价格
-            direction: 'up' 或 'down'
+            close: 收盘价数组
 
         Returns:
-            穿越的网格索引，如果没有穿越返回None
+            tuple: (cross_down, cross_up) 网格索引数组, -1 表示未穿越 (第一根K线恒为 -1)
         """
-        if not self.grid_prices:
-            return None
+        grid = self.grid_prices
+        n = len(grid)
+        cross_down = np.full(len(close), -1, dtype=np.int64)
+        cross_up = np.full(len(close), -1, dtype=np.int64)
+        if n == 0 or len(close) < 2:
+            return cross_down, cross_up
 
-        if direction == 'down':
-            # 价格下跌，检查是否穿越了某条网格线（从上往下）
-            for i, grid_price in enumerate(self.grid_prices):
-                if prev_price > grid_price >= curr_price:
-                    return i
-        else:
-            # 价格上涨，检查是否穿越了某条网格线（从下往上）
-            for i, grid_price in enumerate(self.grid_prices):
-                if prev_price < grid_price <= curr_price:
-                    return i
+        prev, curr = close[:-1], close[1:]
 
-        return None
+        # 第一条不低于当前价的网格线, 且低于前一根价格
+        i = np.searchsorted(grid, curr, side='left')
+        valid = i < n
+        valid[valid] = grid[i[valid]] < prev[valid]
+        cross_down[1:][valid] = i[valid]
 
-    def _calculate_grid_position(self, price):
-        """
-        计算价格在网格中的相对位置（0-1之间）
+        # 第一条高于前一根价格的网格线, 且不高于当前价
+        j = np.searchsorted(grid, prev, side='right')
+        valid = j < n
+        valid[valid] = grid[j[valid]] <= curr[valid]
+        cross_up[1:][valid] = j[valid]
 
-        Returns:
-            float: 0表示在最低网格，1表示在最高网格
-        """
-        if not self.grid_prices or len(self.grid_prices) < 2:
-            return 0.5
-
-        min_price = self.grid_prices[0]
-        max_price = self.grid_prices[-1]
-
-        if max_price == min_price:
-            return 0.5
-
-        position = (price - min_price) / (max_price - min_price)
-        return max(0, min(1, position))
+        return cross_down, cross_up
 
     def _has_position_at_grid(self, grid_level):
         """检查某个网格是否已有持仓"""
-        return grid_level in self.grid_positions
+        return bool(self._grid_occ >> grid_level & 1)
+
+    @property
+    def grid_positions(self):
+        """各网格的持仓记录 {网格层级: {'price', 'size'}} (只读视图)"""
+        return {
+            level: {'price': float(self._grid_entry_prices[level]), 'size': float(self._grid_sizes[level])}
+            for level in range(len(self._grid_sizes)) if self._grid_occ >> level & 1
+        }
 
     def update_position(self, position_type, price, size=0):
         """
@@ -257,25 +267,25 @@ class GridTradingStrategy(BaseStrategy):
         """
         super().update_position(position_type, price, size)
 
-        if position_type == 'LONG' and self.grid_prices:
+        if position_type == 'LONG' and len(self.grid_prices):
             # 记录在哪个网格开仓
             grid_level = self._get_grid_level(price)
             if grid_level is not None:
-                self.grid_positions[grid_level] = {
-                    'price': price,
-                    'size': size
-                }
+                self._grid_occ |= 1 << grid_level
+                self._grid_entry_prices[grid_level] = price
+                self._grid_sizes[grid_level] = size
         elif position_type is None:
             # 平仓时清除网格记录
-            if self.entry_price and self.grid_prices:
+            if self.entry_price and len(self.grid_prices):
                 grid_level = self._get_grid_level(self.entry_price)
-                if grid_level in self.grid_positions:
-                    del self.grid_positions[grid_level]
+                self._grid_occ &= ~(1 << grid_level)
 
     def reset(self):
         """重置策略状态"""
         super().reset()
-        self.grid_prices = []
+        self.grid_prices = np.empty(0)
         self.base_price = None
-        self.grid_positions = {}
+        self._grid_occ = 0
+        self._grid_entry_prices.fill(0)
+        self._grid_sizes.fill(0)
         logger.info("Grid strategy reset")
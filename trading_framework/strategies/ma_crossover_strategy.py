@@ -1,8 +1,10 @@
 """
 均线交叉策略 - 示例策略实现
 """
+from collections import deque
 from .base_strategy import BaseStrategy
 from utils.indicators import Indicators
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,11 +18,25 @@ class MACrossoverStrategy(BaseStrategy):
     - 支持止损止盈
     """
 
+    vectorized = True
+
     def __init__(self, config):
         super().__init__(config)
         self.ma_short_period = self.params.get('ma_short', 10)
         self.ma_long_period = self.params.get('ma_long', 30)
-        logger.info(f"MA Crossover Strategy initialized - Short: {self.ma_short_period}, Long: {self.ma_long_period}")
+
+        # 增量更新状态 (均线窗口内的收盘价及其滚动和)
+        self._closes = deque(maxlen=max(self.ma_short_period, self.ma_long_period))
+        self._sum_short = 0.0
+        self._sum_long = 0.0
+        self._prev_ma_diff = np.nan
+        self._bar_count = 0
+
+        # 最近一次 calculate_signals 预计算的金叉/死叉数组 (已排除预热期), 判断方法按下标读取
+        self._golden = np.zeros(0, dtype=bool)
+        self._death = np.zeros(0, dtype=bool)
+        logger.info("MA Crossover Strategy initialized - Short: %s, Long: %s",
+                    self.ma_short_period, self.ma_long_period)
 
     def calculate_signals(self, df):
         """
@@ -32,27 +48,82 @@ class MACrossoverStrategy(BaseStrategy):
         Returns:
             DataFrame: 添加了信号列的数据
         """
-        # 计算均线
-        df['ma_short'] = Indicators.sma(df['close'], self.ma_short_period)
-        df['ma_long'] = Indicators.sma(df['close'], self.ma_long_period)
+        # 计算均线 (两条均线在一次遍历中同时计算)
+        df['ma_short'], df['ma_long'] = Indicators.smas(df['close'], self.ma_short_period, self.ma_long_period)
 
         # 计算均线差值
         df['ma_diff'] = df['ma_short'] - df['ma_long']
-        df['ma_diff_prev'] = df['ma_diff'].shift(1)
 
-        # 生成信号
-        df['signal'] = 'HOLD'
+        # 差值上穿/下穿 0 即金叉/死叉: 金叉为前一根 <= 0 变为 > 0, 死叉为前一根 >= 0 变为 < 0
+        # (前一根差值为 NaN 时不算交叉)
+        golden_cross, death_cross = Indicators.crosses(df['ma_diff'].to_numpy(dtype=np.float64))
 
-        # 金叉 - 买入信号
-        golden_cross = (df['ma_diff'] > 0) & (df['ma_diff_prev'] <= 0)
-        df.loc[golden_cross, 'signal'] = 'BUY'
+        # 生成信号: 金叉买入, 死叉卖出
+        df['signal'] = np.where(golden_cross, 'BUY', np.where(death_cross, 'SELL', 'HOLD'))
 
-        # 死叉 - 卖出信号
-        death_cross = (df['ma_diff'] < 0) & (df['ma_diff_prev'] >= 0)
-        df.loc[death_cross, 'signal'] = 'SELL'
+        # 信号列 (与 should_* 判断一致, 前 ma_long 根K线不产生信号)
+        warmed_up = np.arange(len(df)) >= self.ma_long_period
+        self._golden = golden_cross & warmed_up
+        self._death = death_cross & warmed_up
+        df['enter_long'] = self._golden
+        df['enter_short'] = self._death
+        df['exit_long'] = self._death
+        df['exit_short'] = self._golden
 
         return df
 
+    def prime(self, df):
+        """用历史K线初始化均线的滚动和"""
+        closes = df['close'].to_numpy(dtype=np.float64)
+        self._closes.clear()
+        self._closes.extend(closes[-self._closes.maxlen:].tolist())
+        self._sum_short = float(closes[-self.ma_short_period:].sum())
+        self._sum_long = float(closes[-self.ma_long_period:].sum())
+        self._bar_count = len(closes)
+
+        ma_short = self._sum_short / self.ma_short_period if len(closes) >= self.ma_short_period else np.nan
+        ma_long = self._sum_long / self.ma_long_period if len(closes) >= self.ma_long_period else np.nan
+        self._prev_ma_diff = ma_short - ma_long
+
+    def update(self, bar):
+        """
+        增量更新: O(1) 维护两条均线的滚动和, 判断当前bar是否金叉/死叉
+
+        Args:
+            bar: dict, 新收盘的K线
+
+        Returns:
+            str: 交易信号
+        """
+        close = float(bar['close'])
+        closes = self._closes
+
+        # 移出窗口的收盘价
+        if len(closes) >= self.ma_short_period:
+            self._sum_short -= closes[-self.ma_short_period]
+        if len(closes) >= self.ma_long_period:
+            self._sum_long -= closes[-self.ma_long_period]
+
+        closes.append(close)
+        self._sum_short += close
+        self._sum_long += close
+
+        n = len(closes)
+        ma_short = self._sum_short / self.ma_short_period if n >= self.ma_short_period else np.nan
+        ma_long = self._sum_long / self.ma_long_period if n >= self.ma_long_period else np.nan
+        ma_diff = ma_short - ma_long
+        ma_diff_prev = self._prev_ma_diff
+        self._prev_ma_diff = ma_diff
+
+        current_index = self._bar_count
+        self._bar_count += 1
+        warmed_up = current_index >= self.ma_long_period
+
+        golden_cross = warmed_up and ma_diff > 0 and ma_diff_prev <= 0
+        death_cross = warmed_up and ma_diff < 0 and ma_diff_prev >= 0
+
+        return self._resolve_signal(close, golden_cross, death_cross, death_cross, golden_cross)
+
     def should_enter_long(self, df, current_index):
         """
         判断是否应该做多
@@ -68,29 +139,7 @@ class MACrossoverStrategy(BaseStrategy):
         Returns:
             bool: 是否做多
         """
-        if current_index < self.ma_long_period:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        # 计算均线
-        ma_short_current = current.get('ma_short', None)
-        ma_long_current = current.get('ma_long', None)
-        ma_short_prev = previous.get('ma_short', None)
-        ma_long_prev = previous.get('ma_long', None)
-
-        if any(x is None for x in [ma_short_current, ma_long_current, ma_short_prev, ma_long_prev]):
-            return False
-
-        # 金叉判断
-        golden_cross = (ma_short_prev <= ma_long_prev) and (ma_short_current > ma_long_current)
-
-        if golden_cross:
-            logger.info(f"Golden cross detected at index {current_index}")
-            return True
-
-        return False
+        return bool(self._golden[current_index])
 
     def should_enter_short(self, df, current_index):
         """
@@ -107,29 +156,7 @@ class MACrossoverStrategy(BaseStrategy):
         Returns:
             bool: 是否做空
         """
-        if current_index < self.ma_long_period:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        # 计算均线
-        ma_short_current = current.get('ma_short', None)
-        ma_long_current = current.get('ma_long', None)
-        ma_short_prev = previous.get('ma_short', None)
-        ma_long_prev = previous.get('ma_long', None)
-
-        if any(x is None for x in [ma_short_current, ma_long_current, ma_short_prev, ma_long_prev]):
-            return False
-
-        # 死叉判断
-        death_cross = (ma_short_prev >= ma_long_prev) and (ma_short_current < ma_long_current)
-
-        if death_cross:
-            logger.info(f"Death cross detected at index {current_index}")
-            return True
-
-        return False
+        return bool(self._death[current_index])
 
     def should_exit_long(self, df, current_index):
         """
@@ -146,28 +173,7 @@ class MACrossoverStrategy(BaseStrategy):
         Returns:
             bool: 是否平多
         """
-        if current_index < self.ma_long_period:
-            return False
-
-        # 检查死叉
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        ma_short_current = current.get('ma_short', None)
-        ma_long_current = current.get('ma_long', None)
-        ma_short_prev = previous.get('ma_short', None)
-        ma_long_prev = previous.get('ma_long', None)
-
-        if any(x is None for x in [ma_short_current, ma_long_current, ma_short_prev, ma_long_prev]):
-            return False
-
-        death_cross = (ma_short_prev >= ma_long_prev) and (ma_short_current < ma_long_current)
-
-        if death_cross:
-            logger.info(f"Exit long signal - Death cross at index {current_index}")
-            return True
-
-        return False
+        return bool(self._death[current_index])
 
     def should_exit_short(self, df, current_index):
         """
@@ -184,25 +190,4 @@ class MACrossoverStrategy(BaseStrategy):
         Returns:
             bool: 是否平空
         """
-        if current_index < self.ma_long_period:
-            return False
-
-        # 检查金叉
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        ma_short_current = current.get('ma_short', None)
-        ma_long_current = current.get('ma_long', None)
-        ma_short_prev = previous.get('ma_short', None)
-        ma_long_prev = previous.get('ma_long', None)
-
-        if any(x is None for x in [ma_short_current, ma_long_current, ma_short_prev, ma_long_prev]):
-            return False
-
-        golden_cross = (ma_short_prev <= ma_long_prev) and (ma_short_current > ma_long_current)
-
-        if golden_cross:
-            logger.info(f"Exit short signal - Golden cross at index {current_index}")
-            return True
-
-        return False
+        return bool(self._golden[current_index])
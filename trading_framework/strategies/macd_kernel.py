@@ -0,0 +1,87 @@
+"""
+MACD信号内核 - 单次循环生成四列进出场信号, 使用 numba 编译 (未安装 numba 时以纯 Python 运行)
+"""
+import numpy as np
+
+from utils._njit import njit, precompile
+
+
+@njit(cache=True)
+def macd_bar_signals(m, s, h, m_prev, s_prev, h_prev, h_prev2, use_histogram, use_zero_cross):
+    """
+    单根K线的MACD进出场信号 (规则与 MACDStrategy 的判断方法一致)
+
+    金叉/死叉出现但确认条件不满足时直接不开仓, 不再检查零轴突破条件
+
+    Args:
+        m, s, h: 当前K线的MACD线、信号线、柱状图
+        m_prev, s_prev, h_prev: 前一根K线的MACD线、信号线、柱状图
+        h_prev2: 前两根K线的柱状图 (不存在时传 NaN)
+        use_histogram: 是否使用柱状图确认
+        use_zero_cross: 是否使用零轴穿越确认
+
+    Returns:
+        tuple: (enter_long, enter_short, exit_long, exit_short)
+    """
+    golden_cross = m > s and m_prev <= s_prev
+    death_cross = m < s and m_prev >= s_prev
+    zero_cross_up = m > 0 and m_prev <= 0
+    zero_cross_down = m < 0 and m_prev >= 0
+
+    # 开仓: 金叉/死叉 + 可选的柱状图/零轴确认; 否则可选的零轴突破
+    if golden_cross:
+        enter_long = ((not use_histogram or h > 0 or h > h_prev) and
+                      (not use_zero_cross or m > 0))
+    else:
+        enter_long = use_zero_cross and zero_cross_up and m > s
+    if death_cross:
+        enter_short = ((not use_histogram or h < 0 or h < h_prev) and
+                       (not use_zero_cross or m < 0))
+    else:
+        enter_short = use_zero_cross and zero_cross_down and m < s
+
+    # 平仓: 反向交叉, 可选的零轴反向穿越, 或柱状图连续两根快速衰减/增强
+    exit_long = death_cross or (use_zero_cross and zero_cross_down)
+    exit_short = golden_cross or (use_zero_cross and zero_cross_up)
+    if use_histogram:
+        if h < h_prev and h_prev < h_prev2 and h < h_prev * 0.5:
+            exit_long = True
+        if h > h_prev and h_prev > h_prev2 and abs(h) > abs(h_prev) * 1.5:
+            exit_short = True
+
+    return enter_long, enter_short, exit_long, exit_short
+
+
+@njit(cache=True)
+def macd_signals(macd, signal, hist, use_histogram, use_zero_cross, warmup):
+    """
+    整段计算MACD策略的进出场信号 (逐根调用 macd_bar_signals)
+
+    Args:
+        macd, signal, hist: MACD线、信号线、柱状图数组
+        use_histogram: 是否使用柱状图确认
+        use_zero_cross: 是否使用零轴穿越确认
+        warmup: 前 warmup 根K线不产生信号
+
+    Returns:
+        tuple: (enter_long, enter_short, exit_long, exit_short) 布尔数组
+    """
+    n = macd.shape[0]
+    enter_long = np.zeros(n, dtype=np.bool_)
+    enter_short = np.zeros(n, dtype=np.bool_)
+    exit_long = np.zeros(n, dtype=np.bool_)
+    exit_short = np.zeros(n, dtype=np.bool_)
+
+    for i in range(max(warmup, 1), n):
+        h_prev2 = hist[i - 2] if i >= 2 else np.nan
+        enter_long[i], enter_short[i], exit_long[i], exit_short[i] = macd_bar_signals(
+            macd[i], signal[i], hist[i], macd[i - 1], signal[i - 1], hist[i - 1], h_prev2,
+            use_histogram, use_zero_cross
+        )
+
+    return enter_long, enter_short, exit_long, exit_short
+
+
+# 导入时按显式签名编译 (cache=True 时直接加载磁盘缓存)
+precompile(macd_bar_signals, '(float64, float64, float64, float64, float64, float64, float64, boolean, boolean)')
+precompile(macd_signals, '({f8}, {f8}, {f8}, boolean, boolean, int64)')
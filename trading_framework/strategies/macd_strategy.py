@@ -3,8 +3,11 @@ MACD趋势策略 - 基于MACD指标的趋势跟踪策略
 适用于趋势明显的市场
 """
 from .base_strategy import BaseStrategy
+from .macd_kernel import macd_bar_signals, macd_signals
 from utils.indicators import Indicators
 import logging
+import numpy as np
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +35,8 @@ class MACDStrategy(BaseStrategy):
     - use_zero_cross: 是否使用零轴穿越确认 (默认False)
     """
 
+    vectorized = True
+
     def __init__(self, config):
         super().__init__(config)
         self.fast_period = self.params.get('fast_period', 12)
@@ -40,8 +45,29 @@ class MACDStrategy(BaseStrategy):
         self.use_histogram = self.params.get('use_histogram', True)
         self.use_zero_cross = self.params.get('use_zero_cross', False)
 
-        logger.info(f"MACD Strategy initialized - Fast: {self.fast_period}, "
-                   f"Slow: {self.slow_period}, Signal: {self.signal_period}")
+        # 前 warmup 根K线不产生信号
+        self._warmup = max(self.slow_period, self.signal_period) + 1
+
+        # 最近一次 calculate_signals 预计算的信号数组, 判断方法按下标读取
+        self._enter_long = np.zeros(0, dtype=bool)
+        self._enter_short = np.zeros(0, dtype=bool)
+        self._exit_long = np.zeros(0, dtype=bool)
+        self._exit_short = np.zeros(0, dtype=bool)
+        self._close_arr = np.zeros(0)
+        self._macd_arr = np.zeros(0)
+
+        # 增量更新状态 (三条EMA的最新值, 前两根K线的MACD/信号线/柱状图)
+        self._ema_fast = np.nan
+        self._ema_slow = np.nan
+        self._ema_signal = np.nan
+        self._prev_macd = np.nan
+        self._prev_signal = np.nan
+        self._prev_hist = np.nan
+        self._prev_hist2 = np.nan
+        self._bar_count = 0
+
+        logger.info("MACD Strategy initialized - Fast: %s, Slow: %s, Signal: %s",
+                    self.fast_period, self.slow_period, self.signal_period)
 
     def calculate_signals(self, df):
         """计算MACD和交易信号"""
@@ -50,206 +76,149 @@ class MACDStrategy(BaseStrategy):
             df['close'], self.fast_period, self.slow_period, self.signal_period
         )
 
-        df['macd'] = macd_line
-        df['macd_signal'] = signal_line
-        df['macd_histogram'] = histogram
-
-        # 计算MACD相对于零轴的位置
-        df['macd_above_zero'] = df['macd'] > 0
-        df['macd_below_zero'] = df['macd'] < 0
-
-        # 计算柱状图的变化趋势
-        df['histogram_increasing'] = df['macd_histogram'] > df['macd_histogram'].shift(1)
-        df['histogram_decreasing'] = df['macd_histogram'] < df['macd_histogram'].shift(1)
+        macd = macd_line.to_numpy(dtype=np.float64, na_value=np.nan)
+        signal = signal_line.to_numpy(dtype=np.float64, na_value=np.nan)
+        hist = histogram.to_numpy(dtype=np.float64, na_value=np.nan)
 
-        # 计算MACD强度（柱状图绝对值）
-        df['macd_strength'] = abs(df['macd_histogram'])
+        # 背离检测使用的收盘价与MACD数组
+        self._close_arr = df['close'].to_numpy(dtype=np.float64)
+        self._macd_arr = macd
 
-        # 检测金叉死叉
-        df['macd_golden_cross'] = (
-            (df['macd'] > df['macd_signal']) &
-            (df['macd'].shift(1) <= df['macd_signal'].shift(1))
+        # 四个信号数组由内核单次遍历生成并缓存, 判断方法按下标读取
+        (self._enter_long, self._enter_short,
+         self._exit_long, self._exit_short) = macd_signals(
+            macd, signal, hist, bool(self.use_histogram), bool(self.use_zero_cross), int(self._warmup)
         )
 
-        df['macd_death_cross'] = (
-            (df['macd'] < df['macd_signal']) &
-            (df['macd'].shift(1) >= df['macd_signal'].shift(1))
-        )
+        # 只在需要时计算中间指标并一次性写回 DataFrame, 回测引擎直接使用缓存的信号数组
+        # (零轴位置、柱状图增减和强度可由 macd / macd_histogram 列直接得出, 不再单独成列)
+        if self.keep_indicators:
+            # 柱状图即 MACD线 - 信号线, 其符号翻转即金叉/死叉; MACD线符号翻转即零轴穿越
+            golden_cross, death_cross = Indicators.crosses(hist)
+            zero_cross_up, zero_cross_down = Indicators.crosses(macd)
+
+            df = self._with_columns(df, {
+                'macd': macd,
+                'macd_signal': signal,
+                'macd_histogram': hist,
+                'macd_golden_cross': golden_cross,
+                'macd_death_cross': death_cross,
+                'zero_cross_up': zero_cross_up,
+                'zero_cross_down': zero_cross_down,
+                'enter_long': self._enter_long,
+                'enter_short': self._enter_short,
+                'exit_long': self._exit_long,
+                'exit_short': self._exit_short,
+            })
 
-        # 检测零轴穿越
-        df['zero_cross_up'] = (
-            (df['macd'] > 0) &
-            (df['macd'].shift(1) <= 0)
-        )
+        return df
 
-        df['zero_cross_down'] = (
-            (df['macd'] < 0) &
-            (df['macd'].shift(1) >= 0)
-        )
+    def signal_arrays(self, df):
+        """直接返回 calculate_signals 缓存的信号数组 (不依赖信号列是否写回 DataFrame)"""
+        return self._enter_long, self._enter_short, self._exit_long, self._exit_short
+
+    def prime(self, df):
+        """用历史K线初始化三条EMA及前两根K线的MACD状态"""
+        close = df['close']
+        n = len(close)
+        self._bar_count = n
+        if n == 0:
+            self._ema_fast = self._ema_slow = self._ema_signal = np.nan
+            self._prev_macd = self._prev_signal = self._prev_hist = self._prev_hist2 = np.nan
+            return
+
+        ema_fast = Indicators.ema(close, self.fast_period).to_numpy(dtype=np.float64)
+        ema_slow = Indicators.ema(close, self.slow_period).to_numpy(dtype=np.float64)
+        macd = ema_fast - ema_slow
+        signal = Indicators.ema(pd.Series(macd), self.signal_period).to_numpy(dtype=np.float64)
+        hist = macd - signal
+
+        self._ema_fast = float(ema_fast[-1])
+        self._ema_slow = float(ema_slow[-1])
+        self._ema_signal = float(signal[-1])
+        self._prev_macd = float(macd[-1])
+        self._prev_signal = float(signal[-1])
+        self._prev_hist = float(hist[-1])
+        self._prev_hist2 = float(hist[-2]) if n >= 2 else np.nan
+
+    def update(self, bar):
+        """
+        增量更新: 按 EMA 递推式 O(1) 更新 MACD, 判断当前bar的进出场信号
 
-        return df
+        Args:
+            bar: dict, 新收盘的K线
+
+        Returns:
+            str: 交易信号
+        """
+        close = float(bar['close'])
+        current_index = self._bar_count
+        self._bar_count += 1
+
+        # 与 ewm(span, adjust=False) 一致: 第一根取收盘价本身, 之后 v = v_prev + alpha * (x - v_prev)
+        if current_index == 0:
+            self._ema_fast = self._ema_slow = close
+        else:
+            self._ema_fast += (close - self._ema_fast) * 2.0 / (self.fast_period + 1)
+            self._ema_slow += (close - self._ema_slow) * 2.0 / (self.slow_period + 1)
+        macd = self._ema_fast - self._ema_slow
+        if current_index == 0:
+            self._ema_signal = macd
+        else:
+            self._ema_signal += (macd - self._ema_signal) * 2.0 / (self.signal_period + 1)
+        signal = self._ema_signal
+        hist = macd - signal
+
+        if current_index >= max(self._warmup, 1):
+            enter_long, enter_short, exit_long, exit_short = macd_bar_signals(
+                macd, signal, hist, self._prev_macd, self._prev_signal, self._prev_hist, self._prev_hist2,
+                bool(self.use_histogram), bool(self.use_zero_cross)
+            )
+        else:
+            enter_long = enter_short = exit_long = exit_short = False
+
+        self._prev_hist2 = self._prev_hist
+        self._prev_macd, self._prev_signal, self._prev_hist = macd, signal, hist
+
+        return self._resolve_signal(close, enter_long, enter_short, exit_long, exit_short)
 
     def should_enter_long(self, df, current_index):
         """
         做多条件：
         1. MACD金叉（MACD线上穿信号线）
-        2. 可选：柱状图由负转正或正在增长
+        2. 可选：柱状图为正或正在增长
         3. 可选：MACD在零轴上方（强趋势确认）
+        或（use_zero_cross）：MACD向上穿越零轴且在信号线上方
         """
-        if current_index < max(self.slow_period, self.signal_period) + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        # 核心条件：MACD金叉
-        if current.get('macd_golden_cross', False):
-            logger.info(f"MACD golden cross detected")
-
-            # 额外确认条件
-            confirmations = []
-
-            # 1. 柱状图确认
-            if self.use_histogram:
-                if current['macd_histogram'] > 0 or current.get('histogram_increasing', False):
-                    confirmations.append('histogram')
-                else:
-                    logger.debug("Histogram confirmation failed")
-                    return False
-
-            # 2. 零轴确认
-            if self.use_zero_cross:
-                if current['macd'] > 0:
-                    confirmations.append('zero_axis')
-                else:
-                    logger.debug("Zero axis confirmation failed")
-                    return False
-
-            logger.info(f"Long signal confirmed with: {confirmations}")
-            return True
-
-        # 补充条件：零轴向上突破（强烈做多信号）
-        if self.use_zero_cross and current.get('zero_cross_up', False):
-            if current['macd'] > current['macd_signal']:
-                logger.info(f"Long signal: Zero axis breakout")
-                return True
-
-        return False
+        return bool(self._enter_long[current_index])
 
     def should_enter_short(self, df, current_index):
         """
         做空条件：
         1. MACD死叉（MACD线下穿信号线）
-        2. 可选：柱状图由正转负或正在减小
+        2. 可选：柱状图为负或正在减小
         3. 可选：MACD在零轴下方（强趋势确认）
+        或（use_zero_cross）：MACD向下穿越零轴且在信号线下方
         """
-        if current_index < max(self.slow_period, self.signal_period) + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        # 核心条件：MACD死叉
-        if current.get('macd_death_cross', False):
-            logger.info(f"MACD death cross detected")
-
-            # 额外确认条件
-            confirmations = []
-
-            # 1. 柱状图确认
-            if self.use_histogram:
-                if current['macd_histogram'] < 0 or current.get('histogram_decreasing', False):
-                    confirmations.append('histogram')
-                else:
-                    logger.debug("Histogram confirmation failed")
-                    return False
-
-            # 2. 零轴确认
-            if self.use_zero_cross:
-                if current['macd'] < 0:
-                    confirmations.append('zero_axis')
-                else:
-                    logger.debug("Zero axis confirmation failed")
-                    return False
-
-            logger.info(f"Short signal confirmed with: {confirmations}")
-            return True
-
-        # 补充条件：零轴向下突破（强烈做空信号）
-        if self.use_zero_cross and current.get('zero_cross_down', False):
-            if current['macd'] < current['macd_signal']:
-                logger.info(f"Short signal: Zero axis breakdown")
-                return True
-
-        return False
+        return bool(self._enter_short[current_index])
 
     def should_exit_long(self, df, current_index):
         """
         平多条件：
         1. MACD死叉
-        2. 柱状图显著减小
-        3. MACD跌破零轴
+        2. 可选：MACD跌破零轴
+        3. 可选：柱状图连续两根减小且降至前一根的一半以下
         """
-        if current_index < max(self.slow_period, self.signal_period) + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        # 主要出场信号：死叉
-        if current.get('macd_death_cross', False):
-            logger.info(f"Exit long: MACD death cross")
-            return True
-
-        # 补充出场信号：MACD跌破零轴
-        if self.use_zero_cross and current.get('zero_cross_down', False):
-            logger.info(f"Exit long: MACD crossed below zero")
-            return True
-
-        # 紧急出场：柱状图快速衰减
-        if self.use_histogram:
-            if (current['macd_histogram'] < previous['macd_histogram'] and
-                previous['macd_histogram'] < df.iloc[current_index - 2]['macd_histogram']):
-                # 连续两根K线柱状图减小
-                if current['macd_histogram'] < previous['macd_histogram'] * 0.5:
-                    logger.info(f"Exit long: Histogram rapid decay")
-                    return True
-
-        return False
+        return bool(self._exit_long[current_index])
 
     def should_exit_short(self, df, current_index):
         """
         平空条件：
         1. MACD金叉
-        2. 柱状图显著增大
-        3. MACD突破零轴
+        2. 可选：MACD突破零轴
+        3. 可选：柱状图连续两根增大且绝对值超过前一根的1.5倍
         """
-        if current_index < max(self.slow_period, self.signal_period) + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        # 主要出场信号：金叉
-        if current.get('macd_golden_cross', False):
-            logger.info(f"Exit short: MACD golden cross")
-            return True
-
-        # 补充出场信号：MACD突破零轴
-        if self.use_zero_cross and current.get('zero_cross_up', False):
-            logger.info(f"Exit short: MACD crossed above zero")
-            return True
-
-        # 紧急出场：柱状图快速增强
-        if self.use_histogram:
-            if (current['macd_histogram'] > previous['macd_histogram'] and
-                previous['macd_histogram'] > df.iloc[current_index - 2]['macd_histogram']):
-                # 连续两根K线柱状图增大
-                if abs(current['macd_histogram']) > abs(previous['macd_histogram']) * 1.5:
-                    logger.info(f"Exit short: Histogram rapid increase")
-                    return True
-
-        return False
+        return bool(self._exit_short[current_index])
 
     def _detect_divergence(self, df, current_index, divergence_type='bullish'):
         """
@@ -263,36 +232,32 @@ class MACDStrategy(BaseStrategy):
         Returns:
             bool: 是否检测到背离
         """
-        if current_index < 20:
+        lookback = 20
+        if current_index < lookback:
             return False
 
-        lookback = 20
-        recent_data = df.iloc[current_index - lookback:current_index + 1]
+        # 直接在 calculate_signals 缓存的数组上切片, 用位置 (nanargmin/nanargmax) 代替 idxmin/idxmax
+        start = current_index - lookback
+        close_window = self._close_arr[start:current_index + 1]
+        macd_window = self._macd_arr[start:current_index + 1]
+        if np.isnan(macd_window).all():
+            return False
+
+        current_price = close_window[-1]
+        current_macd = macd_window[-1]
 
         if divergence_type == 'bullish':
             # 底背离：价格创新低，但MACD未创新低
-            price_low_idx = recent_data['close'].idxmin()
-            macd_low_idx = recent_data['macd'].idxmin()
-
-            if price_low_idx != macd_low_idx:
-                current_price = df.iloc[current_index]['close']
-                current_macd = df.iloc[current_index]['macd']
-
-                if (current_price < recent_data['close'].min() and
-                    current_macd > recent_data['macd'].min()):
+            if np.nanargmin(close_window) != np.nanargmin(macd_window):
+                if (current_price < np.nanmin(close_window) and
+                    current_macd > np.nanmin(macd_window)):
                     return True
 
         else:  # bearish
             # 顶背离：价格创新高，但MACD未创新高
-            price_high_idx = recent_data['close'].idxmax()
-            macd_high_idx = recent_data['macd'].idxmax()
-
-            if price_high_idx != macd_high_idx:
-                current_price = df.iloc[current_index]['close']
-                current_macd = df.iloc[current_index]['macd']
-
-                if (current_price > recent_data['close'].max() and
-                    current_macd < recent_data['macd'].max()):
+            if np.nanargmax(close_window) != np.nanargmax(macd_window):
+                if (current_price > np.nanmax(close_window) and
+                    current_macd < np.nanmax(macd_window)):
                     return True
 
         return False
@@ -49,6 +49,15 @@ class MomentumDipBuyingStrategy(BaseStrategy):
     - leverage_multiplier: 杠杆倍数 (默认2)
     """
 
+    __slots__ = (
+        'pump_threshold', 'dip_threshold', 'profit_target', 'position_1_ratio', 'leverage_multiplier',
+        'first_entry_price', 'first_position_size', 'second_entry_price', 'second_position_size',
+        'has_added_position', 'avg_entry_price', 'pump_detected', 'pump_start_price', '_pump_mask',
+        '_first_factor', '_add_factor',
+    )
+
+    FRAME_COLUMNS = ('price_change_5m', 'volume_spike')
+
     def __init__(self, config):
         super().__init__(config)
 
@@ -59,6 +68,10 @@ class MomentumDipBuyingStrategy(BaseStrategy):
         self.position_1_ratio = self.params.get('position_1_ratio', 0.5)  # 首仓50%
         self.leverage_multiplier = self.params.get('leverage_multiplier', 2)  # 2倍杠杆
 
+        # 首仓/加仓的资金占用系数 (仓位比例 × 杠杆), 计算仓位时直接乘以余额
+        self._first_factor = self.position_1_ratio * self.leverage_multiplier
+        self._add_factor = (1 - self.position_1_ratio) * self.leverage_multiplier
+
         # 状态变量
         self.first_entry_price = 0      # 首次入场价格
         self.first_position_size = 0    # 首次仓位大小
@@ -71,18 +84,20 @@ class MomentumDipBuyingStrategy(BaseStrategy):
         self.pump_detected = False
         self.pump_start_price = 0
 
-        logger.info(f"Momentum Dip Buying Strategy initialized - "
-                   f"Pump: {self.pump_threshold*100}%, "
-                   f"Dip: {self.dip_threshold*100}%, "
-                   f"Profit: {self.profit_target*100}%")
+        # bind_frame 预计算的每根K线5分钟涨幅是否超过阈值
+        self._pump_mask = np.zeros(0, dtype=bool)
+
+        logger.info("Momentum Dip Buying Strategy initialized - Pump: %s%%, Dip: %s%%, Profit: %s%%",
+                    self.pump_threshold * 100, self.dip_threshold * 100, self.profit_target * 100)
 
     def calculate_signals(self, df):
         """计算交易信号"""
-        # 计算5分钟价格变化
-        df['price_change_5m'] = df['close'].pct_change(5)
+        # 计算5分钟/1分钟价格变化 (在数组上按切片计算, 同 pct_change, 前几根为 NaN)
+        close = df['close'].to_numpy(dtype=np.float64)
+        df['price_change_5m'] = _pct_change(close, 5)
 
         # 计算1分钟价格变化（用于快速检测）
-        df['price_change_1m'] = df['close'].pct_change(1)
+        df['price_change_1m'] = _pct_change(close, 1)
 
         # 计算成交量（用于确认）
         df['volume_ma'] = df['volume'].rolling(window=20).mean()
@@ -104,19 +119,13 @@ class MomentumDipBuyingStrategy(BaseStrategy):
         if self.position is not None:
             return False
 
-        current = df.iloc[current_index]
-
-        # 检测5分钟涨幅
-        price_change_5m = current.get('price_change_5m', 0)
-
-        # 确认成交量配合
-        volume_confirmed = current.get('volume_spike', False)
-
-        # 快速涨幅超过阈值
-        if price_change_5m > self.pump_threshold:
-            # 最好有成交量确认，但不强制
-            logger.info(f"Pump detected! 5m change: {price_change_5m:.2%}, "
-                       f"Volume spike: {volume_confirmed}")
+        # 快速涨幅超过阈值 (bind_frame 预计算)
+        if self._pump_mask[current_index]:
+            price_change_5m = self._cols['price_change_5m'][current_index]
+            # 确认成交量配合: 最好有成交量确认，但不强制
+            volume_confirmed = self._cols['volume_spike'][current_index]
+            logger.info("Pump detected! 5m change: %.2f%%, "
+                       "Volume spike: %s", price_change_5m * 100, volume_confirmed)
             return True
 
         return False
@@ -130,8 +139,7 @@ class MomentumDipBuyingStrategy(BaseStrategy):
         if current_index < 5 or self.position != 'LONG':
             return False
 
-        current = df.iloc[current_index]
-        current_price = current['close']
+        current_price = self._close[current_index]
 
         # 计算平均持仓成本
         if self.has_added_position:
@@ -149,7 +157,7 @@ class MomentumDipBuyingStrategy(BaseStrategy):
 
         # 止盈条件：上涨5%
         if profit_pct >= self.profit_target:
-            logger.info(f"Take profit! Profit: {profit_pct:.2%} at price {current_price:.2f}")
+            logger.info("Take profit! Profit: %.2f%% at price %.2f", profit_pct * 100, current_price)
             return True
 
         # 止损条件：加仓后再次下跌3%
@@ -158,8 +166,8 @@ class MomentumDipBuyingStrategy(BaseStrategy):
             dip_from_second = (self.second_entry_price - current_price) / self.second_entry_price
 
             if dip_from_second > self.dip_threshold:
-                logger.info(f"Stop loss! Dip from 2nd entry: {dip_from_second:.2%} "
-                           f"at price {current_price:.2f}")
+                logger.info("Stop loss! Dip from 2nd entry: %.2f%% "
+                           "at price %.2f", dip_from_second * 100, current_price)
                 return True
 
         return False
@@ -176,6 +184,11 @@ class MomentumDipBuyingStrategy(BaseStrategy):
         """
         return False
 
+    def bind_frame(self, df):
+        """缓存列数组, 并整段预计算5分钟涨幅是否超过 pump_threshold"""
+        super().bind_frame(df)
+        self._pump_mask = self._cols['price_change_5m'] > self.pump_threshold
+
     def get_current_signal(self, df):
         """
         获取当前交易信号（增强版，支持加仓逻辑）
@@ -184,9 +197,10 @@ class MomentumDipBuyingStrategy(BaseStrategy):
             return 'HOLD'
 
         current_index = len(df) - 1
-        df = self.calculate_signals(df)
-        current = df.iloc[current_index]
-        current_price = current['close']
+        # 实盘循环和 update() 已计算过同一个 DataFrame 时不再重复计算
+        df = self.ensure_signals(df)
+        self.bind_frame(df)
+        current_price = self._close[current_index]
 
         # 如果没有持仓
         if self.position is None:
@@ -203,8 +217,8 @@ class MomentumDipBuyingStrategy(BaseStrategy):
 
                 # 回调超过3%，加仓
                 if dip_from_first > self.dip_threshold:
-                    logger.info(f"Add position! Dip from 1st entry: {dip_from_first:.2%} "
-                               f"at price {current_price:.2f}")
+                    logger.info("Add position! Dip from 1st entry: %.2f%% "
+                               "at price %.2f", dip_from_first * 100, current_price)
                     return 'ADD_LONG'  # 自定义信号：加仓
 
             # 检查是否需要平仓
@@ -225,17 +239,13 @@ class MomentumDipBuyingStrategy(BaseStrategy):
         首次开仓：使用50%资金，2倍杠杆
         加仓：使用剩余50%资金，2倍杠杆
         """
-        if not self.has_added_position:
-            # 首次开仓：50%资金 × 2倍杠杆
-            position_value = balance * self.position_1_ratio * self.leverage_multiplier
-        else:
-            # 加仓：剩余50%资金 × 2倍杠杆
-            position_value = balance * (1 - self.position_1_ratio) * self.leverage_multiplier
+        # 首次开仓：50%资金 × 2倍杠杆; 加仓：剩余50%资金 × 2倍杠杆
+        position_value = balance * (self._add_factor if self.has_added_position else self._first_factor)
 
         position_size = position_value / current_price
 
-        logger.info(f"Position size calculated: {position_size:.6f} "
-                   f"(Value: ${position_value:.2f}, Price: {current_price:.2f})")
+        logger.info("Position size calculated: %.6f "
+                   "(Value: $%.2f, Price: %.2f)", position_size, position_value, current_price)
 
         return position_size
 
@@ -252,8 +262,8 @@ class MomentumDipBuyingStrategy(BaseStrategy):
             self.position_size = position_size
             self.has_added_position = False
 
-            logger.info(f"First position opened: {position_type} at {entry_price:.2f}, "
-                       f"size: {position_size:.6f}")
+            logger.info("First position opened: %s at %.2f, "
+                       "size: %.6f", position_type, entry_price, position_size)
 
         # 如果是加仓
         elif self.position == 'LONG' and not self.has_added_position:
@@ -268,13 +278,13 @@ class MomentumDipBuyingStrategy(BaseStrategy):
             self.avg_entry_price = total_value / total_size
             self.position_size = total_size
 
-            logger.info(f"Position added at {entry_price:.2f}, size: {position_size:.6f}, "
-                       f"Avg price: {self.avg_entry_price:.2f}, Total size: {total_size:.6f}")
+            logger.info("Position added at %.2f, size: %.6f, "
+                       "Avg price: %.2f, Total size: %.6f", entry_price, position_size, self.avg_entry_price, total_size)
 
         # 如果是平仓
         elif position_type is None:
-            logger.info(f"Position closed. Entry: {self.entry_price:.2f}, "
-                       f"Avg: {self.avg_entry_price:.2f}")
+            logger.info("Position closed. Entry: %.2f, "
+                       "Avg: %.2f", self.entry_price, self.avg_entry_price)
             self.position = None
             self.entry_price = 0
             self.position_size = 0
@@ -297,3 +307,12 @@ class MomentumDipBuyingStrategy(BaseStrategy):
         self.pump_detected = False
         self.pump_start_price = 0
         logger.info("Momentum Dip Buying strategy reset")
+
+
+def _pct_change(values, periods):
+    """相对 periods 根之前的变化率 (同 Series.pct_change, 前 periods 个位置为 NaN)"""
+    change = np.full(len(values), np.nan)
+    if periods < len(values):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change[periods:] = values[periods:] / values[:-periods] - 1
+    return change
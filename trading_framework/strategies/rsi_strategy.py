@@ -4,6 +4,8 @@ RSI超买超卖策略 - 基于相对强弱指标
 """
 from .base_strategy import BaseStrategy
 from utils.indicators import Indicators
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,6 +27,10 @@ class RSIStrategy(BaseStrategy):
     - use_divergence: 是否使用背离信号 (默认False)
     """
 
+    vectorized = True
+    # 判断方法读取 calculate_signals 预计算的条件数组, 记录日志时从 bind_frame 缓存的 RSI 数组取值
+    FRAME_COLUMNS = ('rsi',)
+
     def __init__(self, config):
         super().__init__(config)
         self.rsi_period = self.params.get('rsi_period', 14)
@@ -32,8 +38,15 @@ class RSIStrategy(BaseStrategy):
         self.overbought = self.params.get('overbought', 70)
         self.use_divergence = self.params.get('use_divergence', False)
 
-        logger.info(f"RSI Strategy initialized - Period: {self.rsi_period}, "
-                   f"Oversold: {self.oversold}, Overbought: {self.overbought}")
+        # 最近一次 calculate_signals 预计算的各条件数组 (已排除预热期), 判断方法按下标读取
+        empty = np.zeros(0, dtype=bool)
+        self._oversold_breakout = self._oversold_reversal = empty
+        self._overbought_breakout = self._overbought_reversal = empty
+        self._overbought_hit = self._rsi_falling = empty
+        self._oversold_hit = self._rsi_rising = empty
+
+        logger.info("RSI Strategy initialized - Period: %s, Oversold: %s, Overbought: %s",
+                    self.rsi_period, self.oversold, self.overbought)
 
     def calculate_signals(self, df):
         """计算RSI和交易信号"""
@@ -51,6 +64,27 @@ class RSIStrategy(BaseStrategy):
         if self.use_divergence:
             df = self._calculate_divergence(df)
 
+        # 各判断条件在整段数组上一次算出 (前 rsi_period + 1 根K线不产生信号; NaN 参与的比较均为 False)
+        rsi = df['rsi'].to_numpy(dtype=np.float64, na_value=np.nan)
+        prev_rsi = np.full(len(rsi), np.nan)
+        prev_rsi[1:] = rsi[:-1]
+        warmed_up = np.arange(len(rsi)) >= self.rsi_period + 1
+
+        self._oversold_breakout = warmed_up & Indicators.crosses(rsi, self.oversold)[0]
+        self._oversold_reversal = warmed_up & (rsi < self.oversold + 5) & (rsi > prev_rsi)
+        self._overbought_breakout = warmed_up & Indicators.crosses(rsi, self.overbought)[1]
+        self._overbought_reversal = warmed_up & (rsi > self.overbought - 5) & (rsi < prev_rsi)
+        self._overbought_hit = warmed_up & (rsi >= self.overbought)
+        self._rsi_falling = warmed_up & (rsi < prev_rsi - 5)
+        self._oversold_hit = warmed_up & (rsi <= self.oversold)
+        self._rsi_rising = warmed_up & (rsi > prev_rsi + 5)
+
+        # 信号列 (与 should_* 判断一致)
+        df['enter_long'] = self._oversold_breakout | self._oversold_reversal
+        df['enter_short'] = self._overbought_breakout | self._overbought_reversal
+        df['exit_long'] = self._overbought_hit | self._rsi_falling
+        df['exit_short'] = self._oversold_hit | self._rsi_rising
+
         return df
 
     def should_enter_long(self, df, current_index):
@@ -59,26 +93,14 @@ class RSIStrategy(BaseStrategy):
         1. RSI从超卖区域(<30)向上突破
         2. RSI开始回升
         """
-        if current_index < self.rsi_period + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        current_rsi = current.get('rsi')
-        previous_rsi = previous.get('rsi')
-
-        if current_rsi is None or previous_rsi is None:
-            return False
-
         # 从超卖区域向上突破
-        if previous_rsi <= self.oversold and current_rsi > self.oversold:
-            logger.info(f"Long signal: RSI breakout from oversold at {current_rsi:.2f}")
+        if self._oversold_breakout[current_index]:
+            logger.info("Long signal: RSI breakout from oversold at %.2f", self._cols['rsi'][current_index])
             return True
 
         # RSI在超卖区域且开始回升
-        if current_rsi < self.oversold + 5 and current_rsi > previous_rsi:
-            logger.info(f"Long signal: RSI reversal from oversold at {current_rsi:.2f}")
+        if self._oversold_reversal[current_index]:
+            logger.info("Long signal: RSI reversal from oversold at %.2f", self._cols['rsi'][current_index])
             return True
 
         return False
@@ -89,26 +111,14 @@ class RSIStrategy(BaseStrategy):
         1. RSI从超买区域(>70)向下突破
         2. RSI开始回落
         """
-        if current_index < self.rsi_period + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        current_rsi = current.get('rsi')
-        previous_rsi = previous.get('rsi')
-
-        if current_rsi is None or previous_rsi is None:
-            return False
-
         # 从超买区域向下突破
-        if previous_rsi >= self.overbought and current_rsi < self.overbought:
-            logger.info(f"Short signal: RSI breakout from overbought at {current_rsi:.2f}")
+        if self._overbought_breakout[current_index]:
+            logger.info("Short signal: RSI breakout from overbought at %.2f", self._cols['rsi'][current_index])
             return True
 
         # RSI在超买区域且开始回落
-        if current_rsi > self.overbought - 5 and current_rsi < previous_rsi:
-            logger.info(f"Short signal: RSI reversal from overbought at {current_rsi:.2f}")
+        if self._overbought_reversal[current_index]:
+            logger.info("Short signal: RSI reversal from overbought at %.2f", self._cols['rsi'][current_index])
             return True
 
         return False
@@ -117,28 +127,16 @@ class RSIStrategy(BaseStrategy):
         """
         平多条件：
         1. RSI进入超买区域
-        2. RSI开始显著回落
+        2. RSI开始显著回落（下降超过5个点）
         """
-        if current_index < self.rsi_period + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        current_rsi = current.get('rsi')
-        previous_rsi = previous.get('rsi')
-
-        if current_rsi is None or previous_rsi is None:
-            return False
-
         # RSI进入超买区域
-        if current_rsi >= self.overbought:
-            logger.info(f"Exit long: RSI overbought at {current_rsi:.2f}")
+        if self._overbought_hit[current_index]:
+            logger.info("Exit long: RSI overbought at %.2f", self._cols['rsi'][current_index])
             return True
 
-        # RSI显著回落（下降超过5个点）
-        if current_rsi < previous_rsi - 5:
-            logger.info(f"Exit long: RSI falling at {current_rsi:.2f}")
+        # RSI显著回落
+        if self._rsi_falling[current_index]:
+            logger.info("Exit long: RSI falling at %.2f", self._cols['rsi'][current_index])
             return True
 
         return False
@@ -147,28 +145,16 @@ class RSIStrategy(BaseStrategy):
         """
         平空条件：
         1. RSI进入超卖区域
-        2. RSI开始显著回升
+        2. RSI开始显著回升（上升超过5个点）
         """
-        if current_index < self.rsi_period + 1:
-            return False
-
-        current = df.iloc[current_index]
-        previous = df.iloc[current_index - 1]
-
-        current_rsi = current.get('rsi')
-        previous_rsi = previous.get('rsi')
-
-        if current_rsi is None or previous_rsi is None:
-            return False
-
         # RSI进入超卖区域
-        if current_rsi <= self.oversold:
-            logger.info(f"Exit short: RSI oversold at {current_rsi:.2f}")
+        if self._oversold_hit[current_index]:
+            logger.info("Exit short: RSI oversold at %.2f", self._cols['rsi'][current_index])
             return True
 
-        # RSI显著回升（上升超过5个点）
-        if current_rsi > previous_rsi + 5:
-            logger.info(f"Exit short: RSI rising at {current_rsi:.2f}")
+        # RSI显著回升
+        if self._rsi_rising[current_index]:
+            logger.info("Exit short: RSI rising at %.2f", self._cols['rsi'][current_index])
             return True
 
         return False
@@ -183,20 +169,35 @@ class RSIStrategy(BaseStrategy):
         """
         window = 14
 
-        df['price_high'] = df['close'].rolling(window=window).max()
-        df['price_low'] = df['close'].rolling(window=window).min()
-        df['rsi_high'] = df['rsi'].rolling(window=window).max()
-        df['rsi_low'] = df['rsi'].rolling(window=window).min()
+        close = df['close'].to_numpy(dtype=np.float64)
+        rsi = df['rsi'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # 滚动最高/最低 (前 window - 1 根及窗口内含 NaN 时为 NaN, 同 rolling().max()/min())
+        price_high, price_low = _rolling_max_min(close, window)
+        rsi_high, rsi_low = _rolling_max_min(rsi, window)
 
-        # 检测背离（简化版）
-        df['bullish_divergence'] = (
-            (df['close'] == df['price_low']) &
-            (df['rsi'] > df['rsi_low'].shift(1))
-        )
+        # 检测背离（简化版）: 与前一根K线的 RSI 滚动极值比较
+        rsi_low_prev = np.full(len(rsi), np.nan)
+        rsi_high_prev = np.full(len(rsi), np.nan)
+        rsi_low_prev[1:] = rsi_low[:-1]
+        rsi_high_prev[1:] = rsi_high[:-1]
 
-        df['bearish_divergence'] = (
-            (df['close'] == df['price_high']) &
-            (df['rsi'] < df['rsi_high'].shift(1))
-        )
+        df['price_high'] = price_high
+        df['price_low'] = price_low
+        df['rsi_high'] = rsi_high
+        df['rsi_low'] = rsi_low
+        df['bullish_divergence'] = (close == price_low) & (rsi > rsi_low_prev)
+        df['bearish_divergence'] = (close == price_high) & (rsi < rsi_high_prev)
 
         return df
+
+
+def _rolling_max_min(values, window):
+    """在滑动窗口视图上一次归约出滚动最大/最小值, 不足一个窗口处为 NaN"""
+    rolling_max = np.full(len(values), np.nan)
+    rolling_min = np.full(len(values), np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window)
+        rolling_max[window - 1:] = windows.max(axis=1)
+        rolling_min[window - 1:] = windows.min(axis=1)
+    return rolling_max, rolling_min
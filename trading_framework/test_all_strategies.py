@@ -25,29 +25,15 @@ strategies_info = [
     ("突破回踩策略", "BreakoutPullbackStrategy"),
 ]
 
+import strategies
+
 imported_strategies = {}
 failed_imports = []
 
 for name_cn, class_name in strategies_info:
     try:
-        if class_name == "MACrossoverStrategy":
-            from strategies.ma_crossover_strategy import MACrossoverStrategy
-            imported_strategies[name_cn] = MACrossoverStrategy
-        elif class_name == "RSIStrategy":
-            from strategies.rsi_strategy import RSIStrategy
-            imported_strategies[name_cn] = RSIStrategy
-        elif class_name == "BollingerBandsStrategy":
-            from strategies.bollinger_bands_strategy import BollingerBandsStrategy
-            imported_strategies[name_cn] = BollingerBandsStrategy
-        elif class_name == "GridTradingStrategy":
-            from strategies.grid_trading_strategy import GridTradingStrategy
-            imported_strategies[name_cn] = GridTradingStrategy
-        elif class_name == "MACDStrategy":
-            from strategies.macd_strategy import MACDStrategy
-            imported_strategies[name_cn] = MACDStrategy
-        elif class_name == "BreakoutPullbackStrategy":
-            from strategies.breakout_pullback_strategy import BreakoutPullbackStrategy
-            imported_strategies[name_cn] = BreakoutPullbackStrategy
+        # 策略包按类名懒加载对应模块
+        imported_strategies[name_cn] = getattr(strategies, class_name)
 
         print(f"✓ {name_cn} ({class_name})")
     except Exception as e:
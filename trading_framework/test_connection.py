@@ -3,6 +3,7 @@
 网络连接测试工具 - 测试是否能正常访问 Binance API
 """
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
@@ -15,8 +16,8 @@ print()
 # 测试导入
 print("1. 测试模块导入...")
 try:
-    import yaml
     from binance.client import Client
+    from utils.config_loader import load_config
     from utils.data_fetcher import DataFetcher
     print("   ✓ 所有模块导入成功")
 except ImportError as e:
@@ -29,8 +30,7 @@ print()
 # 加载配置
 print("2. 加载配置文件...")
 try:
-    with open('config/config.yaml', 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    config = load_config('config/config.yaml')
     print("   ✓ 配置文件加载成功")
 
     network_config = config.get('network', {})
@@ -65,10 +65,24 @@ except Exception as e:
 
 print()
 
+# 以下三个请求互不依赖, 同时发出 (共用 DataFetcher 的连接池), 总耗时取决于最慢的一个; 结果仍按步骤顺序输出
+symbol = config['trading']['symbol']
+executor = ThreadPoolExecutor(max_workers=3)
+server_time_future = executor.submit(data_fetcher.client.get_server_time)
+price_future = executor.submit(data_fetcher.get_current_price, symbol)
+klines_future = executor.submit(
+    data_fetcher.get_historical_klines,
+    symbol=symbol,
+    interval='1h',
+    start_str='2 days ago UTC',
+    limit=100
+)
+executor.shutdown(wait=False)
+
 # 测试获取服务器时间
 print("4. 测试获取服务器时间...")
 try:
-    server_time = data_fetcher.client.get_server_time()
+    server_time = server_time_future.result()
     import datetime
     server_dt = datetime.datetime.fromtimestamp(server_time['serverTime'] / 1000)
     print(f"   ✓ 服务器时间: {server_dt}")
@@ -102,9 +116,8 @@ print()
 
 # 测试获取市场数据
 print("5. 测试获取市场数据...")
-symbol = config['trading']['symbol']
 try:
-    price = data_fetcher.get_current_price(symbol)
+    price = price_future.result()
     print(f"   ✓ {symbol} 当前价格: ${price:,.2f}")
 except Exception as e:
     print(f"   ✗ 获取价格失败: {e}")
@@ -115,12 +128,7 @@ print()
 # 测试获取历史K线
 print("6. 测试获取历史K线（最近100根）...")
 try:
-    df = data_fetcher.get_historical_klines(
-        symbol=symbol,
-        interval='1h',
-        start_str='2 days ago UTC',
-        limit=100
-    )
+    df = klines_future.result()
     print(f"   ✓ 获取成功: {len(df)} 根K线")
     print(f"   时间范围: {df.index[0]} 至 {df.index[-1]}")
 except Exception as e:
@@ -3,6 +3,8 @@
 代理测试工具 - 测试不同代理端口的连接
 """
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
 print("=" * 70)
@@ -19,15 +21,15 @@ common_proxies = [
     ("Clash Verge", "http://127.0.0.1:7897"),
 ]
 
-print("正在测试常见代理端口...\n")
 
-working_proxies = []
+def probe(proxy):
+    """
+    通过代理访问 Binance ping 接口
 
-for name, proxy in common_proxies:
+    Returns:
+        tuple: (是否可用, 结果说明)
+    """
     try:
-        print(f"测试 {name:15s} ({proxy})... ", end="", flush=True)
-
-        # 测试连接
         response = requests.get(
             "https://api.binance.com/api/v3/ping",
             proxies={"http": proxy, "https": proxy},
@@ -35,19 +37,33 @@ for name, proxy in common_proxies:
         )
 
         if response.status_code == 200:
-            print("✓ 连接成功！")
-            working_proxies.append((name, proxy))
-        else:
-            print(f"✗ 失败 (状态码: {response.status_code})")
+            return True, "✓ 连接成功！"
+        return False, f"✗ 失败 (状态码: {response.status_code})"
 
     except requests.exceptions.ProxyError:
-        print("✗ 代理未运行")
+        return False, "✗ 代理未运行"
     except requests.exceptions.Timeout:
-        print("✗ 连接超时")
+        return False, "✗ 连接超时"
     except requests.exceptions.ConnectionError:
-        print("✗ 连接被拒绝")
+        return False, "✗ 连接被拒绝"
     except Exception as e:
-        print(f"✗ 错误: {type(e).__name__}")
+        return False, f"✗ 错误: {type(e).__name__}"
+
+
+print("正在测试常见代理端口...\n")
+
+working_proxies = []
+
+# 所有代理同时测试, 总耗时取决于最慢的一个 (而不是各自超时之和); 结果仍按列表顺序输出
+with ThreadPoolExecutor(max_workers=len(common_proxies)) as executor:
+    futures = [executor.submit(probe, proxy) for _, proxy in common_proxies]
+
+    for (name, proxy), future in zip(common_proxies, futures):
+        print(f"测试 {name:15s} ({proxy})... ", end="", flush=True)
+        ok, message = future.result()
+        print(message)
+        if ok:
+            working_proxies.append((name, proxy))
 
 print()
 print("=" * 70)
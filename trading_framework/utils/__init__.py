@@ -1,5 +1,25 @@
-from .data_fetcher import DataFetcher
-from .indicators import Indicators
-from .logger import setup_logger
+from importlib import import_module
 
-__all__ = ['DataFetcher', 'Indicators', 'setup_logger']
+# 按需导入 (PEP 562): 访问 utils.Xxx 时才加载对应模块, 导入 utils.logger 等轻量子模块时
+# 不再连带加载 binance 客户端和 numpy/pandas
+_LAZY_IMPORTS = {
+    'load_config': '.config_loader',
+    'DataFetcher': '.data_fetcher',
+    'Indicators': '.indicators',
+    'setup_logger': '.logger',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
+
+
+__all__ = ['DataFetcher', 'Indicators', 'setup_logger', 'load_config']
@@ -0,0 +1,45 @@
+"""
+Numba 兼容层 - 安装了 numba 时使用 njit 编译, 否则退化为普通 Python 函数
+"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """no-op 装饰器, 兼容 @njit 与 @njit(...) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+# 签名模板中的一维连续数组占位符: (可写, 只读) 两种 numba 类型
+# pandas 的 to_numpy 可能返回只读数组, numba 视为不同类型, 两种都需要编译
+_ARRAY_TYPES = {
+    'f8': ('float64[::1]', "Array(float64, 1, 'C', readonly=True)"),
+    'b1': ('boolean[::1]', "Array(boolean, 1, 'C', readonly=True)"),
+}
+
+
+def precompile(func, signature):
+    """
+    按显式签名提前编译 njit 函数 (cache=True 时直接加载磁盘缓存), 避免首次调用计入编译耗时
+
+    签名模板中的 {f8} / {b1} 展开为一维连续数组, 可写和只读各编译一份; 与之不同的参数类型
+    仍在调用时按需编译. 未安装 numba 时不做任何事
+
+    Args:
+        func: njit 装饰后的函数
+        signature: 参数类型模板, 如 '({f8}, int64)'
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    for readonly in (False, True):
+        func.compile(signature.format(**{name: types[readonly] for name, types in _ARRAY_TYPES.items()}))
+
+
+__all__ = ['njit', 'precompile', 'NUMBA_AVAILABLE']
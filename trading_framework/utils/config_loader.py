@@ -0,0 +1,24 @@
+"""
+配置加载模块 - 读取 YAML 配置文件
+"""
+import yaml
+
+# 优先使用 libyaml 的 C 实现 (约快 10 倍), 未编译 libyaml 时退回纯 Python 解析器
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+def load_config(config_path='config/config.yaml'):
+    """
+    加载 YAML 配置文件
+
+    Args:
+        config_path: 配置文件路径
+
+    Returns:
+        dict: 配置字典
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=SafeLoader)
@@ -1,18 +1,52 @@
 """
 数据获取模块 - 使用 python-binance 获取市场数据
 """
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from binance.client import Client
+from binance.helpers import convert_ts_str, interval_to_milliseconds
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 import logging
 
+from .rate_limiter import TokenBucket
+
 logger = logging.getLogger(__name__)
 
+# 现货K线接口单次请求最多返回的K线数
+_KLINES_PAGE_LIMIT = 1000
+
+# 各接口的请求权重 (币安按 IP 统计每分钟的权重总和, 超出后返回 429)
+_REQUEST_WEIGHTS = {
+    'klines': 2,
+    'ticker_price': 2,
+    'account': 20,
+    'futures_ticker_price': 1,
+    'futures_account': 5,
+    'futures_position': 5,
+}
+
+
+def _futures_klines_weight(limit):
+    """期货K线接口的请求权重随 limit 增加"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
 
 class DataFetcher:
     """币安数据获取器"""
 
-    def __init__(self, api_key=None, api_secret=None, testnet=False, proxy=None, timeout=30):
+    def __init__(self, api_key=None, api_secret=None, testnet=False, proxy=None, timeout=30,
+                 cache_dir=None, dtype_backend=None, weight_per_minute=1200):
         """
         初始化数据获取器
 
@@ -22,6 +56,9 @@ class DataFetcher:
             testnet: 是否使用测试网
             proxy: 代理地址，如 'http://127.0.0.1:7890' (可选)
             timeout: 连接超时时间(秒)，默认30秒
+            cache_dir: 历史K线本地缓存目录 (可选, Parquet 格式; 为None时不缓存)
+            dtype_backend: 历史K线数值列的存储后端 (可选, 'pyarrow' 使用 Arrow 列存储; 为None时使用 numpy)
+            weight_per_minute: 客户端每分钟允许的请求权重 (默认1200), 所有请求共用一个令牌桶
         """
         # 构建请求参数
         requests_params = {'timeout': timeout}
@@ -32,7 +69,7 @@ class DataFetcher:
                 'http': proxy,
                 'https': proxy
             }
-            logger.info(f"Using proxy: {proxy}")
+            logger.info("Using proxy: %s", proxy)
 
         self.client = Client(
             api_key,
@@ -40,7 +77,34 @@ class DataFetcher:
             testnet=testnet,
             requests_params=requests_params
         )
-        logger.info(f"DataFetcher initialized (testnet={testnet}, timeout={timeout}s)")
+        self._configure_session(self.client.session)
+        self.cache_dir = cache_dir
+        self.dtype_backend = dtype_backend
+        # 请求前按接口权重取令牌, 并发分页等突发请求在本地排队而不是触发 429 后长时间退避
+        self._bucket = TokenBucket(rate=weight_per_minute / 60, capacity=weight_per_minute)
+        # 已解析的日期字符串 -> 毫秒时间戳, 批量获取多个交易对时同一日期只解析一次
+        self._ts_cache = {}
+        logger.info("DataFetcher initialized (testnet=%s, timeout=%ss)", testnet, timeout)
+
+    @staticmethod
+    def _configure_session(session):
+        """
+        为客户端的 requests.Session 挂载连接池和重试策略
+
+        python-binance 所有 REST 请求都经过同一个 Session, 连接保持复用; 这里扩大连接池,
+        并对 GET 请求在连接失败、限频 (429, 遵循 Retry-After) 和 5xx 时自动重试.
+        下单/撤单等非 GET 请求不重试, 避免重复提交
+        """
+        retry = Retry(
+            total=3,
+            backoff_factor=0.25,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
 
     def get_historical_klines(self, symbol, interval, start_str, end_str=None, limit=1000):
         """
@@ -56,9 +120,16 @@ class DataFetcher:
         Returns:
             pandas.DataFrame: K线数据
         """
+        cache_path = self._kline_cache_path(symbol, interval, start_str, end_str)
+        df = self._read_kline_cache(cache_path)
+        if df is not None:
+            return self._apply_dtype_backend(df)
+
         try:
-            logger.info(f"Fetching historical klines: {symbol} {interval} from {start_str}")
+            logger.info("Fetching historical klines: %s %s from %s", symbol, interval, start_str)
 
+            # python-binance 内部逐页请求, 另有一次查询最早K线时间的请求, 按两次K线请求计
+            self._bucket.acquire(2 * _REQUEST_WEIGHTS['klines'])
             klines = self.client.get_historical_klines(
                 symbol=symbol,
                 interval=interval,
@@ -68,11 +139,71 @@ class DataFetcher:
             )
 
             df = self._klines_to_dataframe(klines)
-            logger.info(f"Successfully fetched {len(df)} klines")
-            return df
+            logger.info("Successfully fetched %d klines", len(df))
+
+            if cache_path is not None:
+                self._write_kline_cache(df, cache_path)
+            return self._apply_dtype_backend(df)
 
         except Exception as e:
-            logger.error(f"Error fetching historical klines: {e}")
+            logger.error("Error fetching historical klines: %s", e)
+            raise
+
+    def get_historical_klines_parallel(self, symbol, interval, start_str, end_str=None, max_workers=4):
+        """
+        并发分页获取区间内的全部历史K线数据
+
+        单次请求最多返回 1000 根K线, python-binance 按页顺序请求, 每页都要等上一页返回.
+        这里先按K线周期算出各页的起止时间, 再用线程池同时请求各页, 按时间顺序拼接.
+        月线等周期不固定的K线无法预先分页, 退回 get_historical_klines
+
+        Args:
+            symbol: 交易对，如 'BTCUSDT'
+            interval: K线周期，如 '1m', '1h'
+            start_str: 开始时间，如 '2024-01-01' 或 '1 month ago UTC'
+            end_str: 结束时间 (可选, 默认到当前时间)
+            max_workers: 同时进行的请求数 (默认4)
+
+        Returns:
+            pandas.DataFrame: K线数据
+        """
+        interval_ms = interval_to_milliseconds(interval)
+        if interval_ms is None:
+            return self.get_historical_klines(symbol, interval, start_str, end_str)
+
+        cache_path = self._kline_cache_path(symbol, interval, start_str, end_str)
+        df = self._read_kline_cache(cache_path)
+        if df is not None:
+            return self._apply_dtype_backend(df)
+
+        try:
+            start_ts = convert_ts_str(start_str)
+            end_ts = convert_ts_str(end_str) if end_str is not None else int(time.time() * 1000)
+
+            # 每页覆盖 1000 根K线的开盘时间区间 [page_start, page_end] (endTime 含端点)
+            page_ms = _KLINES_PAGE_LIMIT * interval_ms
+            pages = [(page_start, min(page_start + page_ms - 1, end_ts))
+                     for page_start in range(start_ts, end_ts + 1, page_ms)]
+            logger.info("Fetching historical klines: %s %s from %s (%d pages, %d workers)",
+                        symbol, interval, start_str, len(pages), max_workers)
+
+            def fetch_page(page):
+                self._bucket.acquire(_REQUEST_WEIGHTS['klines'])
+                return self.client.get_klines(symbol=symbol, interval=interval, startTime=page[0],
+                                              endTime=page[1], limit=_KLINES_PAGE_LIMIT)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                klines = [kline for page in executor.map(fetch_page, pages) for kline in page]
+
+            df = self._klines_to_dataframe(klines)
+            logger.info("Successfully fetched %d klines", len(df))
+
+            if cache_path is not None:
+                self._write_kline_cache(df, cache_path)
+            return self._apply_dtype_backend(df)
+
+        except Exception as e:
+            logger.error("Error fetching historical klines: %s", e)
             raise
 
     def get_futures_klines(self, symbol, interval, start_str=None, end_str=None, limit=500):
@@ -89,8 +220,15 @@ class DataFetcher:
         Returns:
             pandas.DataFrame: K线数据
         """
+        # 单次请求最多返回 limit 根, 缓存键需包含 limit
+        cache_path = self._kline_cache_path(symbol, interval, start_str, end_str,
+                                            prefix=f"futures_{limit}_")
+        df = self._read_kline_cache(cache_path)
+        if df is not None:
+            return df
+
         try:
-            logger.info(f"Fetching futures klines: {symbol} {interval}")
+            logger.info("Fetching futures klines: %s %s", symbol, interval)
 
             params = {
                 'symbol': symbol,
@@ -103,14 +241,18 @@ class DataFetcher:
             if end_str:
                 params['endTime'] = self._date_to_timestamp(end_str)
 
+            self._bucket.acquire(_futures_klines_weight(limit))
             klines = self.client.futures_klines(**params)
             df = self._klines_to_dataframe(klines)
 
-            logger.info(f"Successfully fetched {len(df)} futures klines")
+            logger.info("Successfully fetched %d futures klines", len(df))
+
+            if cache_path is not None:
+                self._write_kline_cache(df, cache_path)
             return df
 
         except Exception as e:
-            logger.error(f"Error fetching futures klines: {e}")
+            logger.error("Error fetching futures klines: %s", e)
             raise
 
     def get_current_price(self, symbol):
@@ -124,10 +266,11 @@ class DataFetcher:
             float: 当前价格
         """
         try:
+            self._bucket.acquire(_REQUEST_WEIGHTS['ticker_price'])
             ticker = self.client.get_symbol_ticker(symbol=symbol)
             return float(ticker['price'])
         except Exception as e:
-            logger.error(f"Error fetching current price: {e}")
+            logger.error("Error fetching current price: %s", e)
             raise
 
     def get_futures_current_price(self, symbol):
@@ -141,10 +284,11 @@ class DataFetcher:
             float: 当前价格
         """
         try:
+            self._bucket.acquire(_REQUEST_WEIGHTS['futures_ticker_price'])
             ticker = self.client.futures_symbol_ticker(symbol=symbol)
             return float(ticker['price'])
         except Exception as e:
-            logger.error(f"Error fetching futures price: {e}")
+            logger.error("Error fetching futures price: %s", e)
             raise
 
     def get_account_balance(self):
@@ -155,6 +299,7 @@ class DataFetcher:
             dict: 账户余额信息
         """
         try:
+            self._bucket.acquire(_REQUEST_WEIGHTS['account'])
             account = self.client.get_account()
             balances = {}
             for balance in account['balances']:
@@ -166,7 +311,7 @@ class DataFetcher:
                     }
             return balances
         except Exception as e:
-            logger.error(f"Error fetching account balance: {e}")
+            logger.error("Error fetching account balance: %s", e)
             raise
 
     def get_futures_account_balance(self):
@@ -177,6 +322,7 @@ class DataFetcher:
             dict: 账户余额信息
         """
         try:
+            self._bucket.acquire(_REQUEST_WEIGHTS['futures_account'])
             account = self.client.futures_account()
             balances = {}
             for balance in account['assets']:
@@ -188,7 +334,7 @@ class DataFetcher:
                     }
             return balances
         except Exception as e:
-            logger.error(f"Error fetching futures balance: {e}")
+            logger.error("Error fetching futures balance: %s", e)
             raise
 
     def get_futures_position(self, symbol=None):
@@ -202,6 +348,7 @@ class DataFetcher:
             list or dict: 持仓信息
         """
         try:
+            self._bucket.acquire(_REQUEST_WEIGHTS['futures_position'])
             positions = self.client.futures_position_information(symbol=symbol)
 
             # 过滤出有持仓的
@@ -220,9 +367,65 @@ class DataFetcher:
             return active_positions if symbol is None else (active_positions[0] if active_positions else None)
 
         except Exception as e:
-            logger.error(f"Error fetching position: {e}")
+            logger.error("Error fetching position: %s", e)
             raise
 
+    def _kline_cache_path(self, symbol, interval, start_str, end_str, prefix=''):
+        """
+        历史K线缓存文件路径
+
+        只缓存起止时间都是固定日期 (YYYY-MM-DD) 且结束日期早于今天的数据;
+        相对时间 ('1 month ago UTC') 或包含未收盘K线的区间返回None, 每次重新获取
+
+        Args:
+            prefix: 文件名前缀, 区分现货与期货等不同来源
+
+        Returns:
+            str or None: 缓存文件路径
+        """
+        if not self.cache_dir or end_str is None:
+            return None
+
+        try:
+            datetime.strptime(start_str, '%Y-%m-%d')
+            end_date = datetime.strptime(end_str, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return None
+
+        if end_date.date() >= datetime.now().date():
+            return None
+
+        return os.path.join(self.cache_dir, f"{prefix}{symbol}_{interval}_{start_str}_{end_str}.parquet")
+
+    def _read_kline_cache(self, cache_path):
+        """读取K线缓存, 无缓存或读取失败时返回None (读取失败只记录警告)"""
+        if cache_path is None or not os.path.exists(cache_path):
+            return None
+        try:
+            df = pd.read_parquet(cache_path, engine='pyarrow', memory_map=True)
+            logger.info("Loaded %d klines from cache: %s", len(df), cache_path)
+            return df
+        except Exception as e:
+            logger.warning("Failed to read kline cache %s: %s", cache_path, e)
+            return None
+
+    def _write_kline_cache(self, df, cache_path):
+        """写入K线缓存 (需要 pyarrow, 写入失败只记录警告)"""
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            df.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+            logger.info("Saved klines to cache: %s", cache_path)
+        except Exception as e:
+            logger.warning("Failed to write kline cache %s: %s", cache_path, e)
+
+    def _apply_dtype_backend(self, df):
+        """按 dtype_backend 转换历史K线的数值列 (转换一次, 之后的指标计算沿用 Arrow 列)"""
+        if self.dtype_backend != 'pyarrow':
+            return df
+        return df.astype({
+            col: f'{dtype}[pyarrow]' for col, dtype in df.dtypes.items() if dtype.kind in 'if'
+        })
+
     def _klines_to_dataframe(self, klines):
         """
         将K线数据转换为DataFrame
@@ -233,23 +436,22 @@ class DataFetcher:
         Returns:
             pandas.DataFrame: 格式化的K线数据
         """
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-            'taker_buy_quote', 'ignore'
-        ])
-
-        # 转换数据类型
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df['close_time'] = pd.to_datetime(df['close_time'], unit='ms')
-
-        numeric_columns = ['open', 'high', 'low', 'close', 'volume',
-                          'quote_volume', 'taker_buy_base', 'taker_buy_quote']
-        df[numeric_columns] = df[numeric_columns].astype(float)
-        df['trades'] = df['trades'].astype(int)
-
-        # 设置索引
-        df.set_index('timestamp', inplace=True)
+        # 按列从对象数组直接转成目标类型, 不再先构造字符串 DataFrame 再整体 astype (未使用的 ignore 列不保留)
+        arr = np.asarray(klines, dtype=object) if len(klines) else np.empty((0, 12), dtype=object)
+
+        numeric = arr[:, [1, 2, 3, 4, 5, 7, 9, 10]].astype(np.float64)
+        df = pd.DataFrame({
+            'open': numeric[:, 0],
+            'high': numeric[:, 1],
+            'low': numeric[:, 2],
+            'close': numeric[:, 3],
+            'volume': numeric[:, 4],
+            'close_time': pd.to_datetime(arr[:, 6].astype(np.int64), unit='ms'),
+            'quote_volume': numeric[:, 5],
+            'trades': arr[:, 8].astype(np.int64),
+            'taker_buy_base': numeric[:, 6],
+            'taker_buy_quote': numeric[:, 7],
+        }, index=pd.DatetimeIndex(pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms'), name='timestamp'))
 
         return df
 
@@ -258,12 +460,16 @@ class DataFetcher:
         将日期字符串转换为时间戳(毫秒)
 
         Args:
-            date_str: 日期字符串
+            date_str: 日期字符串 (已是毫秒时间戳时原样返回)
 
         Returns:
             int: 时间戳(毫秒)
         """
-        if isinstance(date_str, str):
+        if not isinstance(date_str, str):
+            return date_str
+
+        ts = self._ts_cache.get(date_str)
+        if ts is None:
             dt = datetime.strptime(date_str, '%Y-%m-%d')
-            return int(dt.timestamp() * 1000)
-        return date_str
+            ts = self._ts_cache[date_str] = int(dt.timestamp() * 1000)
+        return ts
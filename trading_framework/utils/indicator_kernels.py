@@ -0,0 +1,331 @@
+"""
+指标计算内核 - 单次遍历的滚动统计, 使用 numba 编译 (未安装 numba 时以纯 Python 运行)
+"""
+import numpy as np
+
+from ._njit import njit, precompile
+
+
+@njit(cache=True)
+def rolling_mean_std(values, period):
+    """
+    单次遍历同时计算滚动均值和样本标准差 (ddof=1, 定义与 pandas rolling().std() 相同)
+
+    滑动窗口上用 Welford 增量公式维护均值和平方差和, 每满一个周期按窗口重新精确计算一次,
+    避免长序列上累积舍入误差 (与精确值相差约 1e-12 相对误差). 结果与 pandas 并非逐位一致:
+    pandas 的滚动累加误差在价格大幅变化后可达约 2e-8 相对误差. 前 period - 1 个位置为 NaN
+
+    Args:
+        values: float64 数组 (不含 NaN)
+        period: 窗口长度
+
+    Returns:
+        tuple: (mean, std) 数组
+    """
+    n = values.shape[0]
+    mean_out = np.full(n, np.nan)
+    std_out = np.full(n, np.nan)
+    if period < 1 or n < period:
+        return mean_out, std_out
+
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        x = values[i]
+        if i < period:
+            # 窗口未满: 逐个加入
+            delta = x - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x - mean)
+        elif (i - period + 1) % period == 0:
+            # 每隔 period 根按当前窗口重新计算, 消除累积误差
+            mean = 0.0
+            for j in range(i - period + 1, i + 1):
+                mean += values[j]
+            mean /= period
+            m2 = 0.0
+            for j in range(i - period + 1, i + 1):
+                d = values[j] - mean
+                m2 += d * d
+        else:
+            # 窗口已满: 加入 x, 移出 y
+            y = values[i - period]
+            new_mean = mean + (x - y) / period
+            m2 += (x - y) * (x - new_mean + y - mean)
+            mean = new_mean
+
+        if i >= period - 1:
+            mean_out[i] = mean
+            if period > 1:
+                std_out[i] = np.sqrt(max(m2, 0.0) / (period - 1))
+
+    return mean_out, std_out
+
+
+@njit(cache=True)
+def average_true_range(high, low, close, period):
+    """
+    单次遍历计算真实波幅及其滚动均值 (与 Indicators.atr 的 pandas 实现一致)
+
+    第一根K线的真实波幅为 high - low; 滚动和每满一个周期按窗口重新精确计算一次.
+    前 period - 1 个位置为 NaN
+
+    Args:
+        high: 最高价 float64 数组 (不含 NaN)
+        low: 最低价 float64 数组
+        close: 收盘价 float64 数组
+        period: 窗口长度
+
+    Returns:
+        numpy.ndarray: ATR 数组
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    if period < 1 or n < period:
+        return out
+
+    tr = np.empty(n)
+    tr[0] = high[0] - low[0]
+    for i in range(1, n):
+        prev_close = close[i - 1]
+        tr[i] = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+
+    total = 0.0
+    for i in range(n):
+        if i >= period and (i - period + 1) % period == 0:
+            # 每隔 period 根按当前窗口重新求和, 消除累积误差
+            total = 0.0
+            for j in range(i - period + 1, i + 1):
+                total += tr[j]
+        else:
+            total += tr[i]
+            if i >= period:
+                total -= tr[i - period]
+
+        if i >= period - 1:
+            out[i] = total / period
+
+    return out
+
+
+@njit(cache=True)
+def rolling_means(values, periods):
+    """
+    单次遍历同时计算多个窗口的滚动均值 (逐位与 pandas rolling(period).mean() 一致)
+
+    沿用 pandas 的算法: 加入/移出窗口分别做 Kahan 补偿求和; 连续相同值填满窗口时直接取该值;
+    窗口内全为非负 (非正) 数时, 舍入得到的负 (正) 均值截为 0. NaN 不计入样本数,
+    样本数不足窗口长度的位置为 NaN
+
+    Args:
+        values: float64 数组
+        periods: int64 窗口长度数组 (均 >= 1)
+
+    Returns:
+        numpy.ndarray: 形状为 (len(periods), len(values)) 的均值数组
+    """
+    n = values.shape[0]
+    k = periods.shape[0]
+    out = np.full((k, n), np.nan)
+
+    nobs = np.zeros(k, dtype=np.int64)
+    neg_ct = np.zeros(k, dtype=np.int64)
+    sum_x = np.zeros(k)
+    comp_add = np.zeros(k)
+    comp_remove = np.zeros(k)
+    # 连续相同值的个数只取决于依次加入的值, 各窗口共用
+    same_ct = 0
+    prev_value = values[0] if n > 0 else np.nan
+
+    for i in range(n):
+        val = values[i]
+        for w in range(k):
+            period = periods[w]
+
+            # 移出窗口的值
+            if i >= period:
+                old = values[i - period]
+                if not np.isnan(old):
+                    nobs[w] -= 1
+                    y = -old - comp_remove[w]
+                    t = sum_x[w] + y
+                    comp_remove[w] = t - sum_x[w] - y
+                    sum_x[w] = t
+                    if np.signbit(old):
+                        neg_ct[w] -= 1
+
+            # 加入当前值
+            if not np.isnan(val):
+                nobs[w] += 1
+                y = val - comp_add[w]
+                t = sum_x[w] + y
+                comp_add[w] = t - sum_x[w] - y
+                sum_x[w] = t
+                if np.signbit(val):
+                    neg_ct[w] += 1
+
+        if not np.isnan(val):
+            if val == prev_value:
+                same_ct += 1
+            else:
+                same_ct = 1
+            prev_value = val
+
+        for w in range(k):
+            count = nobs[w]
+            if count >= periods[w] and count > 0:
+                result = sum_x[w] / count
+                if same_ct >= count:
+                    result = prev_value
+                elif neg_ct[w] == 0 and result < 0:
+                    result = 0.0
+                elif neg_ct[w] == count and result > 0:
+                    result = 0.0
+                out[w, i] = result
+
+    return out
+
+
+@njit(cache=True)
+def exponential_mean(values, span):
+    """
+    单次遍历计算指数移动平均 (逐位与 pandas ewm(span=span, adjust=False).mean() 一致)
+
+    沿用 pandas 的递推: alpha = 1 / (1 + (span - 1) / 2), 每根K线旧权重乘以 1 - alpha 后与新值加权平均;
+    NaN 处沿用上一个均值 (旧权重照常衰减), 第一个非 NaN 值之前为 NaN
+
+    Args:
+        values: float64 数组
+        span: 周期 (>= 1)
+
+    Returns:
+        numpy.ndarray: EMA 数组
+    """
+    n = values.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+    old_wt_factor = 1.0 - alpha
+    weighted = values[0]
+    old_wt = 1.0
+    out[0] = weighted
+    for i in range(1, n):
+        cur = values[i]
+        if not np.isnan(weighted):
+            old_wt *= old_wt_factor
+            if not np.isnan(cur):
+                if weighted != cur:
+                    weighted = old_wt * weighted + alpha * cur
+                    weighted /= old_wt + alpha
+                old_wt = 1.0
+        elif not np.isnan(cur):
+            weighted = cur
+        out[i] = weighted
+
+    return out
+
+
+@njit(cache=True)
+def rolling_low_high(low, high, period):
+    """
+    单次遍历同时计算最低价的滚动最小值和最高价的滚动最大值 (与 pandas rolling().min()/max() 一致)
+
+    两个单调队列 (长度为 period 的环形下标数组) 分别维护窗口内的最小/最大值, 每根K线均摊 O(1).
+    前 period - 1 个位置及窗口内含 NaN 的位置为 NaN
+
+    Args:
+        low: 最低价 float64 数组
+        high: 最高价 float64 数组
+        period: 窗口长度 (>= 1)
+
+    Returns:
+        tuple: (lowest_low, highest_high) 数组
+    """
+    n = low.shape[0]
+    lowest = np.full(n, np.nan)
+    highest = np.full(n, np.nan)
+    if period < 1:
+        return lowest, highest
+
+    min_idx = np.empty(period, dtype=np.int64)
+    max_idx = np.empty(period, dtype=np.int64)
+    min_head = min_len = 0
+    max_head = max_len = 0
+    # 最近一个 NaN 的下标, 窗口内含 NaN 时不输出
+    last_nan_low = -1
+    last_nan_high = -1
+
+    for i in range(n):
+        # 移出窗口外的下标
+        if min_len > 0 and min_idx[min_head] <= i - period:
+            min_head = (min_head + 1) % period
+            min_len -= 1
+        if max_len > 0 and max_idx[max_head] <= i - period:
+            max_head = (max_head + 1) % period
+            max_len -= 1
+
+        x = low[i]
+        if np.isnan(x):
+            last_nan_low = i
+        else:
+            while min_len > 0 and low[min_idx[(min_head + min_len - 1) % period]] >= x:
+                min_len -= 1
+            min_idx[(min_head + min_len) % period] = i
+            min_len += 1
+
+        y = high[i]
+        if np.isnan(y):
+            last_nan_high = i
+        else:
+            while max_len > 0 and high[max_idx[(max_head + max_len - 1) % period]] <= y:
+                max_len -= 1
+            max_idx[(max_head + max_len) % period] = i
+            max_len += 1
+
+        if i >= period - 1:
+            if last_nan_low <= i - period:
+                lowest[i] = low[min_idx[min_head]]
+            if last_nan_high <= i - period:
+                highest[i] = high[max_idx[max_head]]
+
+    return lowest, highest
+
+
+@njit(cache=True)
+def on_balance_volume(close, volume):
+    """
+    单次遍历计算能量潮 OBV (与 Indicators.obv 的 pandas 实现一致)
+
+    收盘价上涨累加成交量, 下跌累减, 持平或涉及 NaN 的K线不变; 第一根为 0
+
+    Args:
+        close: 收盘价 float64 数组
+        volume: 成交量 float64 数组
+
+    Returns:
+        numpy.ndarray: OBV 数组
+    """
+    n = close.shape[0]
+    out = np.empty(n)
+    acc = 0.0
+    for i in range(n):
+        if i > 0 and not np.isnan(volume[i]):
+            d = close[i] - close[i - 1]
+            if d > 0:
+                acc += volume[i]
+            elif d < 0:
+                acc -= volume[i]
+        out[i] = acc
+
+    return out
+
+
+# 导入时按显式签名编译 (cache=True 时直接加载磁盘缓存)
+precompile(rolling_mean_std, '({f8}, int64)')
+precompile(average_true_range, '({f8}, {f8}, {f8}, int64)')
+precompile(rolling_means, '({f8}, int64[::1])')
+precompile(exponential_mean, '({f8}, int64)')
+precompile(rolling_low_high, '({f8}, {f8}, int64)')
+precompile(on_balance_volume, '({f8}, {f8})')
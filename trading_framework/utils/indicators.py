@@ -5,8 +5,35 @@ import pandas as pd
 import numpy as np
 import logging
 
+from ._njit import NUMBA_AVAILABLE
+from .indicator_kernels import (rolling_mean_std, average_true_range, rolling_means, exponential_mean,
+                                rolling_low_high, on_balance_volume)
+
 logger = logging.getLogger(__name__)
 
+# 最近一次布林带结果: (输入数组的底层只读数组, 缓存键, (upper, middle, lower))
+# 参数扫描中各组参数共享同一份只读K线数据, bb_period/bb_std 相同时直接复用
+_last_bands = None
+
+
+def _readonly_bands_key(values, period, std_dev):
+    """
+    布林带缓存键
+
+    只有底层数组只读 (如参数扫描工作进程中映射的共享内存) 时内容才不会被修改, 可以安全复用;
+    缓存同时持有底层数组的引用, 保证其地址在缓存有效期内不会被其他数组复用
+
+    Returns:
+        tuple: (底层数组, 缓存键), 不可缓存时为 (None, None)
+    """
+    root = values
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    if root.flags.writeable:
+        return None, None
+    key = (values.__array_interface__['data'][0], values.shape, values.strides, period, std_dev)
+    return root, key
+
 
 class Indicators:
     """技术指标计算器"""
@@ -25,6 +52,24 @@ class Indicators:
         """
         return data.rolling(window=period).mean()
 
+    @staticmethod
+    def smas(data, *periods):
+        """
+        单次遍历计算多条简单移动平均线 (结果与逐条调用 sma 逐位一致)
+
+        Args:
+            data: 价格序列
+            *periods: 各条均线的周期
+
+        Returns:
+            tuple: 各周期的 SMA (pandas.Series), 顺序与 periods 一致
+        """
+        if not NUMBA_AVAILABLE:
+            return tuple(Indicators.sma(data, period) for period in periods)
+
+        means = rolling_means(data.to_numpy(dtype=np.float64, na_value=np.nan), np.asarray(periods, dtype=np.int64))
+        return tuple(pd.Series(mean, index=data.index, name=data.name, copy=False) for mean in means)
+
     @staticmethod
     def ema(data, period):
         """
@@ -37,7 +82,12 @@ class Indicators:
         Returns:
             pandas.Series: EMA值
         """
-        return data.ewm(span=period, adjust=False).mean()
+        if not NUMBA_AVAILABLE:
+            return data.ewm(span=period, adjust=False).mean()
+
+        # 编译内核沿用 pandas 的递推 (逐位一致), 省去 ewm 窗口对象的构造开销
+        ema = exponential_mean(data.to_numpy(dtype=np.float64, na_value=np.nan), int(period))
+        return pd.Series(ema, index=data.index, name=data.name, copy=False)
 
     @staticmethod
     def rsi(data, period=14):
@@ -51,13 +101,33 @@ class Indicators:
         Returns:
             pandas.Series: RSI值 (0-100)
         """
-        delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        if not NUMBA_AVAILABLE:
+            delta = data.diff()
+            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+
+            rs = gain / loss
+            rsi = 100 - (100 / (1 + rs))
+            # 窗口内价格完全不变 (涨跌均值都为 0 且没有缺失的涨跌幅) 时取中性值 50, 而不是 0/0 得到的 NaN;
+            # 缺失数据 (NaN) 在上面被当作 0, 不能当成价格不变
+            complete = delta.notna().astype(np.float64).rolling(window=period).sum() == period
+            return rsi.mask((gain == 0) & (loss == 0) & complete, 50.0)
+
+        # 在数组上计算涨跌幅, 滚动均值用编译内核 (与 pandas rolling().mean() 逐位一致), 不再生成中间 Series
+        values = data.to_numpy(dtype=np.float64, na_value=np.nan)
+        delta = np.full(len(values), np.nan)
+        delta[1:] = values[1:] - values[:-1]
+        periods = np.array([period], dtype=np.int64)
+        gain = rolling_means(np.where(delta > 0, delta, 0.0), periods)[0]
+        loss = rolling_means(-np.where(delta < 0, delta, 0.0), periods)[0]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+        # 只涨不跌时 gain / loss 为 inf, RSI 为 100; 涨跌均值都为 0 时取中性值 50,
+        # 但窗口内有缺失的涨跌幅 (NaN 被当作 0) 时保持 NaN, 不把缺失数据当成价格不变
+        missing = rolling_means(np.isnan(delta).astype(np.float64), periods)[0]
+        rsi[(gain == 0) & (loss == 0) & (missing == 0)] = 50.0
+        return pd.Series(rsi, index=data.index, name=data.name, copy=False)
 
     @staticmethod
     def macd(data, fast=12, slow=26, signal=9):
@@ -81,11 +151,36 @@ class Indicators:
 
         return macd_line, signal_line, histogram
 
+    @staticmethod
+    def crosses(values, level=0.0):
+        """
+        相邻两根K线的穿越: 上穿为前一根 <= level 且当前 > level, 下穿为前一根 >= level 且当前 < level
+
+        Args:
+            values: 数值数组
+            level: 常数阈值, 或与 values 等长的数组 (如信号线、阻力位)
+
+        Returns:
+            tuple: (cross_up, cross_down) 布尔数组 (含 NaN 的比较为 False, 第一根恒为 False)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        level = np.broadcast_to(np.asarray(level, dtype=np.float64), values.shape)
+
+        cross_up = np.zeros(len(values), dtype=bool)
+        cross_down = np.zeros(len(values), dtype=bool)
+        cross_up[1:] = (values[1:] > level[1:]) & (values[:-1] <= level[:-1])
+        cross_down[1:] = (values[1:] < level[1:]) & (values[:-1] >= level[:-1])
+        return cross_up, cross_down
+
     @staticmethod
     def bollinger_bands(data, period=20, std_dev=2):
         """
         布林带 (Bollinger Bands)
 
+        安装 numba 且无缺失值时用单次遍历内核计算, 结果比 pandas rolling().mean()/std() 更接近精确值,
+        但两者并非逐位一致: pandas 的滚动累加误差随序列增长, 在价格大幅变化之后可达约 2e-8 的相对误差
+        (价格约 100 时约 2e-6). 收盘价恰好落在轨道附近时, 触轨判断可能与 pandas 版本不同
+
         Args:
             data: 价格序列
             period: 周期 (默认20)
@@ -94,12 +189,35 @@ class Indicators:
         Returns:
             tuple: (upper_band, middle_band, lower_band)
         """
-        middle_band = Indicators.sma(data, period)
-        std = data.rolling(window=period).std()
-        upper_band = middle_band + (std * std_dev)
-        lower_band = middle_band - (std * std_dev)
-
-        return upper_band, middle_band, lower_band
+        global _last_bands
+
+        values = data.to_numpy(dtype=np.float64)
+        root, key = _readonly_bands_key(values, period, std_dev)
+        if key is not None and _last_bands is not None and \
+                _last_bands[0] is root and _last_bands[1] == key:
+            return tuple(pd.Series(band, index=data.index, copy=False) for band in _last_bands[2])
+
+        if not NUMBA_AVAILABLE or np.isnan(values).any():
+            # 未安装 numba 时 pandas 更快; 含缺失值时沿用 pandas 的 NaN 处理规则
+            middle_band = Indicators.sma(data, period)
+            std = data.rolling(window=period).std()
+            bands = (middle_band + (std * std_dev), middle_band, middle_band - (std * std_dev))
+            if key is None:
+                return bands
+            bands = tuple(band.to_numpy(dtype=np.float64) for band in bands)
+        else:
+            # 单次遍历同时得到均值和标准差
+            middle, std = rolling_mean_std(values, period)
+            std *= std_dev
+            bands = (middle + std, middle, middle - std)
+
+        if key is not None:
+            # 缓存的结果设为只读, 避免调用方原地修改后影响下一次复用
+            for band in bands:
+                band.flags.writeable = False
+            _last_bands = (root, key, bands)
+
+        return tuple(pd.Series(band, index=data.index, copy=False) for band in bands)
 
     @staticmethod
     def atr(high, low, close, period=14):
@@ -115,12 +233,22 @@ class Indicators:
         Returns:
             pandas.Series: ATR值
         """
-        high_low = high - low
-        high_close = np.abs(high - close.shift())
-        low_close = np.abs(low - close.shift())
-
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        atr = true_range.rolling(window=period).mean()
+        if NUMBA_AVAILABLE:
+            h = high.to_numpy(dtype=np.float64)
+            l = low.to_numpy(dtype=np.float64)
+            c = close.to_numpy(dtype=np.float64)
+            if not (np.isnan(h).any() or np.isnan(l).any() or np.isnan(c).any()):
+                # 真实波幅和滚动均值在一次编译循环中完成, 不再拼接三列 DataFrame
+                return pd.Series(average_true_range(h, l, c, period), index=close.index, copy=False)
+
+        h = high.to_numpy(dtype=np.float64, na_value=np.nan)
+        l = low.to_numpy(dtype=np.float64, na_value=np.nan)
+        prev_close = np.full(len(h), np.nan)
+        prev_close[1:] = close.to_numpy(dtype=np.float64, na_value=np.nan)[:-1]
+
+        # 三者取最大 (fmax 跳过 NaN, 同 DataFrame.max(axis=1); 第一根K线为 high - low)
+        true_range = np.fmax(h - l, np.fmax(np.fabs(h - prev_close), np.fabs(l - prev_close)))
+        atr = pd.Series(true_range, index=close.index, copy=False).rolling(window=period).mean()
 
         return atr
 
@@ -139,10 +267,21 @@ class Indicators:
         Returns:
             tuple: (k_line, d_line)
         """
-        lowest_low = low.rolling(window=k_period).min()
-        highest_high = high.rolling(window=k_period).max()
+        if NUMBA_AVAILABLE:
+            # 单次遍历同时求出窗口最低价和最高价
+            lowest_low, highest_high = rolling_low_high(low.to_numpy(dtype=np.float64, na_value=np.nan),
+                                                        high.to_numpy(dtype=np.float64, na_value=np.nan),
+                                                        int(k_period))
+            lowest_low = pd.Series(lowest_low, index=low.index, name=low.name, copy=False)
+            highest_high = pd.Series(highest_high, index=high.index, name=high.name, copy=False)
+        else:
+            lowest_low = low.rolling(window=k_period).min()
+            highest_high = high.rolling(window=k_period).max()
 
         k_line = 100 * ((close - lowest_low) / (highest_high - lowest_low))
+        # 窗口内最高价等于最低价时区间为 0, 取中性值 50, 不让 inf/NaN 传到 D 线和下游;
+        # 窗口含 NaN 时极值为 NaN, 比较结果为 False, 与收盘价缺失的K线一样保持 NaN
+        k_line = k_line.mask((highest_high == lowest_low) & close.notna(), 50.0)
         d_line = k_line.rolling(window=d_period).mean()
 
         return k_line, d_line
@@ -161,25 +300,48 @@ class Indicators:
         Returns:
             pandas.Series: ADX值
         """
-        # 计算+DM和-DM
-        high_diff = high.diff()
-        low_diff = -low.diff()
+        if not NUMBA_AVAILABLE:
+            # 计算+DM和-DM
+            high_diff = high.diff()
+            low_diff = -low.diff()
+
+            plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+            minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+
+            # 计算ATR
+            atr = Indicators.atr(high, low, close, period)
+
+            # 计算+DI和-DI
+            plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+            minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
 
-        plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
-        minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+            # 计算DX
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
 
-        # 计算ATR
-        atr = Indicators.atr(high, low, close, period)
+            # 计算ADX
+            adx = dx.rolling(window=period).mean()
 
-        # 计算+DI和-DI
-        plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-        minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+            return adx
 
-        # 计算DX
-        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        # 在数组上计算 +DM/-DM 和 DX, 滚动均值和 ATR 用编译内核 (与上面的 pandas 实现逐位一致)
+        high_values = high.to_numpy(dtype=np.float64, na_value=np.nan)
+        low_values = low.to_numpy(dtype=np.float64, na_value=np.nan)
+        high_diff = np.full(len(high_values), np.nan)
+        low_diff = np.full(len(low_values), np.nan)
+        high_diff[1:] = high_values[1:] - high_values[:-1]
+        low_diff[1:] = low_values[:-1] - low_values[1:]
 
-        # 计算ADX
-        adx = dx.rolling(window=period).mean()
+        plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0.0)
+        minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0.0)
+
+        atr = Indicators.atr(high, low, close, period).to_numpy(dtype=np.float64, na_value=np.nan)
+        periods = np.array([period], dtype=np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = 100 * (rolling_means(plus_dm, periods)[0] / atr)
+            minus_di = 100 * (rolling_means(minus_dm, periods)[0] / atr)
+            dx = 100 * np.fabs(plus_di - minus_di) / (plus_di + minus_di)
+
+        adx = pd.Series(rolling_means(dx, periods)[0], index=high.index, copy=False)
 
         return adx
 
@@ -195,8 +357,14 @@ class Indicators:
         Returns:
             pandas.Series: OBV值
         """
-        obv = (np.sign(close.diff()) * volume).fillna(0).cumsum()
-        return obv
+        if not NUMBA_AVAILABLE:
+            obv = (np.sign(close.diff()) * volume).fillna(0).cumsum()
+            return obv
+
+        # 单次遍历按涨跌累加成交量, 不再生成 diff/sign/乘积 中间序列
+        obv = on_balance_volume(close.to_numpy(dtype=np.float64, na_value=np.nan),
+                                volume.to_numpy(dtype=np.float64, na_value=np.nan))
+        return pd.Series(obv, index=close.index, copy=False)
 
     @staticmethod
     def vwap(high, low, close, volume):
@@ -231,45 +399,40 @@ class Indicators:
         """
         logger.info("Calculating technical indicators...")
 
-        result = df.copy()
+        close = df['close']
+        columns = {}
 
-        # 移动平均线
-        result['sma_short'] = Indicators.sma(df['close'], ma_short)
-        result['sma_long'] = Indicators.sma(df['close'], ma_long)
-        result['ema_short'] = Indicators.ema(df['close'], ma_short)
-        result['ema_long'] = Indicators.ema(df['close'], ma_long)
+        # 移动平均线 (两条 SMA 一次遍历)
+        columns['sma_short'], columns['sma_long'] = Indicators.smas(close, ma_short, ma_long)
+        columns['ema_short'] = Indicators.ema(close, ma_short)
+        columns['ema_long'] = Indicators.ema(close, ma_long)
 
         # RSI
-        result['rsi'] = Indicators.rsi(df['close'])
+        columns['rsi'] = Indicators.rsi(close)
 
         # MACD
-        macd, signal, histogram = Indicators.macd(df['close'])
-        result['macd'] = macd
-        result['macd_signal'] = signal
-        result['macd_histogram'] = histogram
+        columns['macd'], columns['macd_signal'], columns['macd_histogram'] = Indicators.macd(close)
 
         # 布林带
-        upper, middle, lower = Indicators.bollinger_bands(df['close'])
-        result['bb_upper'] = upper
-        result['bb_middle'] = middle
-        result['bb_lower'] = lower
+        columns['bb_upper'], columns['bb_middle'], columns['bb_lower'] = Indicators.bollinger_bands(close)
 
         # ATR
-        result['atr'] = Indicators.atr(df['high'], df['low'], df['close'])
+        columns['atr'] = Indicators.atr(df['high'], df['low'], close)
 
         # Stochastic
-        k_line, d_line = Indicators.stochastic(df['high'], df['low'], df['close'])
-        result['stoch_k'] = k_line
-        result['stoch_d'] = d_line
+        columns['stoch_k'], columns['stoch_d'] = Indicators.stochastic(df['high'], df['low'], close)
 
         # ADX
-        result['adx'] = Indicators.adx(df['high'], df['low'], df['close'])
+        columns['adx'] = Indicators.adx(df['high'], df['low'], close)
 
         # OBV
-        result['obv'] = Indicators.obv(df['close'], df['volume'])
+        columns['obv'] = Indicators.obv(close, df['volume'])
 
         # VWAP
-        result['vwap'] = Indicators.vwap(df['high'], df['low'], df['close'], df['volume'])
+        columns['vwap'] = Indicators.vwap(df['high'], df['low'], close, df['volume'])
+
+        # 所有指标列一次性拼接 (不再复制整表后逐列插入)
+        result = pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
 
         logger.info("Indicators calculation completed")
         return result
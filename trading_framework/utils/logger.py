@@ -3,10 +3,12 @@
 """
 import logging
 import os
+from logging.handlers import RotatingFileHandler
 from datetime import datetime
 
 
-def setup_logger(name='trading_framework', level='INFO', log_file=None, console=True):
+def setup_logger(name='trading_framework', level='INFO', log_file=None, console=True,
+                 strategy_level=None, max_bytes=10 * 1024 * 1024, backup_count=5):
     """
     设置日志记录器
 
@@ -15,6 +17,9 @@ def setup_logger(name='trading_framework', level='INFO', log_file=None, console=
         level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: 日志文件路径 (可选)
         console: 是否输出到控制台
+        strategy_level: 策略模块 (strategies.*) 的日志级别 (可选, 回测时设为 WARNING 可跳过逐bar信号日志)
+        max_bytes: 单个日志文件的最大字节数, 超出后轮转 (默认10MB)
+        backup_count: 保留的历史日志文件个数 (默认5)
 
     Returns:
         logging.Logger: 配置好的日志记录器
@@ -22,6 +27,9 @@ def setup_logger(name='trading_framework', level='INFO', log_file=None, console=
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, level.upper()))
 
+    if strategy_level:
+        logging.getLogger('strategies').setLevel(getattr(logging, strategy_level.upper()))
+
     # 清除已存在的处理器
     logger.handlers.clear()
 
@@ -44,8 +52,13 @@ def setup_logger(name='trading_framework', level='INFO', log_file=None, console=
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        # 按大小轮转, 长时间运行时日志文件不会无限增长
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                           encoding='utf-8')
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
 
+    # 已有自己的处理器, 不再传递给根日志记录器 (避免同一条日志被输出两次)
+    logger.propagate = False
+
     return logger
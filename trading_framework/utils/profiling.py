@@ -0,0 +1,63 @@
+"""
+性能分析工具 - cProfile 统计 / py-spy 火焰图
+"""
+import cProfile
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+
+def profile_call(func, *args, output='logs/profile.prof', top=25, **kwargs):
+    """
+    在 cProfile 下运行函数, 保存 .prof 统计文件并打印最耗时的调用
+
+    安装了 flameprof 时同时生成同名 .svg 火焰图
+
+    Args:
+        func: 要分析的函数
+        output: .prof 输出路径
+        top: 打印累计耗时最高的前 N 个函数
+
+    Returns:
+        func 的返回值
+    """
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(output)
+        print(f"\nProfile saved to: {output}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+
+        flameprof = shutil.which('flameprof')
+        if flameprof:
+            svg_path = output.with_suffix('.svg')
+            with open(svg_path, 'w') as svg:
+                subprocess.run([flameprof, str(output)], stdout=svg, check=False)
+            print(f"Flame graph saved to: {svg_path}")
+
+
+def reexec_under_pyspy(output='logs/profile.svg', argv=None):
+    """
+    在 py-spy record 下重新执行当前进程, 生成火焰图 (成功时不返回)
+
+    Args:
+        output: 火焰图 .svg 输出路径
+        argv: 传给子进程的命令行参数 (默认 sys.argv)
+
+    Returns:
+        bool: 未安装 py-spy 时返回 False
+    """
+    pyspy = shutil.which('py-spy')
+    if not pyspy:
+        return False
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    argv = sys.argv if argv is None else argv
+    os.execv(pyspy, [pyspy, 'record', '-o', str(output), '--', sys.executable, *argv])
@@ -0,0 +1,48 @@
+"""
+请求限频 - 令牌桶, 在客户端按接口权重节流, 避免触发交易所的 429 限频
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    令牌按 rate 个/秒持续补充, 最多积累 capacity 个; 每次请求先取走与其权重相同的令牌,
+    不足时在锁外等待到令牌补足为止. 令牌在锁内预先扣除 (可暂时为负), 多个线程同时等待时
+    按到达顺序依次放行, 不会一起醒来后再次超额
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 令牌上限 (允许的突发请求权重)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, weight=1):
+        """
+        取走 weight 个令牌, 不足时阻塞等待
+
+        Args:
+            weight: 本次请求的权重
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            self._tokens -= weight
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait